@@ -0,0 +1,63 @@
+"""
+Async clients for backend.async_views.
+
+mongoengine is synchronous, so the async views go through pymongo's
+AsyncMongoClient against the same database and collections, and upload
+through the aiohttp based Azure blob client. Both are created on first use
+and shared by every request on the process's event loop.
+"""
+import os
+
+from azure.storage.blob import ContentSettings
+from azure.storage.blob.aio import BlobServiceClient
+from django.conf import settings
+from pymongo import AsyncMongoClient
+
+from backend.metrics import BLOB_UPLOAD
+
+_client = None
+_container = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(
+            settings.MONGO_HOST,
+            username=settings.MONGO_USER,
+            password=settings.MONGO_PASSWORD,
+            **settings.MONGO_CLIENT_OPTIONS,
+        )
+    return _client
+
+
+def collection(model, read_preference=None):
+    """The async pymongo collection behind a mongoengine model, on the primary unless read_preference says otherwise"""
+    client = get_client()
+    # Like mongoengine, fall back to the database named in MONGO_HOST
+    db = client[settings.MONGO_DB_NAME] if settings.MONGO_DB_NAME else client.get_default_database()
+    return db.get_collection(model._get_collection_name(), read_preference=read_preference)
+
+
+def get_container_client():
+    global _container
+    if _container is None:
+        service = BlobServiceClient.from_connection_string(
+            os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+            max_block_size=settings.BLOB_BLOCK_SIZE,
+            max_single_put_size=settings.BLOB_SINGLE_PUT_SIZE,
+        )
+        _container = service.get_container_client(os.environ.get("AZURE_CONTAINER_NAME", "media"))
+    return _container
+
+
+async def upload(blob_name, data, content_type):
+    blob_client = get_container_client().get_blob_client(blob_name)
+    with BLOB_UPLOAD.labels("async").time():
+        await blob_client.upload_blob(
+            data,
+            overwrite=True,
+            max_concurrency=settings.BLOB_UPLOAD_CONCURRENCY,
+            content_settings=ContentSettings(content_type=content_type),
+        )
+    return blob_client.url
@@ -0,0 +1,182 @@
+"""
+Async versions of the I/O-bound endpoints, routed instead of their views.py
+counterparts when settings.ASYNC_VIEWS is on.
+
+They keep the same URLs and responses but await MongoDB and Azure through
+backend.aio instead of holding a worker thread for every call, so a single
+ASGI process can keep thousands of slow clients in flight. DRF's @api_view
+is synchronous, so these are plain Django async views that check the JWT
+themselves.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from mongoengine import DoesNotExist
+from rest_framework.exceptions import AuthenticationFailed
+
+from backend import aio
+from backend.authentication import MongoJWTAuthentication
+from backend.blob import new_blob_name
+from backend.caching import acached_feed, aget_user
+from backend.derivatives import schedule_variants
+from backend.filters import EventListing, ListingError, facet_pipeline, facet_values
+from backend.models import Booking, Event, EventStats, SeatClaim, SeatMap
+from backend.renderers import dumps
+from backend.routing import catalog_read_preference
+from backend.seating import build_bitmap, decode_bitmap, encode_bitmap, held_query, rebuild_seat_map
+from backend.stats import stats_dict
+from backend.views import (
+    BOOKING_HISTORY_FIELDS,
+    booking_history_dict,
+    upload_error,
+)
+from backend.waiting_room import admission_error
+
+_jwt = MongoJWTAuthentication()
+
+
+def respond(data, status=200, headers=None):
+    # Same encoding as the sync views' ORJSONRenderer
+    return HttpResponse(dumps(data), status=status, headers=headers, content_type="application/json")
+
+
+async def authenticate(request):
+    """The User behind the request's Bearer token, None without one"""
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    validated_token = _jwt.get_validated_token(raw_token)
+    try:
+        return await aget_user(validated_token.get("user_id"))
+    except DoesNotExist:
+        return None
+
+
+def with_user(required):
+    """Set request.user from the JWT, answering 401 like DRF when it is bad or required and missing"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                user = await authenticate(request)
+            except AuthenticationFailed as e:
+                return respond({"detail": str(e.detail)}, status=401)
+            if user is None and required:
+                return respond({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = user or AnonymousUser()
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def waiting_room_response(request, event_ids):
+    if not settings.WAITING_ROOM_ENABLED:
+        return None
+    reason = await sync_to_async(admission_error, thread_sensitive=False)(request, event_ids)
+    if reason is None:
+        return None
+    return respond({"error": reason, "waiting_room": True}, status=429, headers={"Retry-After": "1"})
+
+
+# --- EVENTS ---
+
+@require_GET
+@with_user(required=False)
+async def fetch_events(request):
+    if not request.GET.get("created_by"):
+        status_code, data = await acached_feed(request.GET, lambda: _fetch_events(request))
+    else:
+        status_code, data = await _fetch_events(request)
+    return respond(data, status=status_code)
+
+
+async def _fetch_events(request):
+    """(status, data) for fetch_events, same parameters as views.fetch_events"""
+    try:
+        listing = EventListing(request.GET, request.user)
+    except ListingError as e:
+        return e.status, {"error": str(e)}
+
+    events = aio.collection(Event, listing.read_preference)
+    if listing.event_id:
+        event = await events.find_one(listing.id_filter, listing.projection) if listing.id_filter else None
+        return 200, listing.single(event)
+
+    data = listing.page(await listing.find(events).to_list())
+    if listing.stats:
+        await _embed_stats(data["results"])
+    if listing.facets:
+        result = await (await events.aggregate(facet_pipeline(listing.match))).to_list()
+        data["facets"] = facet_values(result[0] if result else {})
+    return 200, data
+
+
+async def _embed_stats(events):
+    ids = [e["id"] for e in events]
+    docs = await aio.collection(EventStats, catalog_read_preference()).find(
+        {"event_id": {"$in": ids}}, {"_id": 0}
+    ).to_list()
+    stats = {doc["event_id"]: doc for doc in docs}
+    for event in events:
+        event["stats"] = stats_dict(stats.get(event["id"]), event.get("capacity"))
+
+
+@require_GET
+@with_user(required=True)
+async def get_reserved_seats(request, event_id):
+    queued = await waiting_room_response(request, [event_id])
+    if queued:
+        return queued
+
+    claims = aio.collection(SeatClaim, catalog_read_preference())
+    seat_map = await aio.collection(SeatMap, catalog_read_preference()).find_one({"event_id": event_id}, {"_id": 0, "words": 1})
+    if seat_map is None:
+        # Not materialized yet: let the sync path build it once, off the event loop
+        seat_map = await sync_to_async(rebuild_seat_map, thread_sensitive=False)(event_id)
+
+    held = await claims.find(held_query(event_id), {"_id": 0, "row": 1, "column": 1}).to_list()
+    bitmap = build_bitmap(seat_map.get("words"), [(c["row"], c["column"]) for c in held])
+
+    if request.GET.get("encoding") == "list":
+        return respond(decode_bitmap(bitmap))
+    return respond(encode_bitmap(bitmap))
+
+
+# --- BOOKINGS ---
+
+@require_GET
+@with_user(required=True)
+async def get_user_bookings(request):
+    cursor = aio.collection(Booking).find(
+        {"user_email": request.user.email},
+        {field: 1 for field in BOOKING_HISTORY_FIELDS},
+    ).sort([("created_at", -1)])
+    return respond([booking_history_dict(b) async for b in cursor])
+
+
+# --- UPLOADS ---
+
+@csrf_exempt
+@require_POST
+@with_user(required=True)
+async def upload_file(request):
+    file = request.FILES.get("file")
+    error = upload_error(file)
+    if error:
+        return respond({"error": error}, status=400)
+
+    data = file.read()
+    try:
+        blob_url = await aio.upload(new_blob_name(file), data, file.content_type)
+    except Exception as e:
+        return respond({"error": f"Upload failed: {str(e)}"}, status=500)
+
+    if settings.IMAGE_DERIVATIVES:
+        schedule_variants(blob_url, data)
+    return respond({"file_url": blob_url}, status=201)
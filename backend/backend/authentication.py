@@ -1,12 +1,14 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from mongoengine import DoesNotExist
-from backend.models import User
+from backend.caching import get_user
 
 class MongoJWTAuthentication(JWTAuthentication):
     def get_user(self, validated_token):
         user_id = validated_token.get("user_id")
 
+        # request.user ends up being this cached instance, views reuse it
+        # instead of looking the user up again
         try:
-            return User.objects.get(id=user_id)
+            return get_user(user_id)
         except DoesNotExist:
             return None
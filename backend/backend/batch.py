@@ -0,0 +1,274 @@
+"""
+Batch bookings.
+
+Many seat groups, possibly for several events, are validated and committed
+in a fixed number of round trips instead of one create_booking call each:
+one read of the events, one read of the requested seats' claims, one
+conditional $inc per event, one unordered insert of all seat claims, one
+$bit update per event, one bulk_write of the bookings and one of the
+event stats. Every item
+succeeds or fails on its own and gets its own result. An error that isn't
+a lost seat race rolls back everything the batch had taken.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from backend.models import BOOKING_EVENT_FIELDS, Booking, Event, Seat, SeatClaim, booking_event_fields
+from backend.seating import (
+    DUPLICATE_KEY,
+    SeatTakenError,
+    SoldOutError,
+    _purge_expired,
+    admit_attendees,
+    mark_seats,
+    normalize_seats,
+    release_attendees,
+)
+from backend.stats import record_bookings
+
+
+def _parse_item(index, data):
+    if not isinstance(data, dict) or not data.get("event_id") or not data.get("seats"):
+        raise ValueError("Missing booking details")
+    try:
+        ObjectId(data["event_id"])
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid event_id")
+    try:
+        total_price = float(data.get("total_price", 0))
+    except (TypeError, ValueError):
+        raise ValueError("total_price must be a number")
+
+    return {
+        "index": index,
+        "event_id": str(data["event_id"]),
+        "seats": normalize_seats(data["seats"]),
+        "total_price": total_price,
+        "booking_id": ObjectId(),
+        "event": None,
+        "error": None,
+    }
+
+
+def _live(items):
+    return [item for item in items if item["error"] is None]
+
+
+def _by_event(items):
+    groups = defaultdict(list)
+    for item in items:
+        groups[item["event_id"]].append(item)
+    return groups
+
+
+def _check_events(items, user):
+    ids = {ObjectId(item["event_id"]) for item in items}
+    events = {
+        str(e["_id"]): e
+        for e in Event._get_collection().find(
+            {"_id": {"$in": list(ids)}}, {field: 1 for field in ("created_by", *BOOKING_EVENT_FIELDS)}
+        )
+    }
+    for item in items:
+        event = events.get(item["event_id"])
+        if event is None:
+            item["error"] = "Event not found"
+        elif event.get("created_by") == user.email:
+            item["error"] = "Organizers cannot book their own events"
+        else:
+            item["event"] = event
+
+
+def _check_seats(items):
+    """Fail items asking for a seat that is already claimed or wanted by an earlier item"""
+    wanted = [
+        {"event_id": item["event_id"], "row": row, "column": column}
+        for item in items for row, column in item["seats"]
+    ]
+    now = datetime.utcnow()
+    claims = SeatClaim._get_collection().find(
+        {"$or": wanted}, {"_id": 0, "event_id": 1, "row": 1, "column": 1, "expires_at": 1}
+    )
+    # Holds that expired but aren't reaped yet are free, _claim purges them
+    taken = {
+        (c["event_id"], c["row"], c["column"])
+        for c in claims
+        if c.get("expires_at") is None or c["expires_at"] > now
+    }
+    for item in items:
+        seats = [(item["event_id"], row, column) for row, column in item["seats"]]
+        clash = next((seat for seat in seats if seat in taken), None)
+        if clash:
+            item["error"] = str(SeatTakenError(clash[1:]))
+        else:
+            taken.update(seats)
+
+
+def _admit(items):
+    """One $inc per event, falling back to item by item when the event can't take the whole group"""
+    for event_id, group in _by_event(items).items():
+        try:
+            admit_attendees(event_id, sum(len(item["seats"]) for item in group))
+            for item in group:
+                item["admitted"] = True
+            continue
+        except SoldOutError:
+            pass
+        for item in group:
+            try:
+                admit_attendees(event_id, len(item["seats"]))
+                item["admitted"] = True
+            except SoldOutError as e:
+                item["error"] = str(e)
+
+
+def _release(items, seat_map=True):
+    """
+    Undo the claims and admission of items that failed after being admitted.
+    seat_map=False when their bits were never set: a lost seat belongs to
+    someone else and must stay marked.
+    """
+    if not items:
+        return
+    SeatClaim._get_collection().delete_many({"booking_id": {"$in": [str(i["booking_id"]) for i in items]}})
+    for event_id, group in _by_event(items).items():
+        if seat_map:
+            mark_seats(event_id, [seat for item in group for seat in item["seats"]], taken=False)
+        release_attendees(event_id, sum(len(item["seats"]) for item in group))
+
+
+def _failed_writes(exc, owners):
+    """(item, error) for each item with a failed write, owners maps op index -> (item, seat or None)"""
+    failed = {}
+    for error in exc.details["writeErrors"]:
+        item, detail = owners[error["index"]]
+        if error["code"] == DUPLICATE_KEY and detail is not None:
+            failed.setdefault(item["index"], (item, str(SeatTakenError(detail))))
+        else:
+            failed.setdefault(item["index"], (item, error.get("errmsg", "Write failed")))
+    return failed.values()
+
+
+def _insert_claims(items):
+    """Insert the items' seat claims in one unordered write, returning (item, error) for those that lost a seat"""
+    now = datetime.utcnow()
+    docs, owners = [], []
+    for item in items:
+        for row, column in item["seats"]:
+            docs.append({
+                "event_id": item["event_id"], "row": row, "column": column,
+                "booking_id": str(item["booking_id"]), "created_at": now,
+            })
+            owners.append((item, (row, column)))
+
+    try:
+        SeatClaim._get_collection().insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        return list(_failed_writes(exc, owners))
+    return []
+
+
+def _claim(items):
+    failed = {item["index"]: (item, error) for item, error in _insert_claims(items)}
+
+    # Like seating._insert_claims: a seat may only be held by an expired hold
+    # the TTL monitor hasn't reaped yet, purge those and try those items once more
+    retry = [item for item, _ in failed.values() if _purge_expired(item["event_id"], item["seats"])]
+    if retry:
+        SeatClaim._get_collection().delete_many({"booking_id": {"$in": [str(i["booking_id"]) for i in retry]}})
+        for item in retry:
+            del failed[item["index"]]
+        failed.update({item["index"]: (item, error) for item, error in _insert_claims(retry)})
+
+    for item, error in failed.values():
+        item["error"] = error
+    _release([item for item, _ in failed.values()], seat_map=False)
+
+    for event_id, group in _by_event(_live(items)).items():
+        mark_seats(event_id, [seat for item in group for seat in item["seats"]], taken=True)
+        for item in group:
+            item["marked"] = True
+
+
+def _insert_bookings(items, user):
+    ops, owners = [], []
+    for item in items:
+        booking = Booking(
+            id=item["booking_id"],
+            event_id=item["event_id"],
+            user_email=user.email,
+            user_name=getattr(user, "full_name", ""),
+            seats=[Seat(row=row, column=column) for row, column in item["seats"]],
+            num_tickets=len(item["seats"]),
+            total_price=item["total_price"],
+            booking_status="Confirmed",
+            **booking_event_fields(item["event"])
+        )
+        ops.append(InsertOne(booking.to_mongo()))
+        owners.append((item, None))
+
+    failed = []
+    try:
+        Booking._get_collection().bulk_write(ops, ordered=False)
+    except BulkWriteError as exc:
+        for item, error in _failed_writes(exc, owners):
+            item["error"] = error
+            failed.append(item)
+    _release(failed)
+
+
+def _rollback(items):
+    """Give back everything still-live items took when the batch fails half way"""
+    taken = [item for item in items if item["error"] is None and item.get("admitted")]
+    if not taken:
+        return
+    Booking._get_collection().delete_many({"_id": {"$in": [item["booking_id"] for item in taken]}})
+    _release([item for item in taken if item.get("marked")])
+    _release([item for item in taken if not item.get("marked")], seat_map=False)
+
+
+def book_batch(user, items_data):
+    """Book every item it can, returning one result dict per item in request order"""
+    items, results = [], {}
+    for index, data in enumerate(items_data):
+        try:
+            items.append(_parse_item(index, data))
+        except ValueError as e:
+            results[index] = {"index": index, "success": False, "error": str(e)}
+
+    if items:
+        _check_events(items, user)
+    if _live(items):
+        _check_seats(_live(items))
+    admitted = []
+    try:
+        if _live(items):
+            _admit(_live(items))
+
+        admitted = _live(items)
+        if admitted:
+            _claim(admitted)
+        if _live(admitted):
+            _insert_bookings(_live(admitted), user)
+    except Exception:
+        # Not just lost races: don't leak attendees_count or orphan claims
+        _rollback(items)
+        raise
+    record_bookings((item["event_id"], len(item["seats"]), item["total_price"]) for item in _live(admitted))
+
+    for item in items:
+        if item["error"] is None:
+            results[item["index"]] = {
+                "index": item["index"],
+                "success": True,
+                "booking_id": str(item["booking_id"]),
+                "event_id": item["event_id"],
+            }
+        else:
+            results[item["index"]] = {"index": item["index"], "success": False, "error": item["error"]}
+    return [results[index] for index in range(len(items_data))]
@@ -1,19 +1,132 @@
-from azure.storage.blob import BlobServiceClient
+"""
+Azure Blob uploads.
+
+One BlobServiceClient (and its HTTP connection pool) is shared by the whole
+process. Files are sent as parallel blocks, and with BLOB_BACKGROUND_UPLOADS
+the transfer runs on a bounded thread pool so the request returns straight
+away with the blob's final URL and a job id to poll.
+
+For local testing point AZURE_STORAGE_CONNECTION_STRING at Azurite
+("UseDevelopmentStorage=true") and set AZURE_CREATE_CONTAINER=True.
+"""
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import BlobServiceClient, ContentSettings
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from backend.metrics import BLOB_UPLOAD
+import threading
 import uuid
 import os
 
+_container = None
+_container_lock = threading.Lock()
+
+_executor = None
+_executor_lock = threading.Lock()
+# Uploads queued or running in the background, past this they run inline
+_executor_slots = threading.BoundedSemaphore(settings.BLOB_MAX_PENDING_UPLOADS)
+
+
+def get_container_client():
+    """Process-wide container client, created on first use"""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                service = BlobServiceClient.from_connection_string(
+                    os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+                    max_block_size=settings.BLOB_BLOCK_SIZE,
+                    max_single_put_size=settings.BLOB_SINGLE_PUT_SIZE,
+                )
+                container = service.get_container_client(
+                    os.environ.get("AZURE_CONTAINER_NAME", "media")
+                )
+                if os.environ.get("AZURE_CREATE_CONTAINER", "False") == "True":
+                    try:
+                        container.create_container()
+                    except ResourceExistsError:
+                        pass
+                _container = container
+    return _container
+
+
+def new_blob_name(file):
+    return f"{uuid.uuid4()}-{file.name}"
+
+
+def blob_url(blob_name):
+    return get_container_client().get_blob_client(blob_name).url
+
+
+def _upload(blob_name, data, content_type):
+    blob_client = get_container_client().get_blob_client(blob_name)
+    with BLOB_UPLOAD.labels("sync").time():
+        blob_client.upload_blob(
+            data,
+            overwrite=True,
+            max_concurrency=settings.BLOB_UPLOAD_CONCURRENCY,
+            content_settings=ContentSettings(content_type=content_type),
+        )
+    return blob_client.url
+
+
 def upload_image_to_blob(file):
-    blob_service = BlobServiceClient.from_connection_string(
-        os.environ["AZURE_STORAGE_CONNECTION_STRING"]
-    )
+    return _upload(new_blob_name(file), file, getattr(file, "content_type", None))
+
+
+# --- BACKGROUND UPLOADS ---
+
+def _job_key(job_id):
+    return f"blob-job:{job_id}"
+
+
+def get_upload_job(job_id):
+    return cache.get(_job_key(job_id))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOB_UPLOAD_WORKERS, thread_name_prefix="blob-upload"
+                )
+    return _executor
+
+
+def _run_job(job_id, blob_name, data, content_type):
+    try:
+        url = _upload(blob_name, data, content_type)
+        cache.set(_job_key(job_id), {"status": "done", "url": url}, settings.BLOB_JOB_TTL)
+    except Exception as e:
+        cache.set(_job_key(job_id), {"status": "failed", "url": None, "error": str(e)}, settings.BLOB_JOB_TTL)
+    finally:
+        _executor_slots.release()
+
 
-    container_client = blob_service.get_container_client(
-        os.environ.get("AZURE_CONTAINER_NAME", "media")
-    )
+def upload_image_in_background(file):
+    """
+    Queue the upload and return (job_id, url) without waiting for it.
 
-    blob_name = f"{uuid.uuid4()}-{file.name}"
-    blob_client = container_client.get_blob_client(blob_name)
+    The file is read into memory first because Django discards uploaded files
+    when the request ends. When BLOB_MAX_PENDING_UPLOADS uploads are already
+    queued the upload runs inline instead, so a burst can't grow memory
+    without bound; job_id is None in that case.
+    """
+    blob_name = new_blob_name(file)
+    content_type = getattr(file, "content_type", None)
 
-    blob_client.upload_blob(file, overwrite=True)
+    if not _executor_slots.acquire(blocking=False):
+        return None, _upload(blob_name, file, content_type)
 
-    return blob_client.url
\ No newline at end of file
+    try:
+        job_id = uuid.uuid4().hex
+        url = blob_url(blob_name)
+        cache.set(_job_key(job_id), {"status": "pending", "url": url}, settings.BLOB_JOB_TTL)
+        _get_executor().submit(_run_job, job_id, blob_name, file.read(), content_type)
+    except Exception:
+        _executor_slots.release()
+        raise
+    return job_id, url
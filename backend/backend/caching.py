@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.cache import cache
+
+from backend.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ttl seconds after being set"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# --- USER CACHE ---
+# Authenticated requests resolve their User through here instead of hitting
+# Mongo every time. Cached instances are shared between requests, so views
+# must not modify them: load a fresh copy before changing and saving a user.
+
+_users = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+# What the request path reads from request.user. Users are loaded with only
+# these fields, so the password hash never reaches either cache tier.
+CACHED_USER_FIELDS = (
+    "email", "full_name", "phone", "city", "avatar_url", "role", "favorite_categories", "favorite_events",
+)
+
+
+def _shared_key(user_id):
+    return f"user:{user_id}"
+
+
+def _cached_son(son):
+    return {field: son[field] for field in ("_id", *CACHED_USER_FIELDS) if field in son}
+
+
+def get_user(user_id):
+    """Resolve a User by id from this process, then the shared cache, then Mongo"""
+    user_id = str(user_id)
+    user = _users.get(user_id)
+    if user is not None:
+        return user
+
+    if settings.USER_CACHE_SHARED:
+        son = cache.get(_shared_key(user_id))
+        if son is not None:
+            user = User._from_son(son)
+            _users.set(user_id, user)
+            return user
+
+    user = User.objects.only(*CACHED_USER_FIELDS).get(id=user_id)
+    _users.set(user_id, user)
+    if settings.USER_CACHE_SHARED:
+        cache.set(_shared_key(user_id), _cached_son(user.to_mongo().to_dict()), settings.USER_CACHE_TTL)
+    return user
+
+
+async def aget_user(user_id):
+    """get_user for async views, the Mongo lookup goes through backend.aio"""
+    from backend import aio
+
+    user_id = str(user_id)
+    user = _users.get(user_id)
+    if user is not None:
+        return user
+
+    son = await cache.aget(_shared_key(user_id)) if settings.USER_CACHE_SHARED else None
+    if son is None:
+        son = await aio.collection(User).find_one(
+            {"_id": ObjectId(user_id)}, {field: 1 for field in CACHED_USER_FIELDS}
+        )
+        if son is None:
+            raise User.DoesNotExist(f"User {user_id} not found")
+        if settings.USER_CACHE_SHARED:
+            await cache.aset(_shared_key(user_id), son, settings.USER_CACHE_TTL)
+
+    user = User._from_son(son)
+    _users.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Drop a user from this process and the shared tier. Other processes keep
+    their own copy until it expires, so USER_CACHE_TTL bounds how stale they get.
+    """
+    user_id = str(user_id)
+    _users.delete(user_id)
+    if settings.USER_CACHE_SHARED:
+        cache.delete(_shared_key(user_id))
+
+
+# --- EVENT FEED CACHE ---
+# Anonymous fetch_events responses, keyed on the normalized query string plus
+# a generation number. Any write that changes what the feed shows bumps the
+# generation, which orphans every cached page at once; they age out on their own.
+
+FEED_GENERATION_KEY = "events:feed:generation"
+
+
+def _feed_generation():
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        cache.add(FEED_GENERATION_KEY, 1, None)
+        generation = cache.get(FEED_GENERATION_KEY, 1)
+    return generation
+
+
+def invalidate_event_feed():
+    """
+    Best effort: callers run it after their write has committed, so a cache
+    outage must not fail them. The feed is then stale for up to its TTL.
+    """
+    try:
+        try:
+            cache.incr(FEED_GENERATION_KEY)
+        except ValueError:
+            cache.add(FEED_GENERATION_KEY, 1, None)
+    except Exception:
+        logger.warning("Could not invalidate the event feed cache", exc_info=True)
+
+
+async def _afeed_generation():
+    generation = await cache.aget(FEED_GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(FEED_GENERATION_KEY, 1, None)
+        generation = await cache.aget(FEED_GENERATION_KEY, 1)
+    return generation
+
+
+def _feed_key(params, generation):
+    normalized = urlencode(sorted((k, v) for k in params for v in params.getlist(k)))
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"events:feed:{generation}:{digest}"
+
+
+def feed_cache_key(params):
+    """Same key for the same parameters regardless of their order in the URL"""
+    return _feed_key(params, _feed_generation())
+
+
+def get_or_compute(key, compute, ttl, cacheable=lambda value: True):
+    """
+    Cached value for key, computing it on a miss.
+
+    Entries outlive their ttl by settings.CACHE_STALE_GRACE. Once an entry is
+    stale, the first worker to take the key's lock recomputes it while the rest
+    keep serving the stale copy, so an expiry never sends every worker to Mongo
+    at once. With nothing to serve, others wait briefly for the winner.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["value"]
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            if cacheable(value):
+                cache.set(key, {"value": value, "fresh_until": time.time() + ttl}, ttl + settings.CACHE_STALE_GRACE)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry["value"]
+
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+    return compute()
+
+
+async def aget_or_compute(key, compute, ttl, cacheable=lambda value: True):
+    """get_or_compute for async callers, compute is a coroutine function"""
+    entry = await cache.aget(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["value"]
+
+    lock_key = f"{key}:lock"
+    if await cache.aadd(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            value = await compute()
+            if cacheable(value):
+                await cache.aset(key, {"value": value, "fresh_until": time.time() + ttl}, ttl + settings.CACHE_STALE_GRACE)
+            return value
+        finally:
+            await cache.adelete(lock_key)
+
+    if entry is not None:
+        return entry["value"]
+
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry["value"]
+    return await compute()
+
+
+def cached_feed(params, compute):
+    """(status, data) for an anonymous fetch_events call, only 200s are cached"""
+    return get_or_compute(
+        feed_cache_key(params),
+        compute,
+        settings.EVENT_FEED_CACHE_TTL,
+        cacheable=lambda value: value[0] == 200,
+    )
+
+
+async def acached_feed(params, compute):
+    return await aget_or_compute(
+        _feed_key(params, await _afeed_generation()),
+        compute,
+        settings.EVENT_FEED_CACHE_TTL,
+        cacheable=lambda value: value[0] == 200,
+    )
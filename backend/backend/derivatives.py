@@ -0,0 +1,92 @@
+"""
+Image derivative pipeline.
+
+After upload_file stores an original, its bytes go to a process pool that
+renders the variants in backend.images. The results are uploaded from the blob
+thread pool and their URLs recorded both on an ImageAsset (for events created
+later) and on any Event already pointing at the original.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+from django.conf import settings
+
+from backend import blob
+from backend.caching import invalidate_event_feed
+from backend.images import VARIANTS, render_variants
+from backend.models import Event, ImageAsset
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the parent has Mongo and HTTP client threads running
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def schedule_variants(url, data):
+    """Render and store url's variants in the background, never blocking or failing the caller"""
+    try:
+        future = _get_pool().submit(render_variants, data, VARIANTS)
+        future.add_done_callback(
+            lambda done: blob._get_executor().submit(store_variants, url, done)
+        )
+    except Exception:
+        logger.exception("Could not schedule image variants for %s", url)
+
+
+def store_variants(url, future):
+    try:
+        rendered = future.result()
+        base = os.path.splitext(unquote(url.rsplit("/", 1)[-1]))[0]
+
+        variants = {}
+        for name, output in rendered.items():
+            variant = {"width": output["width"], "height": output["height"]}
+            for fmt, content_type in CONTENT_TYPES.items():
+                variant[fmt] = blob._upload(f"{base}-{name}.{fmt}", output[fmt], content_type)
+            variants[name] = variant
+
+        ImageAsset.objects(url=url).update_one(set__variants=variants, upsert=True)
+        Event.objects(image_url=url).update(set__image_variants=variants)
+        Event.objects(banner_url=url).update(set__banner_variants=variants)
+        invalidate_event_feed()
+    except Exception:
+        logger.exception("Generating image variants for %s failed", url)
+
+
+def variants_for(*urls):
+    """{url: variants} for the originals whose derivatives are already done"""
+    urls = [u for u in urls if u]
+    if not urls:
+        return {}
+    return {
+        asset["url"]: asset["variants"]
+        for asset in ImageAsset.objects(url__in=urls).only("url", "variants").as_pymongo()
+    }
+
+
+def pick_variant(variants, width):
+    """The smallest variant at least width pixels wide, or the largest there is"""
+    ordered = sorted((variants or {}).values(), key=lambda v: v["width"])
+    for variant in ordered:
+        if variant["width"] >= width:
+            return variant
+    return ordered[-1] if ordered else None
@@ -0,0 +1,262 @@
+"""
+Event listing filters, sorts and facet counts for fetch_events.
+
+Every listing is one raw filter plus a (key, _id) sort. The filter is
+matched against the compound indexes declared on Event to hint the one
+that serves the most equality fields and then the sort, so browsing by
+city or category and date never falls back to an in-memory sort.
+
+EventListing turns a request into that query once, for both the sync and
+the async fetch_events, which only differ in the driver that runs it.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from backend.derivatives import pick_variant
+from backend.models import Event, city_key
+from backend.pagination import InvalidCursor, keyset_filter, page_size, split_page
+from backend.routing import FRESH_READ_PREFERENCE, catalog_collection, catalog_read_preference
+
+# ?sort= value -> (field, direction)
+SORTS = {
+    "newest": ("created_at", -1),
+    "date": ("date", 1),
+    "price": ("price", 1),
+    "price_desc": ("price", -1),
+    "popularity": ("attendees_count", -1),
+}
+
+EQUALITY_FILTERS = ("status", "category", "subcategory", "ticket_type")
+
+# Facet -> the field its filter matches, each facet is counted under every filter except its own
+FACETS = {"category": "category", "city": "city_key"}
+MAX_FACET_VALUES = 50
+
+# Named field sets for ?fields= on event listings, "detail" is the whole document
+EVENT_FIELDSETS = {
+    "card": [
+        "title", "category", "date", "time", "location", "city",
+        "price", "ticket_type", "image_url", "image_variants", "featured", "status",
+    ],
+    "detail": None,
+}
+
+TRUE_VALUES = ("1", "true", "yes")
+FALSE_VALUES = ("0", "false", "no")
+
+
+def _date(params, name):
+    try:
+        return datetime.strptime(params.get(name), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+
+
+def _number(params, name):
+    try:
+        return float(params.get(name))
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _range(params, field, low, high, parse):
+    bounds = {}
+    if params.get(low):
+        bounds["$gte"] = parse(params, low)
+    if params.get(high):
+        bounds["$lte"] = parse(params, high)
+    return {field: bounds} if bounds else {}
+
+
+def event_filter(params):
+    """Raw Mongo filter for the listing parameters, raises ValueError on bad values"""
+    match = {field: params.get(field) for field in EQUALITY_FILTERS if params.get(field)}
+    # Cities match whatever their case, like the old in-browser filter did
+    if city_key(params.get("city")):
+        match["city_key"] = city_key(params.get("city"))
+
+    featured = (params.get("featured") or "").lower()
+    if featured in TRUE_VALUES:
+        match["featured"] = True
+    elif featured in FALSE_VALUES:
+        match["featured"] = False
+    elif featured:
+        raise ValueError("featured must be true or false")
+
+    match.update(_range(params, "date", "date_from", "date_to", _date))
+    match.update(_range(params, "price", "price_min", "price_max", _number))
+    return match
+
+
+def event_sort(params):
+    sort = params.get("sort") or "newest"
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    return SORTS[sort]
+
+
+def pick_index(match, key, model=Event):
+    """
+    The declared index whose leading fields are all equality filters of match
+    and whose next field is the sort key, preferring the one that covers the
+    most equality fields. None leaves the choice to the query planner.
+    """
+    equality = {field for field, value in match.items() if not isinstance(value, dict)}
+    best = None
+    for keys in model.list_indexes():
+        fields = [field for field, _ in keys]
+        if key not in fields or any(direction == "text" for _, direction in keys):
+            continue
+        prefix = fields[:fields.index(key)]
+        if set(prefix) <= equality and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, keys)
+    return best[1] if best else None
+
+
+def facet_pipeline(match):
+    """One aggregation counting every facet in FACETS under all filters but its own"""
+    filtered = FACETS.values()
+    common = {field: value for field, value in match.items() if field not in filtered}
+    branches = {}
+    for facet, own in FACETS.items():
+        others = {field: match[field] for field in filtered if field != own and field in match}
+        # Buckets are the values the filter matches, "Warsaw" and "warsaw" count as one
+        branches[facet] = [
+            {"$match": others},
+            {"$group": {"_id": f"${own}", "value": {"$first": f"${facet}"}, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": MAX_FACET_VALUES},
+        ]
+    return [{"$match": common}, {"$facet": branches}]
+
+
+def facet_values(result):
+    """{facet: [{"value", "count"}]} from the $facet stage's output document"""
+    return {
+        facet: [{"value": row["value"], "count": row["count"]} for row in result.get(facet, []) if row["_id"]]
+        for facet in FACETS
+    }
+
+
+def facet_counts(match, read_preference=None):
+    return facet_values(next(catalog_collection(Event, read_preference).aggregate(facet_pipeline(match)), {}))
+
+
+def event_projection(fields_param):
+    """Resolve ?fields= (preset names and/or field names) to a list of Event fields, None for all"""
+    if not fields_param:
+        return None
+
+    fields = []
+    for name in fields_param.split(","):
+        name = name.strip()
+        if name in EVENT_FIELDSETS:
+            if EVENT_FIELDSETS[name] is None:
+                return None
+            fields.extend(EVENT_FIELDSETS[name])
+        elif name == "id":
+            continue
+        elif name in Event._fields:
+            fields.append(name)
+        else:
+            raise ValueError(f"Unknown field '{name}'")
+    return fields
+
+
+def event_dict(doc, image_width=None):
+    """
+    Raw event document to response dict. With image_width, image_url and
+    banner_url point at the smallest resized copy that is at least that wide.
+    """
+    doc["id"] = str(doc.pop("_id"))
+    if image_width:
+        for field in ("image_url", "banner_url"):
+            variant = pick_variant(doc.pop(field.replace("_url", "_variants"), None), image_width)
+            if variant:
+                doc[field] = variant["webp"]
+    return doc
+
+
+class ListingError(ValueError):
+    """A fetch_events request that can't be served, status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class EventListing:
+    """
+    The query behind one fetch_events request, raises ListingError on bad
+    parameters. With ?id= it is a single lookup by id_filter (None when the
+    id can't match anything), otherwise a page of find(collection).
+    """
+
+    def __init__(self, params, user):
+        try:
+            fields = event_projection(params.get("fields"))
+            self.image_width = int(params.get("image_width", 0))
+            self.match = event_filter(params)
+            self.sort_key, self.direction = event_sort(params)
+        except ValueError as e:
+            raise ListingError(str(e))
+
+        self.stats = bool(params.get("stats"))
+        if self.stats and params.get("created_by") != "me":
+            raise ListingError("stats are only available with created_by=me")
+        if self.stats and fields is not None:
+            fields = (*fields, "capacity")
+        # The next cursor is read from the last row, so every row carries the sort key
+        self.projection = None if fields is None else {field: 1 for field in (*fields, self.sort_key)}
+
+        self.event_id = params.get("id")
+        try:
+            self.id_filter = {"_id": ObjectId(self.event_id)} if self.event_id else None
+        except InvalidId:
+            self.id_filter = None
+
+        # A lookup by id is public, whoever created the event
+        created_by_who = None if self.event_id else params.get("created_by")
+        if created_by_who == "me":
+            if not user.is_authenticated:
+                raise ListingError("Authentication required", status=401)
+            self.match["created_by"] = user.email
+        elif created_by_who:
+            self.match["created_by"] = created_by_who
+
+        self.query = self.match
+        if params.get("cursor"):
+            try:
+                self.query = {"$and": [self.match, keyset_filter(params.get("cursor"), self.sort_key, self.direction)]}
+            except InvalidCursor as e:
+                raise ListingError(str(e))
+
+        self.size = page_size(params)
+        self.hint = pick_index(self.match, self.sort_key)
+        # Counts are the same for every page, clients ask for them with the first one
+        self.facets = bool(params.get("facets")) and not params.get("cursor")
+        # Only listings of another organizer's events skip the feed cache and may
+        # lag: the rest are either cached on a miss or read back the caller's writes
+        other_organizer = created_by_who and created_by_who != "me"
+        self.read_preference = catalog_read_preference() if other_organizer else FRESH_READ_PREFERENCE
+
+    def find(self, collection):
+        """The page's cursor on a PyMongo or async PyMongo collection, one row past the page"""
+        cursor = collection.find(self.query, self.projection).sort(
+            [(self.sort_key, self.direction), ("_id", self.direction)]
+        ).limit(self.size + 1)
+        return cursor.hint(self.hint) if self.hint else cursor
+
+    def single(self, doc):
+        """Response data for the ?id= lookup"""
+        return [event_dict(doc, self.image_width)] if doc else []
+
+    def page(self, rows):
+        """Response data for the rows of find(), without stats or facets"""
+        page, next_cursor = split_page(rows, self.size, self.sort_key)
+        return {
+            "results": [event_dict(e, self.image_width) for e in page],
+            "next_cursor": next_cursor,
+        }
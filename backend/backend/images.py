@@ -0,0 +1,53 @@
+"""
+Pillow rendering for image derivatives. This runs inside worker processes,
+so it only depends on Pillow and has no Django or Mongo imports.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+# name: (max width, max height), the image is scaled to fit and never enlarged
+VARIANTS = {
+    "thumb": (320, 180),
+    "card": (640, 360),
+    "banner": (1600, 600),
+}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def _encode(image, fmt, **options):
+    out = io.BytesIO()
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def render_variants(data, variants=VARIANTS):
+    """
+    Return {name: {"width", "height", "webp": bytes, "jpeg": bytes}} for each
+    variant of the image in data.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ("RGBA", "LA") or "transparency" in source.info
+        source = source.convert("RGBA" if has_alpha else "RGB")
+
+        rendered = {}
+        for name, size in variants.items():
+            image = source.copy()
+            image.thumbnail(size, Image.LANCZOS)
+
+            # JPEG has no alpha channel, flatten onto white
+            flat = image
+            if has_alpha:
+                flat = Image.new("RGB", image.size, (255, 255, 255))
+                flat.paste(image, mask=image.getchannel("A"))
+
+            rendered[name] = {
+                "width": image.width,
+                "height": image.height,
+                "webp": _encode(image, "WEBP", quality=WEBP_QUALITY, method=4),
+                "jpeg": _encode(flat, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True),
+            }
+        return rendered
@@ -0,0 +1,163 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware opens a RequestStats for every request in a context
+variable, and CommandTimer, a pymongo CommandListener registered before any
+client is created, adds each Mongo command's time to it (and its reply
+size with PERF_REPLY_BYTES).
+That works for sync views (same thread) and async ones (same task) alike.
+
+Each request then gets a Server-Timing header and one JSON log line on the
+backend.perf logger. Requests slower than PERF_SLOW_REQUEST_MS are sampled
+at PERF_SLOW_SAMPLE_RATE into a warning that also lists the shape of every
+command they sent.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+import bson
+import orjson
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from pymongo import monitoring
+
+logger = logging.getLogger("backend.perf")
+
+_current = ContextVar("request_stats", default=None)
+
+# Command fields that say nothing about the query's shape
+NOISE = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "documents", "comment", "batchSize"}
+
+
+class RequestStats:
+    __slots__ = ("view", "started", "mongo_commands", "mongo_micros", "mongo_bytes", "commands")
+
+    def __init__(self):
+        self.view = None
+        self.started = time.perf_counter()
+        self.mongo_commands = 0
+        self.mongo_micros = 0
+        self.mongo_bytes = 0
+        # Sent commands, shaped only if the slow-request log is written
+        self.commands = []
+
+    @property
+    def mongo_ms(self):
+        return self.mongo_micros / 1000
+
+
+def current():
+    """The RequestStats of the request being served, None outside one"""
+    return _current.get()
+
+
+def query_shape(command):
+    """command with every value replaced by its type name, {"find": "events", "filter": {"status": "str"}}"""
+    def shape(value):
+        if isinstance(value, dict):
+            return {key: shape(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [shape(value[0])] if value else []
+        return type(value).__name__
+
+    name = next(iter(command), None)
+    shaped = {key: shape(value) for key, value in command.items() if key not in NOISE and key != name}
+    return {name: command[name], **shaped} if name else shaped
+
+
+class CommandTimer(monitoring.CommandListener):
+
+    def started(self, event):
+        stats = _current.get()
+        if stats is not None and len(stats.commands) < settings.PERF_MAX_LOGGED_COMMANDS:
+            stats.commands.append(event.command)
+
+    def succeeded(self, event):
+        stats = _current.get()
+        if stats is None:
+            return
+        stats.mongo_commands += 1
+        stats.mongo_micros += event.duration_micros
+        if settings.PERF_REPLY_BYTES:
+            # pymongo hands over the decoded reply, so this re-encodes it
+            stats.mongo_bytes += len(bson.encode(event.reply))
+
+    def failed(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.mongo_commands += 1
+            stats.mongo_micros += event.duration_micros
+
+
+def register():
+    """Must run before the first MongoClient is created, settings.py does it before connect()"""
+    monitoring.register(CommandTimer())
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current.get()
+        if stats is not None:
+            # DRF's @api_view and class-based views wrap the real view, named on view_class
+            view = getattr(view_func, "view_class", view_func)
+            stats.view = f"{view.__module__}.{getattr(view, '__name__', type(view).__name__)}"
+        return None
+
+
+def finish(request, response, stats):
+    """Add the Server-Timing header and write the log lines. A streamed body is timed up to the response, not its end."""
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    if settings.PERF_SERVER_TIMING:
+        desc = f"{stats.mongo_commands} commands"
+        if settings.PERF_REPLY_BYTES:
+            desc += f", {stats.mongo_bytes} bytes"
+        response["Server-Timing"] = f'total;dur={total_ms:.1f}, mongo;dur={stats.mongo_ms:.1f};desc="{desc}"'
+
+    record = {
+        "method": request.method,
+        "path": request.path,
+        "view": stats.view,
+        "status": response.status_code,
+        "total_ms": round(total_ms, 2),
+        "mongo_commands": stats.mongo_commands,
+        "mongo_ms": round(stats.mongo_ms, 2),
+    }
+    if settings.PERF_REPLY_BYTES:
+        record["mongo_bytes"] = stats.mongo_bytes
+    logger.info(orjson.dumps(record, default=str).decode())
+
+    if total_ms >= settings.PERF_SLOW_REQUEST_MS and random.random() < settings.PERF_SLOW_SAMPLE_RATE:
+        record["queries"] = [query_shape(command) for command in stats.commands]
+        logger.warning(orjson.dumps({"slow_request": True, **record}, default=str).decode())
+    return response
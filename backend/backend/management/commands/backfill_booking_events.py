@@ -0,0 +1,28 @@
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.core.management.base import BaseCommand
+
+from backend.models import BOOKING_EVENT_FIELDS, Booking, Event, booking_event_fields
+
+
+class Command(BaseCommand):
+    help = "Copy event summaries onto bookings made before bookings carried them"
+
+    def handle(self, *args, **options):
+        bookings = Booking._get_collection()
+        missing = {"event_date": None}
+        updated = orphaned = 0
+
+        for event_id in bookings.distinct("event_id", missing):
+            try:
+                event = Event._get_collection().find_one({"_id": ObjectId(event_id)}, dict.fromkeys(BOOKING_EVENT_FIELDS, 1))
+            except InvalidId:
+                event = None
+            if event is None:
+                orphaned += 1
+                continue
+            # One update per event, whatever number of bookings it has
+            result = bookings.update_many({"event_id": event_id, **missing}, {"$set": booking_event_fields(event)})
+            updated += result.modified_count
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} bookings, {orphaned} events no longer exist"))
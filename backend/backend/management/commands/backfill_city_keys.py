@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.models import Event, city_key
+
+
+class Command(BaseCommand):
+    help = "Set city_key on events saved before ?city= matched case-insensitively"
+
+    def handle(self, *args, **options):
+        events = Event._get_collection()
+        missing = {"city_key": None}
+        updated = 0
+
+        # One update per city, whatever number of events it has
+        for city in events.distinct("city", missing):
+            result = events.update_many({"city": city, **missing}, {"$set": {"city_key": city_key(city)}})
+            updated += result.modified_count
+
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} events"))
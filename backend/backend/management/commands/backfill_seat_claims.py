@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from pymongo.errors import BulkWriteError
+
+from backend.models import Booking, SeatClaim
+from backend.seating import mark_seats
+
+
+class Command(BaseCommand):
+    help = "Create seat claims for Confirmed bookings made before the seat_claims collection existed"
+
+    def handle(self, *args, **options):
+        collection = SeatClaim._get_collection()
+        created = conflicts = 0
+
+        for booking in Booking.objects(booking_status="Confirmed").no_cache():
+            docs = [
+                {
+                    "event_id": booking.event_id,
+                    "row": s.row,
+                    "column": s.column,
+                    "booking_id": str(booking.id),
+                    "created_at": booking.created_at,
+                }
+                for s in booking.seats
+            ]
+            if not docs:
+                continue
+            mark_seats(booking.event_id, [(d["row"], d["column"]) for d in docs], taken=True)
+            try:
+                created += len(collection.insert_many(docs, ordered=False).inserted_ids)
+            except BulkWriteError as exc:
+                created += exc.details["nInserted"]
+                # Re-running is safe: claims this booking already holds are skipped,
+                # seats held by a different booking were double sold before the backfill
+                for error in exc.details["writeErrors"]:
+                    existing = collection.find_one(error["keyValue"])
+                    if existing and existing["booking_id"] != str(booking.id):
+                        conflicts += 1
+                        self.stderr.write(
+                            f"Booking {booking.id} double sold seat {error['keyValue']} "
+                            f"(held by booking {existing['booking_id']})"
+                        )
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} seat claims, {conflicts} conflicts"))
@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from backend.models import Event
+from backend.renderers import ORJSONRenderer
+from backend.views import event_dict
+
+
+def sample_events(count):
+    """Raw event documents shaped like what pymongo returns for the events collection"""
+    now = datetime(2025, 1, 1)
+    return [{
+        "_id": ObjectId(),
+        "title": f"Event {i}",
+        "description": "An evening of live music. " * 8,
+        "category": "Music",
+        "subcategory": "Jazz",
+        "date": now + timedelta(days=i % 365),
+        "time": "20:00",
+        "location": "Blue Note",
+        "city": "Warsaw",
+        "address": "Main Street 1",
+        "price": 49.5,
+        "ticket_type": "Paid",
+        "capacity": 200,
+        "image_url": f"https://blob.example.com/media/{i}.jpg",
+        "image_variants": {"card": {"width": 480, "height": 270, "webp": f"https://blob.example.com/{i}-card.webp"}},
+        "tags": ["jazz", "live", "evening"],
+        "status": "Published",
+        "featured": i % 10 == 0,
+        "attendees_count": i % 200,
+        "created_by": "organizer@example.com",
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now,
+    } for i in range(count)]
+
+
+def document_path(raws):
+    """Before: build Documents, convert them back to dicts, encode with DRF's stdlib json renderer"""
+    events = [Event._from_son(dict(raw)) for raw in raws]
+    data = []
+    for event in events:
+        doc = event.to_mongo().to_dict()
+        doc["id"] = str(doc.pop("_id"))
+        data.append(doc)
+    return JSONRenderer().render({"results": data})
+
+
+def raw_path(raws):
+    """Now: as_pymongo dicts straight into event_dict and orjson"""
+    return ORJSONRenderer().render({"results": [event_dict(dict(raw)) for raw in raws]})
+
+
+def encode_paths(raws):
+    """The encoders alone, on the same already converted dicts"""
+    data = {"results": [event_dict(dict(raw)) for raw in raws]}
+    return (
+        ("json encode", lambda raws: JSONRenderer().render(data)),
+        ("orjson encode", lambda raws: ORJSONRenderer().render(data)),
+    )
+
+
+class Command(BaseCommand):
+    help = "Time serializing an event listing through Documents + json against raw dicts + orjson"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1000, help="Events per listing")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per path, the best one counts")
+
+    def handle(self, *args, **options):
+        raws = sample_events(options["events"])
+        results = {}
+        paths = (("documents + json", document_path), ("raw + orjson", raw_path), *encode_paths(raws))
+        for name, path in paths:
+            path(raws)  # warm up
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                path(raws)
+                best = min(best, time.perf_counter() - start)
+            results[name] = best
+            self.stdout.write(f"{name:>18}: {best * 1e6 / len(raws):8.2f} µs per event")
+
+        speedup = results["documents + json"] / results["raw + orjson"]
+        encoding = results["json encode"] / results["orjson encode"]
+        self.stdout.write(self.style.SUCCESS(
+            f"raw + orjson is {speedup:.1f}x faster end to end, orjson alone encodes {encoding:.1f}x faster"
+        ))
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.query_shapes import MODELS, QUERY_SHAPES, is_text_index, plan_stages, supporting_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the indexes declared on the Mongo models, report missing and unused "
+        "ones, and explain() every view's query shape"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-create", action="store_true", help="Only report, do not build missing indexes")
+        parser.add_argument("--explain", action="store_true", help="Explain each query shape against the live data")
+        parser.add_argument(
+            "--fail-on-collscan",
+            action="store_true",
+            help="Exit non-zero if a query shape has no declared index or is planned as a COLLSCAN",
+        )
+
+    def handle(self, *args, **options):
+        problems = []
+
+        for model in MODELS:
+            self.check_indexes(model, create=not options["no_create"])
+
+        for shape in QUERY_SHAPES:
+            if supporting_index(shape) is None:
+                problems.append(f"{shape.view}: no declared index supports {shape.filter} sort {shape.sort}")
+
+        if options["explain"] or options["fail_on_collscan"]:
+            for shape in QUERY_SHAPES:
+                problems.extend(self.explain(shape))
+
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems and options["fail_on_collscan"]:
+            raise CommandError(f"{len(problems)} query shape(s) are not index backed")
+
+    def check_indexes(self, model, create):
+        # Go through the raw collection so mongoengine's auto_create_index
+        # doesn't build the indexes before we get to report them as missing
+        collection = model._get_db()[model._get_collection_name()]
+        name = collection.name
+
+        existing = {tuple(info["key"]) for info in collection.index_information().values()}
+        # Mongo stores a text index under _fts/_ftsx, and a collection can only have one
+        has_text = any(("_fts", "text") in keys for keys in existing)
+        missing = [
+            keys for keys in model.list_indexes()
+            if not (has_text if is_text_index(keys) else tuple(keys) in existing)
+        ]
+
+        for keys in missing:
+            self.stdout.write(f"{name}: missing index {keys}")
+        if missing and create:
+            # index_background is set in each model's meta
+            model.ensure_indexes()
+            self.stdout.write(self.style.SUCCESS(f"{name}: built {len(missing)} index(es)"))
+
+        for stats in collection.aggregate([{"$indexStats": {}}]):
+            if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                self.stdout.write(self.style.WARNING(
+                    f"{name}: index {stats['name']} unused since {stats['accesses']['since']:%Y-%m-%d %H:%M}"
+                ))
+
+    def explain(self, shape):
+        cursor = shape.model._get_collection().find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain = cursor.limit(20).explain()
+
+        stages = plan_stages(explain)
+        indexes = sorted({index for _, index in stages if index})
+        stats = explain.get("executionStats", {})
+        self.stdout.write(
+            f"{shape.view}: {' > '.join(stage for stage, _ in stages)} "
+            f"index={','.join(indexes) or '-'} "
+            f"docsExamined={stats.get('totalDocsExamined', '?')} nReturned={stats.get('nReturned', '?')}"
+        )
+
+        if any(stage == "COLLSCAN" for stage, _ in stages):
+            return [f"{shape.view}: COLLSCAN on {shape.model._get_collection_name()}"]
+        return []
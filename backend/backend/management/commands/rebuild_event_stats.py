@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from backend.models import Event
+from backend.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount event_stats from Confirmed bookings. Run with --overwrite while sales are paused "
+        "when deploying stats, before any booking $inc creates a document that misses older sales"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", help="Only these events (default: all)")
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Replace existing totals too, only while the events aren't selling",
+        )
+
+    def handle(self, *args, **options):
+        event_ids = options["event_ids"] or [str(e["_id"]) for e in Event._get_collection().find({}, {"_id": 1})]
+        for event_id in event_ids:
+            rebuild_stats(event_id, overwrite=options["overwrite"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {len(event_ids)} events"))
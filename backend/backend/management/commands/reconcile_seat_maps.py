@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from backend.models import SeatMap
+from backend.seating import reconcile_seat_map
+
+
+class Command(BaseCommand):
+    help = "Recompute seat maps from seat claims, fixing bits a crash between the two writes left wrong"
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", help="Only these events (default: every event with a seat map)")
+
+    def handle(self, *args, **options):
+        event_ids = options["event_ids"] or SeatMap._get_collection().distinct("event_id")
+        fixed = sum(reconcile_seat_map(event_id) for event_id in event_ids)
+        self.stdout.write(self.style.SUCCESS(f"Checked {len(event_ids)} seat maps, fixed {fixed}"))
@@ -0,0 +1,163 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(see gunicorn.conf.py) and /metrics sums them with a MultiProcessCollector,
+so whichever worker answers the scrape reports for all of them. Without the
+variable, e.g. under runserver, the default in-process registry is used.
+
+Recording a sample is a label lookup and a memory(-mapped) write, nothing on
+the request path does I/O for metrics.
+"""
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by URL pattern",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being served",
+    multiprocess_mode="livesum",
+)
+MONGO_CHECKOUT = Histogram(
+    "mongo_pool_checkout_seconds",
+    "Time spent waiting for a pooled Mongo connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+MONGO_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total",
+    "Mongo connection checkouts that failed, e.g. on a wait queue timeout",
+    ["reason"],
+)
+BOOKINGS = Counter(
+    "bookings_total",
+    "Booking attempts by endpoint and outcome",
+    ["endpoint", "outcome"],
+)
+BLOB_UPLOAD = Histogram(
+    "blob_upload_duration_seconds",
+    "Azure blob upload time",
+    ["client"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def count_booking(endpoint, outcome, amount=1):
+    """outcome is success, conflict (seat taken), sold_out, expired or failed"""
+    if amount:
+        BOOKINGS.labels(endpoint, outcome).inc(amount)
+
+
+def _route(request):
+    # The URL pattern, not the path, so /api/holds/<id>/ is one series
+    match = getattr(request, "resolver_match", None)
+    return match.route if match else "unmatched"
+
+
+def _observe(request, response, started):
+    REQUEST_LATENCY.labels(request.method, _route(request), f"{response.status_code // 100}xx").observe(
+        time.perf_counter() - started
+    )
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        _observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+        _observe(request, response, started)
+        return response
+
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """Feeds MONGO_CHECKOUT, every other pool event is ignored"""
+
+    def connection_checked_out(self, event):
+        MONGO_CHECKOUT.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        MONGO_CHECKOUT.observe(event.duration)
+        MONGO_CHECKOUT_FAILURES.labels(event.reason).inc()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+def register():
+    """Must run before the first MongoClient is created, settings.py does it before connect()"""
+    monitoring.register(PoolTimer())
+
+
+def metrics_view(request):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -10,10 +10,14 @@ from mongoengine import (
     BooleanField,
     EmbeddedDocumentListField,
     EmbeddedDocument,
+    DictField,
+    queryset_manager,
 )
 from mongoengine.fields import DateTimeField
 from datetime import datetime
 
+from backend.routing import catalog_read_preference
+
 
 class User(Document):
     email = EmailField(required=True, unique=True)
@@ -35,8 +39,13 @@ class User(Document):
         return True
 
     def save(self, *args, **kwargs):
+        # Imported here because the cache module needs this model
+        from backend.caching import invalidate_user
+
         self.updated_at = datetime.utcnow()
-        return super(User, self).save(*args, **kwargs)
+        result = super(User, self).save(*args, **kwargs)
+        invalidate_user(self.id)
+        return result
 
 
 class Event(Document):
@@ -52,6 +61,8 @@ class Event(Document):
 
     location = StringField(required=True)
     city = StringField(required=True)
+    # city_key(city), set on save, what ?city= listing filters match
+    city_key = StringField()
     address = StringField()
 
     price = FloatField(default=0)
@@ -67,6 +78,11 @@ class Event(Document):
     image_url = StringField()
     banner_url = StringField()
 
+    # Resized copies filled in by backend.derivatives:
+    # {"thumb": {"width", "height", "webp", "jpeg"}, "card": ..., "banner": ...}
+    image_variants = DictField()
+    banner_variants = DictField()
+
     tags = ListField(StringField())
 
     status = StringField(
@@ -81,7 +97,37 @@ class Event(Document):
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
 
-    meta = {"collection": "events", "ordering": ["-created_at"], "strict": False}
+    meta = {
+        "collection": "events",
+        "ordering": ["-created_at"],
+        "strict": False,
+        "index_background": True,
+        "indexes": [
+            ("-created_at", "-id"),
+            ("status", "-created_at", "-id"),
+            ("created_by", "-created_at", "-id"),
+            # Listing shapes for backend.filters: equality fields, then the sort key, then _id
+            ("status", "date", "id"),
+            ("status", "city_key", "date", "id"),
+            ("status", "category", "date", "id"),
+            ("status", "price", "id"),
+            ("status", "-attendees_count", "-id"),
+            {"fields": ["image_url"], "sparse": True},
+            {"fields": ["banner_url"], "sparse": True},
+            # Search index for backend.search, a title hit counts ten times a description hit
+            {
+                "fields": ["$title", "$tags", "$location", "$city", "$description"],
+                "weights": {"title": 10, "tags": 5, "location": 3, "city": 3, "description": 1},
+                "default_language": "english",
+                "name": "event_text",
+            },
+        ],
+    }
+
+    @queryset_manager
+    def catalog(doc_cls, queryset):
+        """Event.objects for listing reads, which secondaries may serve"""
+        return queryset.read_preference(catalog_read_preference())
 
     def to_json_safe(self):
         def safe_date(value):
@@ -107,6 +153,8 @@ class Event(Document):
             "organizer_phone": self.organizer_phone,
             "image_url": self.image_url,
             "banner_url": self.banner_url,
+            "image_variants": self.image_variants,
+            "banner_variants": self.banner_variants,
             "tags": self.tags,
             "status": self.status,
             "featured": self.featured,
@@ -117,20 +165,39 @@ class Event(Document):
         }
 
     def save(self, *args, **kwargs):
+        # Imported here because the cache module needs these models
+        from backend.caching import invalidate_event_feed
+
         self.updated_at = datetime.utcnow()
-        return super(Event, self).save(*args, **kwargs)
+        self.city_key = city_key(self.city)
+        result = super(Event, self).save(*args, **kwargs)
+        invalidate_event_feed()
+        return result
+
+    def delete(self, *args, **kwargs):
+        from backend.caching import invalidate_event_feed
+
+        result = super(Event, self).delete(*args, **kwargs)
+        invalidate_event_feed()
+        return result
 
 class Seat(EmbeddedDocument):
     row = IntField(required=True)
     column = IntField(required=True)
 
 
+BOOKING_STATUSES = ("Confirmed", "Cancelled", "Pending")
+
+
 class Booking(Document):
     event_id = StringField(required=True)
+    # Copied from the event when booking, see booking_event_fields
     event_title = StringField()
     event_date = StringField()
     event_time = StringField()
     event_location = StringField()
+    event_city = StringField()
+    event_image_url = StringField()
     user_email = StringField(required=True)
     user_name = StringField()
 
@@ -139,15 +206,120 @@ class Booking(Document):
 
     seats = EmbeddedDocumentListField(Seat)
 
-    booking_status = StringField(
-        choices=["Confirmed", "Cancelled", "Pending"], default="Confirmed"
-    )
+    booking_status = StringField(choices=BOOKING_STATUSES, default="Confirmed")
+
+    # Only set on Pending holds, Mongo's TTL monitor deletes the booking after it
+    expires_at = DateTimeField()
 
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
 
-    meta = {"collection": "bookings", "ordering": ["-created_at"], "strict": False}
+    meta = {
+        "collection": "bookings",
+        "ordering": ["-created_at"],
+        "strict": False,
+        "index_background": True,
+        "indexes": [
+            ("-created_at", "-id"),
+            # Also the attendee export's order, oldest booking first
+            ("event_id", "booking_status", "created_at", "id"),
+            ("event_id", "-created_at", "-id"),
+            ("user_email", "-created_at", "-id"),
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+        ],
+    }
 
     def save(self, *args, **kwargs):
         self.updated_at = datetime.utcnow()
         return super().save(*args, **kwargs)
+
+
+def city_key(city):
+    """City with case and spacing normalized, so "warsaw " and "Warsaw" filter alike"""
+    return " ".join((city or "").split()).casefold() or None
+
+
+# Event field -> Booking field, so the booking history needs no event lookups
+BOOKING_EVENT_FIELDS = {
+    "title": "event_title",
+    "date": "event_date",
+    "time": "event_time",
+    "location": "event_location",
+    "city": "event_city",
+    "image_url": "event_image_url",
+}
+
+
+def booking_event_fields(event):
+    """Booking field values summarizing event, an Event or a raw event document"""
+    if not isinstance(event, dict):
+        event = {field: getattr(event, field, None) for field in BOOKING_EVENT_FIELDS}
+    values = {booking_field: event.get(field) for field, booking_field in BOOKING_EVENT_FIELDS.items()}
+    if values["event_date"] is not None:
+        values["event_date"] = values["event_date"].strftime("%Y-%m-%d")
+    return values
+
+
+class SeatClaim(Document):
+    """
+    One sold or held seat. The unique index makes claiming a seat a single
+    atomic insert. Holds carry expires_at and are deleted by the TTL index.
+    """
+
+    event_id = StringField(required=True)
+    row = IntField(required=True)
+    column = IntField(required=True)
+    booking_id = StringField(required=True)
+    expires_at = DateTimeField()
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "seat_claims",
+        "strict": False,
+        "indexes": [
+            {"fields": ["event_id", "row", "column"], "unique": True},
+            "booking_id",
+            ("event_id", "expires_at"),
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+        ],
+    }
+
+
+class SeatMap(Document):
+    """
+    Bit-packed occupancy of an event's hall, seat (row, column) is bit
+    (row - 1) * columns + (column - 1). Words are 32-bit chunks keyed by their
+    index so $bit can flip seats atomically without rewriting the document.
+    """
+
+    event_id = StringField(required=True, unique=True)
+    rows = IntField(required=True)
+    columns = IntField(required=True)
+    words = DictField()
+
+    meta = {"collection": "seat_maps", "strict": False}
+
+
+class EventStats(Document):
+    """
+    Running sales totals of one event, changed only by $inc from backend.stats
+    when a booking is confirmed or cancelled.
+    """
+
+    event_id = StringField(required=True, unique=True)
+    tickets_sold = IntField(default=0)
+    bookings = IntField(default=0)
+    revenue = FloatField(default=0)
+    updated_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {"collection": "event_stats", "strict": False}
+
+
+class ImageAsset(Document):
+    """Derivatives generated for an uploaded image, keyed by the original's URL"""
+
+    url = StringField(required=True, unique=True)
+    variants = DictField()
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {"collection": "image_assets", "strict": False}
@@ -0,0 +1,94 @@
+"""
+Keyset (cursor) pagination.
+
+A cursor is the sort key and _id of the last document on a page, so the next
+page starts with an indexed range query instead of skipping over every
+earlier document: page 500 costs the same as page 1.
+"""
+import base64
+from datetime import datetime
+
+from bson import ObjectId, json_util
+from django.conf import settings
+
+# Sort key -> the types a cursor may carry for it. None is a document without
+# the key; anything else, an operator dict above all, is a forged cursor.
+CURSOR_TYPES = {
+    "created_at": (datetime,),
+    "date": (datetime,),
+    "price": (int, float),
+    "attendees_count": (int, float),
+    "score": (int, float),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json_util.loads(raw)
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def page_size(params):
+    """Requested page size (?limit=), clamped to settings.MAX_PAGE_SIZE"""
+    try:
+        size = int(params.get("limit", settings.DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = settings.DEFAULT_PAGE_SIZE
+    return max(1, min(size, settings.MAX_PAGE_SIZE))
+
+
+def _field(doc, name):
+    if isinstance(doc, dict):
+        return doc.get("_id" if name == "id" else name)
+    return getattr(doc, name)
+
+
+def keyset_filter(cursor, key, direction):
+    """Raw query matching documents strictly after the cursor in (key, _id) order"""
+    value, last_id = decode_cursor(cursor)
+    valid_value = value is None or (isinstance(value, CURSOR_TYPES[key]) and not isinstance(value, bool))
+    if not valid_value or not isinstance(last_id, ObjectId):
+        raise InvalidCursor("Invalid cursor")
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [{key: {op: value}}, {key: value, "_id": {op: last_id}}]}
+
+
+def paginate(queryset, params, key="created_at", direction=-1):
+    """
+    Return (page, next_cursor) for a queryset ordered by (key, _id).
+
+    Fetches one extra document to know whether another page exists;
+    next_cursor is None on the last page.
+    """
+    size = page_size(params)
+    sign = "-" if direction < 0 else ""
+
+    cursor = params.get("cursor")
+    if cursor:
+        queryset = queryset.filter(__raw__=keyset_filter(cursor, key, direction))
+
+    page = list(queryset.order_by(f"{sign}{key}", f"{sign}id").limit(size + 1))
+    return split_page(page, size, key)
+
+
+def split_page(rows, size, key):
+    """Trim rows fetched with limit size + 1 to (page, next_cursor)"""
+    if len(rows) <= size:
+        return rows, None
+    page = rows[:size]
+    last = page[-1]
+    return page, encode_cursor([_field(last, key), _field(last, "id")])
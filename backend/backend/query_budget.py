@@ -0,0 +1,223 @@
+"""
+Query budgets: run real views against a real MongoDB and count what they cost.
+
+QueryBudgetTests in tests.py use this when QUERY_BUDGET_MONGO_HOST points
+at a disposable mongod (a local one or a CI service container). The
+mongoengine default connection is re-pointed at a scratch database, seeded
+with realistic volumes, and every view call is measured in Mongo round
+trips (from a CommandListener) and documents examined (from the database
+profiler). An N+1 loop shows up in the first number, a collection scan or
+a missing index in the second.
+"""
+import os
+from datetime import datetime, time, timedelta
+
+from bson import ObjectId
+from bson.int64 import Int64
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from mongoengine import connect, disconnect
+from pymongo import monitoring
+
+from backend.models import city_key
+from backend.query_shapes import MODELS
+from backend.seating import _seat_masks
+
+BUDGET_HOST_ENV = "QUERY_BUDGET_MONGO_HOST"
+# Seed volumes, raise them to look for costs that only show at scale
+SEED_EVENTS = int(os.environ.get("QUERY_BUDGET_EVENTS", 2000))
+SEED_USERS = int(os.environ.get("QUERY_BUDGET_USERS", 500))
+
+# Sent by the driver or by the harness itself, not by views
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "profile", "buildInfo", "saslStart", "saslContinue"}
+
+CITIES = ("Warsaw", "Krakow", "Gdansk", "Wroclaw", "Poznan")
+CATEGORIES = ("Music", "Sports", "Theatre", "Tech", "Food")
+TITLE_WORDS = ("Jazz", "Rock", "Marathon", "Hamlet", "Python", "Street Food", "Opera", "Derby")
+
+
+class Usage:
+    def __init__(self):
+        self.round_trips = 0
+        self.commands = []
+        self.docs_examined = 0
+        self.collscans = []
+
+    def __repr__(self):
+        return (
+            f"<Usage {self.round_trips} round trips {self.commands}, "
+            f"{self.docs_examined} docs examined, collscans {self.collscans}>"
+        )
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Counts the commands sent to the budget database while a Usage is open"""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.usage = None
+
+    def started(self, event):
+        if self.usage is None or event.database_name != self.db_name or event.command_name in IGNORED_COMMANDS:
+            return
+        if event.command_name == "find" and event.command.get("find") == "system.profile":
+            return
+        self.usage.round_trips += 1
+        self.usage.commands.append(f"{event.command_name} {event.command.get(event.command_name)}")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class QueryBudget:
+    """A scratch database on QUERY_BUDGET_MONGO_HOST with the models' indexes and seeded data"""
+
+    def __init__(self, host, db_name=None):
+        self.host = host
+        self.db_name = db_name or f"query_budget_{os.getpid()}"
+        self.recorder = CommandRecorder(self.db_name)
+        self.client = None
+
+    def open(self):
+        disconnect(alias="default")
+        self.client = connect(
+            db=self.db_name,
+            host=self.host,
+            alias="default",
+            event_listeners=[self.recorder],
+            **settings.MONGO_CLIENT_OPTIONS
+        )
+        self.client.drop_database(self.db_name)
+        for model in MODELS:
+            model.ensure_indexes()
+        return self
+
+    def close(self):
+        """Drop the scratch database and put the settings.py connection back"""
+        self.client.drop_database(self.db_name)
+        disconnect(alias="default")
+        connect(
+            db=settings.MONGO_DB_NAME,
+            username=settings.MONGO_USER,
+            password=settings.MONGO_PASSWORD,
+            host=settings.MONGO_HOST,
+            alias="default",
+            **settings.MONGO_CLIENT_OPTIONS
+        )
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    def measure(self, call):
+        """Run call() and return (its result, Usage)"""
+        db = self.db
+        db.command("profile", 0)
+        db.system.profile.drop()
+        db.command("profile", 2)
+
+        usage = Usage()
+        self.recorder.usage = usage
+        try:
+            result = call()
+            # Streaming responses only query while they are consumed
+            if getattr(result, "streaming", False):
+                b"".join(result.streaming_content)
+        finally:
+            self.recorder.usage = None
+            db.command("profile", 0)
+
+        for op in db.system.profile.find({"ns": {"$not": {"$regex": r"\.system\.profile$"}}}):
+            usage.docs_examined += op.get("docsExamined", 0)
+            if op.get("planSummary") == "COLLSCAN":
+                usage.collscans.append(op["ns"])
+        return result, usage
+
+    def seed(self, events=SEED_EVENTS, users=SEED_USERS):
+        """
+        users users, events events (a fifth of them drafts) and up to 19
+        two-seat Confirmed bookings per event, with their seat claims, seat
+        maps and stats. Returns {"users": [...], "events": [...]} of the
+        inserted documents.
+        """
+        db = self.db
+        now = datetime.utcnow()
+        today = datetime.combine(now.date(), time())
+        password = make_password("password")
+
+        user_docs = [{
+            "_id": ObjectId(), "email": f"user{i}@example.com", "password": password,
+            "full_name": f"User {i}", "role": "user", "created_at": now, "updated_at": now,
+        } for i in range(users)]
+        db.users.insert_many(user_docs)
+
+        event_docs = []
+        for i in range(events):
+            event_docs.append({
+                "_id": ObjectId(),
+                "title": f"{TITLE_WORDS[i % len(TITLE_WORDS)]} {i}",
+                "description": "A night to remember with friends and family.",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "city": CITIES[i % len(CITIES)],
+                "city_key": city_key(CITIES[i % len(CITIES)]),
+                "location": f"Venue {i % 50}",
+                "date": today + timedelta(days=i % 180),
+                "time": "19:00",
+                "price": float(10 + i % 90),
+                "ticket_type": "Paid",
+                "capacity": settings.SEAT_MAP_ROWS * settings.SEAT_MAP_COLUMNS,
+                "tags": [TITLE_WORDS[i % len(TITLE_WORDS)].lower()],
+                "status": "Draft" if i % 5 == 4 else "Published",
+                "featured": i % 10 == 0,
+                "attendees_count": 0,
+                "created_by": user_docs[i % users]["email"],
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now,
+            })
+
+        bookings, claims, seat_maps, stats = [], [], [], []
+        for i, event in enumerate(event_docs):
+            event_id = str(event["_id"])
+            sold = []
+            for b in range(i % 20):
+                user = user_docs[(i + b + 1) % users]
+                if user["email"] == event["created_by"]:
+                    continue
+                booking_id = ObjectId()
+                seats = [(b // 5 + 1, (b % 5) * 2 + 1), (b // 5 + 1, (b % 5) * 2 + 2)]
+                bookings.append({
+                    "_id": booking_id, "event_id": event_id, "event_title": event["title"],
+                    "event_date": event["date"].strftime("%Y-%m-%d"), "event_time": event["time"],
+                    "event_location": event["location"], "event_city": event["city"],
+                    "user_email": user["email"], "user_name": user["full_name"],
+                    "seats": [{"row": r, "column": c} for r, c in seats], "num_tickets": 2,
+                    "total_price": 2 * event["price"], "booking_status": "Confirmed",
+                    "created_at": now - timedelta(minutes=b), "updated_at": now,
+                })
+                for row, column in seats:
+                    claims.append({
+                        "event_id": event_id, "row": row, "column": column,
+                        "booking_id": str(booking_id), "created_at": now,
+                    })
+                sold.extend(seats)
+                event["attendees_count"] += 2
+            seat_maps.append({
+                "event_id": event_id, "rows": settings.SEAT_MAP_ROWS,
+                "columns": settings.SEAT_MAP_COLUMNS,
+                "words": {str(word): Int64(mask) for word, mask in _seat_masks(sold).items()},
+            })
+            stats.append({
+                "event_id": event_id, "tickets_sold": event["attendees_count"],
+                "bookings": event["attendees_count"] // 2,
+                "revenue": event["attendees_count"] * event["price"], "updated_at": now,
+            })
+
+        db.events.insert_many(event_docs)
+        for collection, docs in (("bookings", bookings), ("seat_claims", claims),
+                                 ("seat_maps", seat_maps), ("event_stats", stats)):
+            if docs:
+                db[collection].insert_many(docs)
+        return {"users": user_docs, "events": event_docs}
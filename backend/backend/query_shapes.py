@@ -0,0 +1,100 @@
+"""
+The filter/sort shapes views.py sends to MongoDB, used by the ensure_indexes
+command to explain() them against a real dataset. Keep this in sync when a
+view starts querying a new combination of fields.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from bson import ObjectId
+
+from backend.models import User, Event, Booking, SeatClaim, SeatMap, EventStats
+
+QueryShape = namedtuple("QueryShape", ["view", "model", "filter", "sort"])
+
+MODELS = (User, Event, Booking, SeatClaim, SeatMap, EventStats)
+
+SAMPLE_ID = ObjectId()
+SAMPLE_EMAIL = "someone@example.com"
+SAMPLE_TIME = datetime(2025, 1, 1)
+PAGE = [("created_at", -1), ("_id", -1)]
+
+QUERY_SHAPES = [
+    QueryShape("login_view", User, {"email": SAMPLE_EMAIL}, None),
+    QueryShape("fetch_events", Event, {}, PAGE),
+    QueryShape("fetch_events?id", Event, {"_id": SAMPLE_ID}, None),
+    QueryShape("fetch_events?status", Event, {"status": "Published"}, PAGE),
+    QueryShape("fetch_events?created_by", Event, {"created_by": SAMPLE_EMAIL}, PAGE),
+    QueryShape("fetch_events?sort=date", Event, {"status": "Published"}, [("date", 1), ("_id", 1)]),
+    QueryShape("fetch_events?city&sort=date", Event, {"status": "Published", "city_key": "warsaw"}, [("date", 1), ("_id", 1)]),
+    QueryShape("fetch_events?category&sort=date", Event, {"status": "Published", "category": "Music"}, [("date", 1), ("_id", 1)]),
+    QueryShape("fetch_events?sort=price", Event, {"status": "Published"}, [("price", 1), ("_id", 1)]),
+    QueryShape("fetch_events?sort=popularity", Event, {"status": "Published"}, [("attendees_count", -1), ("_id", -1)]),
+    QueryShape("search_events", Event, {"$text": {"$search": "jazz"}, "status": "Published"}, None),
+    QueryShape("delete_event", Booking, {"event_id": str(SAMPLE_ID), "booking_status": "Confirmed"}, None),
+    QueryShape("get_user_bookings", Booking, {"user_email": SAMPLE_EMAIL}, [("created_at", -1)]),
+    QueryShape("list_bookings", Booking, {}, PAGE),
+    QueryShape("list_bookings?user_email", Booking, {"user_email": SAMPLE_EMAIL}, PAGE),
+    QueryShape("list_bookings?event_id", Booking, {"event_id": str(SAMPLE_ID)}, PAGE),
+    QueryShape("create_bookings_batch", Event, {"_id": {"$in": [SAMPLE_ID]}}, None),
+    QueryShape("create_bookings_batch (seats)", SeatClaim, {"event_id": str(SAMPLE_ID), "row": 1, "column": 1}, None),
+    QueryShape("get_reserved_seats", SeatMap, {"event_id": str(SAMPLE_ID)}, None),
+    QueryShape("get_reserved_seats (holds)", SeatClaim, {"event_id": str(SAMPLE_ID), "expires_at": {"$gt": SAMPLE_TIME}}, None),
+    QueryShape("confirm_hold", SeatClaim, {"booking_id": str(SAMPLE_ID)}, None),
+    QueryShape("get_reserved_seats (rebuild)", SeatClaim, {"event_id": str(SAMPLE_ID), "expires_at": None}, None),
+    QueryShape("get_event_stats", EventStats, {"event_id": {"$in": [str(SAMPLE_ID)]}}, None),
+    QueryShape(
+        "export_attendees", Booking,
+        {"event_id": str(SAMPLE_ID), "booking_status": "Confirmed"}, [("created_at", 1), ("_id", 1)],
+    ),
+    QueryShape("get_event_stats (rebuild)", Booking, {"event_id": str(SAMPLE_ID), "booking_status": "Confirmed"}, None),
+]
+
+
+def index_keys(model):
+    """Declared index keys of a model as lists of (field, direction), plus the implicit _id index"""
+    return [[("_id", 1)]] + model.list_indexes()
+
+
+def is_text_index(keys):
+    return any(direction == "text" for _, direction in keys)
+
+
+def supporting_index(shape):
+    """
+    The first declared index that serves the shape's equality filter from its
+    leading fields and then its sort, or None if the query needs a scan.
+    A $text filter is served by the collection's text index whatever else it filters on.
+    """
+    if "$text" in shape.filter:
+        return next((keys for keys in index_keys(shape.model) if is_text_index(keys)), None)
+
+    equality = set(shape.filter)
+    sort = list(shape.sort or [])
+    reverse = [(field, -direction) for field, direction in sort]
+
+    for keys in index_keys(shape.model):
+        prefix, rest = keys[:len(equality)], keys[len(equality):]
+        if {field for field, _ in prefix} != equality:
+            continue
+        if not sort or rest[:len(sort)] in (sort, reverse):
+            return keys
+    return None
+
+
+def plan_stages(explain):
+    """Flatten an explain() winning plan into [(stage, index name)]"""
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append((node["stage"], node.get("indexName")))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    return stages
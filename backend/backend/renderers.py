@@ -0,0 +1,68 @@
+"""
+orjson based JSON rendering.
+
+Views hand over raw pymongo documents (as_pymongo) rather than mongoengine
+Documents, so ObjectIds, datetimes and nested dicts all get converted in
+orjson's single encoding pass instead of being rebuilt by hand first. The
+output matches DRF's JSONRenderer: ISO dates, "Z" for UTC, decimals as
+numbers.
+"""
+import datetime
+import decimal
+
+import orjson
+from bson import ObjectId
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Types orjson doesn't know, converted like DRF's JSONEncoder"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, "__iter__"):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data, indent=False):
+    option = OPTIONS | orjson.OPT_INDENT_2 if indent else OPTIONS
+    return orjson.dumps(data, default=_default, option=option)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        # orjson only indents by 2, any indent= in the Accept header asks for it
+        return dumps(data, indent="indent=" in (accepted_media_type or ""))
+
+
+class CSVRenderer(ORJSONRenderer):
+    """
+    Lets clients Accept text/csv on views that stream CSV themselves. Only
+    their error responses go through a renderer, and those stay JSON.
+    """
+    media_type = "text/csv"
+    format = "csv"
+
+
+class JSONLinesRenderer(ORJSONRenderer):
+    """Same as CSVRenderer for views streaming JSON lines"""
+    media_type = "application/x-ndjson"
+    format = "jsonl"
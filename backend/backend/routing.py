@@ -0,0 +1,45 @@
+"""
+Read routing.
+
+Catalog reads (event listings, search, facets, seat maps) can be served by
+secondaries, within MONGO_MAX_STALENESS_SECONDS of the primary, so read
+traffic scales with the replica set. Booking reads and all writes stay on
+the primary, where the seat claims and attendee counter are decided.
+
+Reads that must see the latest writes use FRESH_READ_PREFERENCE instead:
+the feed cache's recomputes, which would otherwise cache a lagging
+secondary's page for a whole TTL right after an invalidation, and lookups
+that follow a write, like an event by id or an organizer's own events.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+FRESH_READ_PREFERENCE = PrimaryPreferred()
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+@lru_cache(maxsize=None)
+def _build(mode, max_staleness):
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {mode!r}, use one of {', '.join(READ_PREFERENCES)}")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness or -1)
+
+
+def catalog_read_preference():
+    return _build(settings.MONGO_CATALOG_READ_PREFERENCE, settings.MONGO_MAX_STALENESS_SECONDS)
+
+
+def catalog_collection(model, read_preference=None):
+    """model's pymongo collection with catalog read routing, or read_preference when given"""
+    return model._get_collection().with_options(read_preference=read_preference or catalog_read_preference())
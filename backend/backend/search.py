@@ -0,0 +1,83 @@
+"""
+Full-text event search.
+
+Runs as one aggregation over the weighted text index on Event (title, tags,
+location, city, description): $text match plus filters, relevance score,
+keyset cursor, sort and limit all happen in MongoDB.
+"""
+from datetime import datetime
+
+from backend.models import Event, city_key
+from backend.pagination import keyset_filter, page_size, split_page
+from backend.routing import catalog_collection
+
+# ?sort= value -> (field, direction); score is the text relevance
+SORTS = {
+    "relevance": ("score", -1),
+    "date": ("date", 1),
+    "newest": ("created_at", -1),
+}
+
+MAX_QUERY_LENGTH = 200
+
+
+def _date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+
+
+def search_filter(params):
+    """$match stage contents for ?q= plus the optional exact filters"""
+    q = (params.get("q") or "").strip()
+    if not q:
+        raise ValueError("q is required")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise ValueError(f"q must be at most {MAX_QUERY_LENGTH} characters")
+
+    match = {"$text": {"$search": q}}
+    for field in ("category", "status"):
+        if params.get(field):
+            match[field] = params.get(field)
+    if city_key(params.get("city")):
+        match["city_key"] = city_key(params.get("city"))
+
+    dates = {}
+    if params.get("date_from"):
+        dates["$gte"] = _date(params.get("date_from"), "date_from")
+    if params.get("date_to"):
+        dates["$lte"] = _date(params.get("date_to"), "date_to")
+    if dates:
+        match["date"] = dates
+    return match
+
+
+def search_pipeline(params, fields=None):
+    """Aggregation pipeline for one page of results, fetching one extra row to detect the next page"""
+    sort = params.get("sort") or "relevance"
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    key, direction = SORTS[sort]
+
+    pipeline = [
+        {"$match": search_filter(params)},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if params.get("cursor"):
+        pipeline.append({"$match": keyset_filter(params.get("cursor"), key, direction)})
+    pipeline += [
+        {"$sort": {key: direction, "_id": direction}},
+        {"$limit": page_size(params) + 1},
+    ]
+    if fields is not None:
+        # The sort key stays in so the cursor can be built from the last row
+        pipeline.append({"$project": {**{f: 1 for f in fields}, key: 1, "score": 1}})
+    return pipeline, key
+
+
+def search_events(params, fields=None):
+    """Return (raw event documents, next_cursor) for a search request"""
+    pipeline, key = search_pipeline(params, fields)
+    rows = list(catalog_collection(Event).aggregate(pipeline))
+    return split_page(rows, page_size(params), key)
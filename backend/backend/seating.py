@@ -0,0 +1,311 @@
+import base64
+from datetime import datetime
+
+from bson import ObjectId
+from bson.int64 import Int64
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+
+from backend.caching import invalidate_event_feed
+from backend.models import Event, SeatClaim, SeatMap
+from backend.routing import catalog_collection
+
+DUPLICATE_KEY = 11000
+WORD_BITS = 32
+WORD_MASK = (1 << WORD_BITS) - 1
+
+
+class SeatTakenError(Exception):
+    def __init__(self, seat):
+        self.seat = {"row": seat[0], "column": seat[1]}
+        super().__init__(f"Seat {self.seat} is already reserved")
+
+
+class SoldOutError(Exception):
+    def __init__(self):
+        super().__init__("Not enough tickets left for this event")
+
+
+def hall_size():
+    return settings.SEAT_MAP_ROWS, settings.SEAT_MAP_COLUMNS
+
+
+def normalize_seats(seats_data):
+    """Turn the request's seat dicts into a list of (row, column) pairs, rejecting bad input"""
+    if not isinstance(seats_data, list):
+        raise ValueError("seats must be a list of {row, column}")
+    rows, columns = hall_size()
+    seats = []
+    for s in seats_data:
+        try:
+            seat = (int(s["row"]), int(s["column"]))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid seat {s}")
+        if not (1 <= seat[0] <= rows and 1 <= seat[1] <= columns):
+            raise ValueError(f"Invalid seat {s}")
+        if seat in seats:
+            raise ValueError(f"Seat {s} is listed twice")
+        seats.append(seat)
+    return seats
+
+
+# --- ATTENDEE COUNTER ---
+
+def admit_attendees(event_id, count):
+    """
+    Add count attendees in one conditional $inc that only matches while
+    attendees_count + count <= capacity. A capacity of 0 or None means unlimited.
+    """
+    has_room = {
+        "$expr": {
+            "$lte": [{"$add": [{"$ifNull": ["$attendees_count", 0]}, count]}, "$capacity"]
+        }
+    }
+    result = Event._get_collection().update_one(
+        {"_id": ObjectId(event_id), "$or": [{"capacity": {"$in": [None, 0]}}, has_room]},
+        {"$inc": {"attendees_count": count}},
+    )
+    if result.matched_count == 0:
+        raise SoldOutError()
+    invalidate_event_feed()
+
+
+def release_attendees(event_id, count):
+    Event._get_collection().update_one(
+        {"_id": ObjectId(event_id), "attendees_count": {"$gte": count}},
+        {"$inc": {"attendees_count": -count}},
+    )
+    invalidate_event_feed()
+
+
+# --- SEAT CLAIMS ---
+
+def _purge_expired(event_id, seats):
+    """
+    Delete holds on these seats that have expired but not been reaped yet,
+    the TTL monitor only runs once a minute. Returns how many went.
+    """
+    result = SeatClaim._get_collection().delete_many({
+        "event_id": event_id,
+        "expires_at": {"$lte": datetime.utcnow()},
+        "$or": [{"row": row, "column": column} for row, column in seats],
+    })
+    return result.deleted_count
+
+
+def _insert_claims(event_id, seats, booking_id, expires_at=None):
+    now = datetime.utcnow()
+    docs = [
+        {"event_id": event_id, "row": row, "column": column, "booking_id": booking_id, "created_at": now}
+        for row, column in seats
+    ]
+    if expires_at is not None:
+        for doc in docs:
+            doc["expires_at"] = expires_at
+
+    for attempt in range(2):
+        try:
+            SeatClaim._get_collection().insert_many(docs, ordered=True)
+            return
+        except BulkWriteError as exc:
+            SeatClaim._get_collection().delete_many({"booking_id": booking_id})
+            error = exc.details["writeErrors"][0]
+            if error["code"] != DUPLICATE_KEY:
+                raise
+            if attempt or not _purge_expired(event_id, seats):
+                raise SeatTakenError(seats[error["index"]])
+
+
+def claim_seats(event_id, seats, booking_id):
+    """
+    Claim every seat for booking_id or none of them.
+
+    The insert stops at the first seat someone else already holds; the claims
+    made before it are rolled back and SeatTakenError names the conflicting seat.
+    """
+    _insert_claims(event_id, seats, booking_id)
+    mark_seats(event_id, seats, taken=True)
+
+
+def release_seats(event_id, seats, booking_id):
+    SeatClaim._get_collection().delete_many({"booking_id": booking_id})
+    mark_seats(event_id, seats, taken=False)
+
+
+# --- HOLDS ---
+# A hold is a set of claims with expires_at. It blocks the seats like a sale
+# but stays out of the bitmap (nothing would clear the bits when the TTL index
+# deletes it), so seat_bitmap ORs live holds in at read time.
+
+def hold_seats(event_id, seats, booking_id, expires_at):
+    """Claim every seat until expires_at, or none of them"""
+    _insert_claims(event_id, seats, booking_id, expires_at)
+
+
+def confirm_held_seats(event_id, seats, booking_id):
+    """
+    Turn a live hold into permanent claims. Returns False, keeping nothing,
+    if any of its seats already expired.
+    """
+    result = SeatClaim._get_collection().update_many(
+        {"booking_id": booking_id, "expires_at": {"$gt": datetime.utcnow()}},
+        {"$unset": {"expires_at": ""}},
+    )
+    if result.modified_count != len(seats):
+        SeatClaim._get_collection().delete_many({"booking_id": booking_id})
+        return False
+    mark_seats(event_id, seats, taken=True)
+    return True
+
+
+def release_hold(booking_id):
+    SeatClaim._get_collection().delete_many({"booking_id": booking_id, "expires_at": {"$ne": None}})
+
+
+def held_query(event_id):
+    return {"event_id": event_id, "expires_at": {"$gt": datetime.utcnow()}}
+
+
+def held_seats(event_id):
+    claims = catalog_collection(SeatClaim).find(held_query(event_id), {"_id": 0, "row": 1, "column": 1})
+    return [(c["row"], c["column"]) for c in claims]
+
+
+# --- SEAT MAP ---
+
+def _seat_masks(seats):
+    """Group seats into {word index: bit mask}"""
+    _, columns = hall_size()
+    masks = {}
+    for row, column in seats:
+        bit = (row - 1) * columns + (column - 1)
+        word = bit // WORD_BITS
+        masks[word] = masks.get(word, 0) | (1 << (bit % WORD_BITS))
+    return masks
+
+
+def mark_update(seats, taken=True):
+    """Upsert update that sets or clears seats in a seat map document"""
+    rows, columns = hall_size()
+    update = {"$setOnInsert": {"rows": rows, "columns": columns}}
+
+    masks = _seat_masks(seats)
+    if masks:
+        if taken:
+            update["$bit"] = {f"words.{w}": {"or": Int64(m)} for w, m in masks.items()}
+        else:
+            update["$bit"] = {f"words.{w}": {"and": Int64(~m)} for w, m in masks.items()}
+    return update
+
+
+def mark_seats(event_id, seats, taken=True):
+    """
+    Set or clear seats in the event's bitmap with a single atomic update.
+
+    Bits are written after the claims they follow, so a release can clear a
+    bit that a new booking of the same seat has just set. Clearing therefore
+    re-checks the claims afterwards and sets the bits of seats sold again
+    meanwhile: whichever write lands last, a sold seat ends up marked.
+    """
+    seat_maps = SeatMap._get_collection()
+    seat_maps.update_one({"event_id": event_id}, mark_update(seats, taken), upsert=True)
+    if taken or not seats:
+        return
+    resold = SeatClaim._get_collection().find(
+        {**sold_query(event_id), "$or": [{"row": row, "column": column} for row, column in seats]},
+        {"_id": 0, "row": 1, "column": 1},
+    )
+    resold = [(c["row"], c["column"]) for c in resold]
+    if resold:
+        seat_maps.update_one({"event_id": event_id}, mark_update(resold, taken=True), upsert=True)
+
+
+def sold_query(event_id):
+    """Claims of sold seats, holds are left out"""
+    return {"event_id": event_id, "expires_at": None}
+
+
+def _sold_seats(event_id):
+    claims = SeatClaim._get_collection().find(sold_query(event_id), {"_id": 0, "row": 1, "column": 1})
+    return [(c["row"], c["column"]) for c in claims]
+
+
+def rebuild_seat_map(event_id):
+    """
+    Materialize the bitmap from seat claims, for events booked before seat maps
+    existed. Ids that name no event get an empty map and nothing is written.
+    """
+    event = ObjectId.is_valid(event_id) and Event._get_collection().find_one({"_id": ObjectId(event_id)}, {"_id": 1})
+    if not event:
+        return {"words": {}}
+    mark_seats(event_id, _sold_seats(event_id), taken=True)
+    return SeatMap._get_collection().find_one({"event_id": event_id}, {"_id": 0, "words": 1})
+
+
+def reconcile_seat_map(event_id):
+    """
+    Rewrite an existing seat map from the event's sold claims, for bits a crash
+    between a claim write and its seat map update left wrong. Seats sold while
+    it runs are marked again afterwards. Returns whether the map had drifted.
+    """
+    seat_maps = SeatMap._get_collection()
+    doc = seat_maps.find_one({"event_id": event_id}, {"_id": 0, "words": 1})
+    if doc is None:
+        return False
+
+    masks = _seat_masks(_sold_seats(event_id))
+    stored = {int(word): mask & WORD_MASK for word, mask in (doc.get("words") or {}).items() if mask & WORD_MASK}
+    if stored == masks:
+        return False
+
+    words = {str(word): Int64(mask) for word, mask in masks.items()}
+    seat_maps.update_one({"event_id": event_id}, {"$set": {"words": words}})
+    mark_seats(event_id, _sold_seats(event_id))
+    return True
+
+
+def seat_bitmap(event_id):
+    """Return the event's occupancy as bytes, seat i is bit i % 8 of byte i // 8"""
+    # Possibly a little stale, claims on the primary still decide every booking
+    doc = catalog_collection(SeatMap).find_one({"event_id": event_id}, {"_id": 0, "words": 1})
+    if doc is None:
+        doc = rebuild_seat_map(event_id)
+    return build_bitmap(doc.get("words"), held_seats(event_id))
+
+
+def build_bitmap(words, held=()):
+    """Pack a seat map's words, plus any held seats, into the bitmap bytes"""
+    rows, columns = hall_size()
+    size = (rows * columns + 7) // 8
+    bitmap = bytearray(size + WORD_BITS // 8)
+    for word, mask in (words or {}).items():
+        start = int(word) * (WORD_BITS // 8)
+        if start < size:
+            bitmap[start:start + WORD_BITS // 8] = (mask & WORD_MASK).to_bytes(WORD_BITS // 8, "little")
+
+    # Held seats are shown as taken too
+    for row, column in held:
+        bit = (row - 1) * columns + (column - 1)
+        if bit < rows * columns:
+            bitmap[bit // 8] |= 1 << (bit % 8)
+    return bytes(bitmap[:size])
+
+
+def encode_bitmap(bitmap):
+    rows, columns = hall_size()
+    return {
+        "rows": rows,
+        "columns": columns,
+        "encoding": "base64",
+        "bitmap": base64.b64encode(bitmap).decode("ascii"),
+    }
+
+
+def decode_bitmap(bitmap):
+    """Expand a bitmap into the [{"row", "column"}] list the seat picker used to get"""
+    _, columns = hall_size()
+    return [
+        {"row": i // columns + 1, "column": i % columns + 1}
+        for i in range(len(bitmap) * 8)
+        if bitmap[i // 8] & (1 << (i % 8))
+    ]
@@ -0,0 +1,97 @@
+"""
+Per-event sales statistics.
+
+Every confirmed or cancelled booking moves its event's event_stats document
+by one atomic $inc, so organizer dashboards read a single small document
+instead of aggregating the event's bookings on every page view.
+
+The $inc upserts, so the first sale after this shipped creates a document
+that only counts from then on. Deploying it therefore means running
+`manage.py rebuild_event_stats --overwrite` while sales are paused, before
+bookings go live again; nothing counts older sales later.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from backend.models import Booking, EventStats
+from backend.routing import catalog_collection
+
+
+def _inc(tickets, revenue, bookings):
+    return {
+        "$inc": {"tickets_sold": tickets, "revenue": revenue, "bookings": bookings},
+        "$set": {"updated_at": datetime.utcnow()},
+    }
+
+
+def record_booking(event_id, tickets, revenue):
+    EventStats._get_collection().update_one({"event_id": str(event_id)}, _inc(tickets, revenue, 1), upsert=True)
+
+
+def record_cancellation(event_id, tickets, revenue):
+    EventStats._get_collection().update_one({"event_id": str(event_id)}, _inc(-tickets, -revenue, -1), upsert=True)
+
+
+def record_bookings(sales):
+    """Record many (event_id, tickets, revenue) sales with one $inc per event"""
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    for event_id, tickets, revenue in sales:
+        total = totals[str(event_id)]
+        total[0] += tickets
+        total[1] += revenue
+        total[2] += 1
+    if totals:
+        EventStats._get_collection().bulk_write([
+            UpdateOne({"event_id": event_id}, _inc(*total), upsert=True)
+            for event_id, total in totals.items()
+        ], ordered=False)
+
+
+def count_bookings(event_id):
+    """Totals of the event's Confirmed bookings, the slow way"""
+    pipeline = [
+        {"$match": {"event_id": str(event_id), "booking_status": "Confirmed"}},
+        {"$group": {
+            "_id": None,
+            "tickets_sold": {"$sum": "$num_tickets"},
+            "revenue": {"$sum": "$total_price"},
+            "bookings": {"$sum": 1},
+        }},
+    ]
+    totals = next(Booking._get_collection().aggregate(pipeline), {})
+    return {field: totals.get(field, 0) for field in ("tickets_sold", "revenue", "bookings")}
+
+
+def rebuild_stats(event_id, overwrite=False):
+    """
+    Create the event's stats from its bookings, for events sold before stats
+    existed. Without overwrite a document written meanwhile by a booking is
+    left alone, overwrite resets the totals and is only safe while the event
+    isn't selling.
+    """
+    totals = {**count_bookings(event_id), "updated_at": datetime.utcnow()}
+    operator = "$set" if overwrite else "$setOnInsert"
+    EventStats._get_collection().update_one({"event_id": str(event_id)}, {operator: totals}, upsert=True)
+    return EventStats._get_collection().find_one({"event_id": str(event_id)}, {"_id": 0})
+
+
+def stats_for(event_ids):
+    """{event_id: stats document} for the events that have one, in one query"""
+    docs = catalog_collection(EventStats).find({"event_id": {"$in": [str(i) for i in event_ids]}}, {"_id": 0})
+    return {doc["event_id"]: doc for doc in docs}
+
+
+def stats_dict(doc, capacity=None):
+    doc = doc or {}
+    tickets_sold = doc.get("tickets_sold", 0)
+    return {
+        "tickets_sold": tickets_sold,
+        "bookings": doc.get("bookings", 0),
+        "revenue": round(doc.get("revenue", 0), 2),
+        "capacity": capacity or None,
+        # Unlimited events have no remaining count
+        "remaining": max(0, capacity - tickets_sold) if capacity else None,
+        "updated_at": doc.get("updated_at"),
+    }
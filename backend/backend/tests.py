@@ -1,6 +1,9 @@
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock, PropertyMock
 import json
+import os
 from datetime import datetime
 
 
@@ -195,15 +198,14 @@ class FetchEventsTests(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
 
-    @patch("backend.views.Event")
-    def test_fetch_all_events(self, MockEvent):
+    @patch("backend.views.catalog_collection")
+    def test_fetch_all_events(self, mock_collection):
         """GET without filters should return all events."""
-        mock_event = MagicMock()
-        mock_event.to_mongo.return_value.to_dict.return_value = {
+        events = mock_collection.return_value
+        events.find.return_value.sort.return_value.limit.return_value.hint.return_value = [{
             "_id": "event123",
             "title": "Test Event",
-        }
-        MockEvent.objects.return_value = [mock_event]
+        }]
 
         request = self.factory.get("/events/")
         request.user = make_user()
@@ -213,21 +215,20 @@ class FetchEventsTests(TestCase):
         response = fetch_events(request)
 
         self.assertEqual(response.status_code, 200)
-        data = response.data
+        data = response.data["results"]
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["id"], "event123")
 
-    @patch("backend.views.Event")
-    def test_fetch_event_by_id(self, MockEvent):
+    @patch("backend.views.catalog_collection")
+    def test_fetch_event_by_id(self, mock_collection):
         """GET with ?id= should return a single event."""
-        mock_event = MagicMock()
-        mock_event.to_mongo.return_value.to_dict.return_value = {
-            "_id": "event123",
+        event_id = "64b7f0c2a1b2c3d4e5f60718"
+        mock_collection.return_value.find_one.return_value = {
+            "_id": event_id,
             "title": "Specific Event",
         }
-        MockEvent.objects.get.return_value = mock_event
 
-        request = self.factory.get("/events/", {"id": "event123"})
+        request = self.factory.get("/events/", {"id": event_id})
         request.user = make_user()
 
         from backend.views import fetch_events
@@ -235,12 +236,12 @@ class FetchEventsTests(TestCase):
         response = fetch_events(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.data[0]["id"], "event123")
+        self.assertEqual(response.data[0]["id"], event_id)
 
-    @patch("backend.views.Event")
-    def test_fetch_event_by_id_not_found(self, MockEvent):
+    @patch("backend.views.catalog_collection")
+    def test_fetch_event_by_id_not_found(self, mock_collection):
         """GET with unknown id should return empty list."""
-        MockEvent.objects.get.side_effect = MockEvent.DoesNotExist()
+        mock_collection.return_value.find_one.return_value = None
 
         request = self.factory.get("/events/", {"id": "nonexistent"})
         request.user = make_user()
@@ -621,4 +622,2069 @@ class UpdateCurrentUserTests(TestCase):
         response = update_current_user(request)
 
         self.assertEqual(response.status_code, 200)
-        mock_user.save.assert_called_once()
\ No newline at end of file
+        mock_user.save.assert_called_once()
+
+
+class SeatClaimTests(SimpleTestCase):
+
+    @patch("backend.seating.SeatMap")
+    @patch("backend.seating.SeatClaim")
+    def test_claim_seats_inserts_one_claim_per_seat(self, MockClaim, MockSeatMap):
+        """Each requested seat should become one claim document."""
+        from backend.seating import claim_seats
+
+        claim_seats("event123", [(1, 1), (1, 2)], "booking123")
+
+        docs = MockClaim._get_collection.return_value.insert_many.call_args[0][0]
+        self.assertEqual([(d["row"], d["column"]) for d in docs], [(1, 1), (1, 2)])
+        self.assertTrue(all(d["booking_id"] == "booking123" for d in docs))
+        MockSeatMap._get_collection.return_value.update_one.assert_called_once()
+
+    @patch("backend.seating.SeatClaim")
+    def test_claim_seats_conflict_rolls_back(self, MockClaim):
+        """A duplicate key on any seat should release the claims already made."""
+        from pymongo.errors import BulkWriteError
+        from backend.seating import claim_seats, SeatTakenError
+
+        collection = MockClaim._get_collection.return_value
+        collection.insert_many.side_effect = BulkWriteError(
+            {"writeErrors": [{"index": 1, "code": 11000}]}
+        )
+        # No expired hold to purge, so no retry
+        collection.delete_many.return_value.deleted_count = 0
+
+        with self.assertRaises(SeatTakenError) as ctx:
+            claim_seats("event123", [(1, 1), (1, 2)], "booking123")
+
+        self.assertEqual(ctx.exception.seat, {"row": 1, "column": 2})
+        self.assertEqual(collection.delete_many.call_args_list[0].args, ({"booking_id": "booking123"},))
+        collection.insert_many.assert_called_once()
+
+    def test_normalize_seats_rejects_duplicates(self):
+        """The same seat twice in one request should be rejected."""
+        from backend.seating import normalize_seats
+
+        with self.assertRaises(ValueError):
+            normalize_seats([{"row": 1, "column": 1}, {"row": "1", "column": "1"}])
+
+    def test_normalize_seats_rejects_non_lists(self):
+        """A number or object for seats is a bad request, not a TypeError."""
+        from backend.seating import normalize_seats
+
+        for seats in (5, {"row": 1, "column": 1}, "A1"):
+            with self.subTest(seats=seats), self.assertRaises(ValueError):
+                normalize_seats(seats)
+
+
+class CreateBookingClaimTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def post(self, data):
+        request = self.factory.post("/api/bookings/", data, format="json")
+        force_authenticate(request, user=make_user())
+        from backend.views import create_booking
+        return create_booking(request)
+
+    @patch("backend.views.release_attendees")
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.claim_seats")
+    @patch("backend.views.Booking")
+    @patch("backend.views.Event")
+    def test_lost_seat_race_returns_400(self, MockEvent, MockBooking, mock_claim, mock_admit, mock_unadmit):
+        """If another request claimed the seat first, nothing should be saved."""
+        from backend.seating import SeatTakenError
+
+        MockEvent.objects.get.return_value = make_event(created_by="organizer@example.com")
+        mock_claim.side_effect = SeatTakenError((1, 1))
+
+        response = self.post({"event_id": "event123", "seats": [{"row": 1, "column": 1}]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("already reserved", response.data["error"])
+        MockBooking.return_value.save.assert_not_called()
+        mock_unadmit.assert_called_once_with("event123", 1)
+
+    @patch("backend.views.release_attendees")
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.release_seats")
+    @patch("backend.views.claim_seats")
+    @patch("backend.views.Booking")
+    @patch("backend.views.Event")
+    def test_failed_save_releases_claims(
+        self, MockEvent, MockBooking, mock_claim, mock_release, mock_admit, mock_unadmit
+    ):
+        """Claims should not outlive a booking that failed to save."""
+        MockEvent.objects.get.return_value = make_event(created_by="organizer@example.com")
+        MockBooking.return_value = make_booking()
+        MockBooking.return_value.save.side_effect = Exception("write failed")
+
+        response = self.post({"event_id": "event123", "seats": [{"row": 1, "column": 1}]})
+
+        self.assertEqual(response.status_code, 500)
+        mock_release.assert_called_once_with("event123", [(1, 1)], "booking123")
+        mock_unadmit.assert_called_once_with("event123", 1)
+
+    @patch("backend.views.claim_seats")
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.Booking")
+    @patch("backend.views.Event")
+    def test_sold_out_returns_400(self, MockEvent, MockBooking, mock_admit, mock_claim):
+        """No seats should be claimed once capacity is exhausted."""
+        from backend.seating import SoldOutError
+
+        MockEvent.objects.get.return_value = make_event(created_by="organizer@example.com")
+        mock_admit.side_effect = SoldOutError()
+
+        response = self.post({"event_id": "event123", "seats": [{"row": 1, "column": 1}]})
+
+        self.assertEqual(response.status_code, 400)
+        mock_claim.assert_not_called()
+        MockEvent.objects.get.return_value.save.assert_not_called()
+
+
+class BookingStatusTests(SimpleTestCase):
+
+    def put(self, data):
+        request = APIRequestFactory().put("/api/bookings/booking123/update/", data, format="json")
+        force_authenticate(request, user=make_user())
+        from backend.views import update_booking
+        return update_booking(request, "booking123")
+
+    @patch("backend.views.record_cancellation")
+    @patch("backend.views.release_attendees")
+    @patch("backend.views.release_seats")
+    @patch("backend.views.Booking")
+    def test_only_one_concurrent_cancel_releases(self, MockBooking, mock_release, mock_unadmit, mock_record):
+        """The cancel that loses the conditional flip must not free seats or counters a second time."""
+        MockBooking.objects.get.return_value = make_booking()
+        MockBooking.objects.return_value.update_one.return_value = 0
+
+        response = self.put({"booking_status": "Cancelled"})
+
+        self.assertEqual(response.status_code, 409)
+        MockBooking.objects.assert_called_with(id="booking123", booking_status="Confirmed")
+        mock_release.assert_not_called()
+        mock_unadmit.assert_not_called()
+        mock_record.assert_not_called()
+
+    @patch("backend.views.release_seats")
+    @patch("backend.views.Booking")
+    def test_unknown_status_is_rejected_before_anything_moves(self, MockBooking, mock_release):
+        """A bad status is a 400, not a 500 after the seats were already released."""
+        MockBooking.objects.get.return_value = make_booking()
+
+        response = self.put({"booking_status": "Foo"})
+
+        self.assertEqual(response.status_code, 400)
+        MockBooking.objects.return_value.update_one.assert_not_called()
+        mock_release.assert_not_called()
+
+    @patch("backend.views.claim_seats")
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.Booking")
+    def test_holds_are_confirmed_through_confirm_hold(self, MockBooking, mock_admit, mock_claim):
+        """Confirming a hold here would re-claim its own seats and lose them."""
+        MockBooking.objects.get.return_value = make_booking(booking_status="Pending")
+
+        response = self.put({"booking_status": "Confirmed"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("/api/holds/booking123/confirm/", response.data["error"])
+        mock_admit.assert_not_called()
+        mock_claim.assert_not_called()
+
+
+class SeatMapTests(SimpleTestCase):
+
+    @patch("backend.seating.SeatMap")
+    def test_mark_seats_sets_bits_atomically(self, MockSeatMap):
+        """Booking should flip the seats' bits with $bit instead of rewriting the map."""
+        from backend.seating import mark_seats
+
+        mark_seats("event123", [(1, 1), (4, 3)])
+
+        query, update = MockSeatMap._get_collection.return_value.update_one.call_args[0]
+        self.assertEqual(query, {"event_id": "event123"})
+        # seat (4, 3) in an 8x10 hall is bit 32, the first bit of the second word
+        self.assertEqual(update["$bit"], {"words.0": {"or": 1}, "words.1": {"or": 1}})
+
+    @patch("backend.seating.SeatClaim")
+    @patch("backend.seating.SeatMap")
+    def test_release_clears_bits(self, MockSeatMap, MockClaim):
+        """Cancelling should AND the seats' bits away."""
+        from backend.seating import mark_seats
+
+        MockClaim._get_collection.return_value.find.return_value = []
+
+        mark_seats("event123", [(1, 2)], taken=False)
+
+        update = MockSeatMap._get_collection.return_value.update_one.call_args[0][1]
+        self.assertEqual(update["$bit"], {"words.0": {"and": ~2}})
+
+    @patch("backend.seating.SeatClaim")
+    @patch("backend.seating.SeatMap")
+    def test_release_keeps_bits_of_seats_sold_again(self, MockSeatMap, MockClaim):
+        """A late clear must not free a seat a new booking claimed after the old claim went."""
+        from backend.seating import mark_seats
+
+        MockClaim._get_collection.return_value.find.return_value = [{"row": 1, "column": 2}]
+
+        mark_seats("event123", [(1, 2), (1, 3)], taken=False)
+
+        query = MockClaim._get_collection.return_value.find.call_args[0][0]
+        self.assertEqual(query["expires_at"], None)
+        clear, restore = [c[0][1] for c in MockSeatMap._get_collection.return_value.update_one.call_args_list]
+        self.assertEqual(clear["$bit"], {"words.0": {"and": ~6}})
+        self.assertEqual(restore["$bit"], {"words.0": {"or": 2}})
+
+    @patch("backend.seating.SeatClaim")
+    @patch("backend.seating.SeatMap")
+    def test_reconcile_rewrites_drifted_words(self, MockSeatMap, MockClaim):
+        """Bits a crash left behind are recomputed from the sold claims."""
+        from backend.seating import reconcile_seat_map
+
+        seat_maps = MockSeatMap._get_collection.return_value
+        MockClaim._get_collection.return_value.find.return_value = [{"row": 1, "column": 1}]
+        seat_maps.find_one.return_value = {"words": {"0": 1 | 4}}
+
+        self.assertTrue(reconcile_seat_map("event123"))
+        seat_maps.update_one.assert_any_call({"event_id": "event123"}, {"$set": {"words": {"0": 1}}})
+
+        seat_maps.reset_mock()
+        seat_maps.find_one.return_value = {"words": {"0": 1, "1": 0}}
+        self.assertFalse(reconcile_seat_map("event123"))
+        seat_maps.update_one.assert_not_called()
+
+    @patch("backend.seating.held_seats", return_value=[])
+    @patch("backend.seating.SeatMap")
+    def test_bitmap_round_trip(self, MockSeatMap, mock_held):
+        """Stored words should decode back to the same seats."""
+        from backend.seating import seat_bitmap, decode_bitmap, encode_bitmap
+
+        MockSeatMap._get_collection.return_value.with_options.return_value.find_one.return_value = {
+            "words": {"0": 1, "1": 1, "2": 1 << 15}
+        }
+
+        bitmap = seat_bitmap("event123")
+
+        self.assertEqual(len(bitmap), 10)
+        self.assertEqual(
+            decode_bitmap(bitmap),
+            [{"row": 1, "column": 1}, {"row": 4, "column": 3}, {"row": 8, "column": 10}],
+        )
+        self.assertEqual(encode_bitmap(bitmap)["rows"], 8)
+
+    @patch("backend.seating.held_seats", return_value=[])
+    @patch("backend.seating.Event")
+    @patch("backend.seating.SeatMap")
+    def test_unknown_event_gets_an_empty_map_without_a_write(self, MockSeatMap, MockEvent, mock_held):
+        """Seat maps are only materialized for events that exist."""
+        from backend.seating import seat_bitmap
+
+        MockSeatMap._get_collection.return_value.with_options.return_value.find_one.return_value = None
+        MockEvent._get_collection.return_value.find_one.return_value = None
+
+        self.assertEqual(seat_bitmap("64b7f0c2a1b2c3d4e5f60718"), bytes(10))
+        self.assertEqual(seat_bitmap("not-an-id"), bytes(10))
+        MockSeatMap._get_collection.return_value.update_one.assert_not_called()
+
+    @patch("backend.views.seat_bitmap", return_value=bytes([0b100] + [0] * 9))
+    def test_get_reserved_seats_formats(self, mock_bitmap):
+        """The endpoint should serve the bitset by default and the list on request."""
+        from backend.views import get_reserved_seats
+
+        factory = APIRequestFactory()
+        request = factory.get("/api/events/event123/reserved-seats/")
+        force_authenticate(request, user=make_user())
+        response = get_reserved_seats(request, "event123")
+        self.assertEqual(response.data["bitmap"], "BAAAAAAAAAAAAA==")
+
+        request = factory.get("/api/events/event123/reserved-seats/", {"encoding": "list"})
+        force_authenticate(request, user=make_user())
+        response = get_reserved_seats(request, "event123")
+        self.assertEqual(response.data, [{"row": 1, "column": 3}])
+
+
+class AttendeeCounterTests(SimpleTestCase):
+
+    @patch("backend.seating.Event")
+    def test_admit_is_conditional_increment(self, MockEvent):
+        """Admission should be one $inc gated on remaining capacity."""
+        from backend.seating import admit_attendees
+
+        collection = MockEvent._get_collection.return_value
+        collection.update_one.return_value.matched_count = 1
+
+        admit_attendees("64b7f0c2a1b2c3d4e5f60718", 3)
+
+        query, update = collection.update_one.call_args[0]
+        self.assertEqual(update, {"$inc": {"attendees_count": 3}})
+        self.assertIn("$or", query)
+
+    @patch("backend.seating.Event")
+    def test_admit_raises_when_full(self, MockEvent):
+        """A non-matching update means the event has no room left."""
+        from backend.seating import admit_attendees, SoldOutError
+
+        MockEvent._get_collection.return_value.update_one.return_value.matched_count = 0
+
+        with self.assertRaises(SoldOutError):
+            admit_attendees("64b7f0c2a1b2c3d4e5f60718", 1)
+
+
+    @patch("backend.caching.cache")
+    @patch("backend.seating.Event")
+    def test_cache_outage_does_not_fail_committed_admission(self, MockEvent, mock_cache):
+        """The $inc has committed, a failing feed invalidation must not turn it into a 500."""
+        from backend.seating import admit_attendees
+
+        MockEvent._get_collection.return_value.update_one.return_value.matched_count = 1
+        mock_cache.incr.side_effect = ConnectionError("redis down")
+
+        with self.assertLogs("backend.caching", "WARNING"):
+            admit_attendees("64b7f0c2a1b2c3d4e5f60718", 2)
+
+class QueryShapeIndexTests(SimpleTestCase):
+
+    def test_every_query_shape_has_an_index(self):
+        """Each view query shape should be served by a declared index."""
+        from backend.query_shapes import QUERY_SHAPES, supporting_index
+
+        for shape in QUERY_SHAPES:
+            with self.subTest(view=shape.view):
+                self.assertIsNotNone(supporting_index(shape))
+
+    def test_plan_stages_finds_collscan(self):
+        """Nested explain() plans should be flattened down to their input stages."""
+        from backend.query_shapes import plan_stages
+
+        explain = {"queryPlanner": {"winningPlan": {
+            "stage": "LIMIT",
+            "inputStage": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}},
+        }}}
+
+        self.assertEqual(plan_stages(explain), [("LIMIT", None), ("SORT", None), ("COLLSCAN", None)])
+
+
+class PaginationTests(SimpleTestCase):
+
+    def make_docs(self, n):
+        from bson import ObjectId
+        return [
+            {"_id": ObjectId(), "created_at": datetime(2025, 1, 1, 12, 0, 59 - i)}
+            for i in range(n)
+        ]
+
+    def test_cursor_round_trip(self):
+        """Cursors should decode back to the datetime and ObjectId they were built from."""
+        from bson import ObjectId
+        from backend.pagination import encode_cursor, decode_cursor
+
+        values = [datetime(2025, 1, 1, 12, 0), ObjectId()]
+
+        self.assertEqual(decode_cursor(encode_cursor(values)), values)
+
+    def test_invalid_cursor(self):
+        """Garbage cursors should raise InvalidCursor."""
+        from backend.pagination import decode_cursor, InvalidCursor
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_values_must_fit_the_sort_key(self):
+        """Cursors are client input: operators, string ids and mistyped keys are rejected."""
+        from bson import ObjectId
+        from backend.pagination import encode_cursor, keyset_filter, InvalidCursor
+
+        forged = [
+            ({"$gt": None}, ObjectId(), "created_at"),
+            (datetime(2025, 1, 1), {"$ne": None}, "created_at"),
+            (datetime(2025, 1, 1), "64b7f0c2a1b2c3d4e5f60718", "created_at"),
+            ("2025-01-01", ObjectId(), "date"),
+            (True, ObjectId(), "price"),
+        ]
+        for value, last_id, key in forged:
+            with self.subTest(value=value, last_id=last_id), self.assertRaises(InvalidCursor):
+                keyset_filter(encode_cursor([value, last_id]), key, -1)
+
+        self.assertIn("$or", keyset_filter(encode_cursor([12.5, ObjectId()]), "price", 1))
+
+    def test_paginate_returns_next_cursor(self):
+        """A full page should carry a cursor pointing at its last document."""
+        from backend.pagination import paginate, decode_cursor
+
+        docs = self.make_docs(3)
+        queryset = MagicMock()
+        queryset.order_by.return_value.limit.return_value = docs
+
+        page, next_cursor = paginate(queryset, {"limit": "2"})
+
+        self.assertEqual(page, docs[:2])
+        self.assertEqual(decode_cursor(next_cursor), [docs[1]["created_at"], docs[1]["_id"]])
+        queryset.order_by.assert_called_once_with("-created_at", "-id")
+        queryset.order_by.return_value.limit.assert_called_once_with(3)
+
+    def test_paginate_continues_after_cursor(self):
+        """The next page should be a range query on (created_at, _id), not a skip."""
+        from backend.pagination import paginate, encode_cursor
+
+        last = self.make_docs(1)[0]
+        queryset = MagicMock()
+        queryset.filter.return_value.order_by.return_value.limit.return_value = []
+
+        page, next_cursor = paginate(
+            queryset, {"cursor": encode_cursor([last["created_at"], last["_id"]])}
+        )
+
+        raw = queryset.filter.call_args.kwargs["__raw__"]
+        self.assertEqual(raw["$or"][1], {"created_at": last["created_at"], "_id": {"$lt": last["_id"]}})
+        self.assertIsNone(next_cursor)
+
+    @override_settings(MAX_PAGE_SIZE=50)
+    def test_page_size_is_capped(self):
+        """Clients should not be able to ask for more than MAX_PAGE_SIZE."""
+        from backend.pagination import page_size
+
+        self.assertEqual(page_size({"limit": "10000"}), 50)
+
+
+class EventFieldsetTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_card_preset(self):
+        """The card preset should expand to the fields EventCard renders."""
+        from backend.views import event_projection
+
+        fields = event_projection("card")
+
+        self.assertIn("image_url", fields)
+        self.assertNotIn("description", fields)
+
+    def test_explicit_fields_and_detail(self):
+        """Field names are taken as-is and detail means the whole document."""
+        from backend.views import event_projection
+
+        self.assertEqual(event_projection("id,title,price"), ["title", "price"])
+        self.assertIsNone(event_projection("detail"))
+        self.assertIsNone(event_projection(""))
+
+    def test_unknown_field(self):
+        """Unknown names should be rejected rather than silently dropped."""
+        from backend.views import event_projection
+
+        with self.assertRaises(ValueError):
+            event_projection("title,password")
+
+    @patch("backend.views.catalog_collection")
+    def test_fetch_events_pushes_projection_to_mongo(self, mock_collection):
+        """?fields=card should become a find() projection on raw pymongo documents."""
+        from backend.views import fetch_events, EVENT_FIELDSETS
+
+        events = mock_collection.return_value
+        events.find.return_value.sort.return_value.limit.return_value.hint.return_value = [
+            {"_id": "event123", "title": "Test Event"}
+        ]
+
+        request = APIRequestFactory().get("/api/events/", {"status": "Published", "fields": "card"})
+        response = fetch_events(request)
+
+        projection = {field: 1 for field in (*EVENT_FIELDSETS["card"], "created_at")}
+        events.find.assert_called_once_with({"status": "Published"}, projection)
+        self.assertEqual(response.data["results"], [{"id": "event123", "title": "Test Event"}])
+
+
+class UserCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        from backend.caching import _users
+        _users.clear()
+
+    def test_ttl_cache_evicts_least_recently_used(self):
+        """Going over maxsize should drop the entry touched longest ago."""
+        from backend.caching import TTLCache
+
+        lru = TTLCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+
+    @patch("backend.caching.time.monotonic")
+    def test_ttl_cache_expires(self, mock_time):
+        """Entries should disappear once their ttl has passed."""
+        from backend.caching import TTLCache
+
+        mock_time.return_value = 100
+        lru = TTLCache(maxsize=2, ttl=60)
+        lru.set("a", 1)
+        mock_time.return_value = 161
+
+        self.assertIsNone(lru.get("a"))
+
+    @patch("backend.caching.User")
+    def test_get_user_hits_mongo_once(self, MockUser):
+        """Repeated lookups for the same id should be served from the cache."""
+        from backend.caching import get_user
+
+        MockUser.objects.only.return_value.get.return_value = make_user()
+
+        get_user("user123")
+        user = get_user("user123")
+
+        self.assertEqual(user.email, "test@example.com")
+        MockUser.objects.only.return_value.get.assert_called_once_with(id="user123")
+
+    @patch("backend.caching.User")
+    def test_invalidate_user_forces_reload(self, MockUser):
+        """After invalidation the next lookup should go back to Mongo."""
+        from backend.caching import get_user, invalidate_user
+
+        MockUser.objects.only.return_value.get.return_value = make_user()
+
+        get_user("user123")
+        invalidate_user("user123")
+        get_user("user123")
+
+        self.assertEqual(MockUser.objects.only.return_value.get.call_count, 2)
+
+    @override_settings(USER_CACHE_SHARED=True)
+    @patch("backend.caching.cache")
+    @patch("backend.caching.User")
+    def test_shared_tier_is_checked_before_mongo(self, MockUser, mock_cache):
+        """Another worker's cached copy should be reused without a query."""
+        from backend.caching import get_user
+
+        mock_cache.get.return_value = {"_id": "user123", "email": "test@example.com"}
+
+        get_user("user123")
+
+        MockUser._from_son.assert_called_once_with({"_id": "user123", "email": "test@example.com"})
+        MockUser.objects.only.return_value.get.assert_not_called()
+
+    @override_settings(USER_CACHE_SHARED=True)
+    @patch("backend.caching.cache")
+    @patch("backend.caching.User")
+    def test_password_hash_is_never_cached(self, MockUser, mock_cache):
+        """Users are loaded without their password and only request fields reach the shared tier."""
+        from django.conf import settings
+        from backend.caching import CACHED_USER_FIELDS, get_user
+
+        mock_cache.get.return_value = None
+        user = MockUser.objects.only.return_value.get.return_value = make_user()
+        user.to_mongo.return_value.to_dict.return_value = {
+            "_id": "user123", "email": "test@example.com", "password": "pbkdf2_sha256$hash", "created_at": None,
+        }
+
+        get_user("user123")
+
+        self.assertNotIn("password", CACHED_USER_FIELDS)
+        MockUser.objects.only.assert_called_once_with(*CACHED_USER_FIELDS)
+        mock_cache.set.assert_called_once_with(
+            "user:user123", {"_id": "user123", "email": "test@example.com"}, settings.USER_CACHE_TTL
+        )
+
+    @patch("backend.authentication.get_user")
+    def test_authentication_returns_none_for_deleted_user(self, mock_get_user):
+        """A token for a user that no longer exists should not authenticate."""
+        from mongoengine import DoesNotExist
+        from backend.authentication import MongoJWTAuthentication
+
+        mock_get_user.side_effect = DoesNotExist()
+
+        self.assertIsNone(MongoJWTAuthentication().get_user({"user_id": "user123"}))
+
+
+class BlobUploadTests(SimpleTestCase):
+
+    def setUp(self):
+        import backend.blob
+        backend.blob._container = None
+
+    def make_file(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return SimpleUploadedFile("photo.png", b"png-bytes", content_type="image/png")
+
+    @patch.dict("os.environ", {"AZURE_STORAGE_CONNECTION_STRING": "UseDevelopmentStorage=true"})
+    @patch("backend.blob.BlobServiceClient")
+    def test_client_is_created_once(self, MockService):
+        """Uploads should reuse one pooled service client."""
+        from backend.blob import upload_image_to_blob
+
+        upload_image_to_blob(self.make_file())
+        upload_image_to_blob(self.make_file())
+
+        MockService.from_connection_string.assert_called_once()
+        blob_client = MockService.from_connection_string.return_value.get_container_client.return_value.get_blob_client.return_value
+        self.assertEqual(blob_client.upload_blob.call_count, 2)
+        self.assertIn("max_concurrency", blob_client.upload_blob.call_args.kwargs)
+
+    @patch("backend.blob._get_executor")
+    @patch("backend.blob.blob_url", return_value="http://blob/photo.png")
+    @patch("backend.blob._upload", return_value="http://blob/photo.png")
+    def test_background_upload_reports_job_status(self, mock_upload, mock_url, mock_executor):
+        """A background upload should be pending until the worker finishes it."""
+        from backend.blob import upload_image_in_background, get_upload_job
+
+        submitted = []
+        mock_executor.return_value.submit.side_effect = lambda fn, *args: submitted.append((fn, args))
+
+        job_id, url = upload_image_in_background(self.make_file())
+
+        self.assertEqual(url, "http://blob/photo.png")
+        self.assertEqual(get_upload_job(job_id)["status"], "pending")
+        mock_upload.assert_not_called()
+
+        fn, args = submitted[0]
+        fn(*args)
+
+        self.assertEqual(get_upload_job(job_id), {"status": "done", "url": "http://blob/photo.png"})
+
+    @override_settings(BLOB_BACKGROUND_UPLOADS=True)
+    @patch("backend.views.schedule_variants")
+    @patch("backend.views.upload_image_in_background", return_value=("job123", "http://blob/photo.png"))
+    def test_upload_file_returns_202_in_background_mode(self, mock_background, mock_variants):
+        """upload_file should hand off the transfer and answer immediately."""
+        from backend.views import upload_file
+
+        request = APIRequestFactory().post("/api/upload/", {"file": self.make_file()}, format="multipart")
+        force_authenticate(request, user=make_user())
+        response = upload_file(request)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["job_id"], "job123")
+        mock_variants.assert_called_once_with("http://blob/photo.png", b"png-bytes")
+
+
+class ImageDerivativeTests(SimpleTestCase):
+
+    def make_image(self, mode="RGB", size=(2000, 1000)):
+        import io
+        from PIL import Image
+
+        out = io.BytesIO()
+        Image.new(mode, size, "red").save(out, "PNG")
+        return out.getvalue()
+
+    def test_render_variants_sizes_and_formats(self):
+        """Each variant should fit its box and come in WebP and JPEG."""
+        from backend.images import render_variants
+
+        rendered = render_variants(self.make_image())
+
+        self.assertEqual((rendered["thumb"]["width"], rendered["thumb"]["height"]), (320, 160))
+        self.assertEqual((rendered["banner"]["width"], rendered["banner"]["height"]), (1200, 600))
+        self.assertEqual(rendered["card"]["webp"][8:12], b"WEBP")
+        self.assertEqual(rendered["card"]["jpeg"][:2], b"\xff\xd8")
+
+    def test_render_variants_never_enlarges(self):
+        """Small images should keep their size, including transparent ones."""
+        from backend.images import render_variants
+
+        rendered = render_variants(self.make_image("RGBA", (200, 100)))
+
+        self.assertEqual(rendered["banner"]["width"], 200)
+
+    def test_pick_variant(self):
+        """The smallest variant wide enough should win, else the largest."""
+        from backend.derivatives import pick_variant
+
+        variants = {"thumb": {"width": 320}, "card": {"width": 640}, "banner": {"width": 1600}}
+
+        self.assertEqual(pick_variant(variants, 400), {"width": 640})
+        self.assertEqual(pick_variant(variants, 3000), {"width": 1600})
+        self.assertIsNone(pick_variant({}, 400))
+
+    @patch("backend.derivatives.Event")
+    @patch("backend.derivatives.ImageAsset")
+    @patch("backend.derivatives.blob._upload", side_effect=lambda name, data, content_type: f"http://blob/{name}")
+    def test_store_variants_records_urls(self, mock_upload, MockAsset, MockEvent):
+        """Stored variants should land on the asset and on events using the original."""
+        from concurrent.futures import Future
+        from backend.derivatives import store_variants
+
+        future = Future()
+        future.set_result({"thumb": {"width": 320, "height": 160, "webp": b"w", "jpeg": b"j"}})
+
+        store_variants("http://blob/abc-photo.png", future)
+
+        variants = {"thumb": {
+            "width": 320, "height": 160,
+            "webp": "http://blob/abc-photo-thumb.webp", "jpeg": "http://blob/abc-photo-thumb.jpeg",
+        }}
+        MockAsset.objects.return_value.update_one.assert_called_once_with(set__variants=variants, upsert=True)
+        MockEvent.objects.assert_any_call(image_url="http://blob/abc-photo.png")
+        MockEvent.objects.return_value.update.assert_any_call(set__image_variants=variants)
+
+    def test_event_dict_swaps_in_variant(self):
+        """Listings asking for an image width should get the matching resized URL."""
+        from backend.views import event_dict
+
+        doc = {
+            "_id": "event123",
+            "image_url": "http://blob/original.png",
+            "image_variants": {
+                "thumb": {"width": 320, "webp": "http://blob/thumb.webp"},
+                "card": {"width": 640, "webp": "http://blob/card.webp"},
+            },
+        }
+
+        result = event_dict(doc, image_width=600)
+
+        self.assertEqual(result["image_url"], "http://blob/card.webp")
+        self.assertNotIn("image_variants", result)
+
+
+class EventFeedCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_key_ignores_parameter_order(self):
+        """Equivalent query strings should share a cache entry."""
+        from django.http import QueryDict
+        from backend.caching import feed_cache_key
+
+        self.assertEqual(
+            feed_cache_key(QueryDict("status=Published&limit=20")),
+            feed_cache_key(QueryDict("limit=20&status=Published")),
+        )
+
+    def test_invalidation_changes_key(self):
+        """A write should move the feed to fresh cache keys."""
+        from django.http import QueryDict
+        from backend.caching import feed_cache_key, invalidate_event_feed
+
+        before = feed_cache_key(QueryDict("status=Published"))
+        invalidate_event_feed()
+
+        self.assertNotEqual(before, feed_cache_key(QueryDict("status=Published")))
+
+    def test_get_or_compute_caches(self):
+        """A fresh entry should be served without recomputing."""
+        from backend.caching import get_or_compute
+
+        compute = MagicMock(return_value="feed")
+
+        get_or_compute("k", compute, ttl=30)
+        self.assertEqual(get_or_compute("k", compute, ttl=30), "feed")
+        compute.assert_called_once()
+
+    @patch("backend.caching.time.time")
+    def test_stale_entry_served_while_locked(self, mock_time):
+        """While one worker refreshes, others should get the stale copy."""
+        from django.core.cache import cache
+        from backend.caching import get_or_compute
+
+        mock_time.return_value = 1000
+        get_or_compute("k", lambda: "old", ttl=30)
+        mock_time.return_value = 1031
+        cache.add("k:lock", 1)
+
+        compute = MagicMock(return_value="new")
+        self.assertEqual(get_or_compute("k", compute, ttl=30), "old")
+        compute.assert_not_called()
+
+    def test_errors_are_not_cached(self):
+        """Only 200 responses should be stored."""
+        from django.http import QueryDict
+        from backend.caching import cached_feed
+
+        compute = MagicMock(return_value=(400, {"error": "Invalid cursor"}))
+
+        cached_feed(QueryDict("cursor=bad"), compute)
+        cached_feed(QueryDict("cursor=bad"), compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+    @patch("backend.views.catalog_collection")
+    def test_anonymous_feed_hits_mongo_once(self, mock_collection):
+        """Repeated anonymous feed requests should be served from the cache."""
+        from backend.views import fetch_events
+
+        events = mock_collection.return_value
+        events.find.return_value.sort.return_value.limit.return_value.hint.return_value = [
+            {"_id": "event123", "title": "Test Event"}
+        ]
+
+        factory = APIRequestFactory()
+        fetch_events(factory.get("/api/events/", {"status": "Published"}))
+        response = fetch_events(factory.get("/api/events/", {"status": "Published"}))
+
+        self.assertEqual(response.data["results"][0]["id"], "event123")
+        events.find.assert_called_once()
+
+
+class SearchTests(SimpleTestCase):
+
+    def test_pipeline_matches_text_and_filters(self):
+        """Search should be a single $text match carrying the exact filters."""
+        from django.http import QueryDict
+        from backend.search import search_pipeline
+
+        pipeline, key = search_pipeline(QueryDict("q=jazz night&city=Warsaw&date_from=2025-06-01"))
+
+        self.assertEqual(pipeline[0]["$match"], {
+            "$text": {"$search": "jazz night"},
+            "city_key": "warsaw",
+            "date": {"$gte": datetime(2025, 6, 1)},
+        })
+        self.assertEqual(key, "score")
+        self.assertIn({"$sort": {"score": -1, "_id": -1}}, pipeline)
+
+    def test_cursor_continues_by_relevance(self):
+        """The next page should start strictly after the last (score, _id)."""
+        from bson import ObjectId
+        from django.http import QueryDict
+        from backend.pagination import encode_cursor
+        from backend.search import search_pipeline
+
+        last_id = ObjectId()
+        params = QueryDict(mutable=True)
+        params.update({"q": "jazz", "cursor": encode_cursor([1.5, last_id])})
+
+        pipeline, _ = search_pipeline(params)
+
+        self.assertEqual(pipeline[2]["$match"]["$or"][1], {"score": 1.5, "_id": {"$lt": last_id}})
+
+    def test_invalid_params(self):
+        """Missing q, unknown sorts and bad dates should be rejected."""
+        from django.http import QueryDict
+        from backend.search import search_pipeline
+
+        for query in ("", "q=jazz&sort=price", "q=jazz&date_to=June"):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                search_pipeline(QueryDict(query))
+
+    @patch("backend.search.Event")
+    def test_view_returns_page_and_cursor(self, MockEvent):
+        """The view should return one page of results with a cursor for the next."""
+        from bson import ObjectId
+        from backend.views import search_events_view
+
+        rows = [{"_id": ObjectId(), "title": f"Jazz {i}", "score": 3.0 - i} for i in range(3)]
+        MockEvent._get_collection.return_value.with_options.return_value.aggregate.return_value = rows
+
+        request = APIRequestFactory().get("/api/events/search/", {"q": "jazz", "limit": "2"})
+        response = search_events_view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e["title"] for e in response.data["results"]], ["Jazz 0", "Jazz 1"])
+        self.assertIsNotNone(response.data["next_cursor"])
+        MockEvent._get_collection.return_value.with_options.return_value.aggregate.assert_called_once()
+
+    def test_view_requires_query(self):
+        """A search without q should be a 400."""
+        from backend.views import search_events_view
+
+        response = search_events_view(APIRequestFactory().get("/api/events/search/"))
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_parse_tags(self):
+        """Tags should accept lists and comma separated strings."""
+        from backend.views import parse_tags
+
+        self.assertEqual(parse_tags("jazz, live ,jazz,"), ["jazz", "live"])
+        self.assertEqual(parse_tags(["rock", " "]), ["rock"])
+
+
+class EventFilterTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_filter_combines_equality_and_ranges(self):
+        """Listing parameters should become one raw filter with date and price ranges."""
+        from django.http import QueryDict
+        from backend.filters import event_filter
+
+        match = event_filter(QueryDict(
+            "status=Published&city=Warsaw&featured=true&date_from=2025-06-01&price_min=10&price_max=50"
+        ))
+
+        self.assertEqual(match, {
+            "status": "Published",
+            "city_key": "warsaw",
+            "featured": True,
+            "date": {"$gte": datetime(2025, 6, 1)},
+            "price": {"$gte": 10.0, "$lte": 50.0},
+        })
+
+    def test_city_matches_whatever_its_case(self):
+        """?city= is compared with the city_key Event.save stores, not the city as typed."""
+        from django.http import QueryDict
+        from backend.filters import event_filter
+        from backend.models import city_key
+
+        self.assertEqual(event_filter(QueryDict("city=%20WARSAW%20"))["city_key"], city_key("Warsaw"))
+        self.assertEqual(city_key("  Zielona   Góra "), "zielona góra")
+        self.assertEqual(event_filter(QueryDict("city=%20%20")), {})
+
+    def test_invalid_values(self):
+        """Bad dates, prices, flags and sorts should raise ValueError."""
+        from django.http import QueryDict
+        from backend.filters import event_filter, event_sort
+
+        for query in ("date_to=tomorrow", "price_min=cheap", "featured=maybe"):
+            with self.subTest(query=query), self.assertRaises(ValueError):
+                event_filter(QueryDict(query))
+        with self.assertRaises(ValueError):
+            event_sort(QueryDict("sort=random"))
+
+    def test_pick_index_prefers_most_equality_fields(self):
+        """City and date browsing should hint the (status, city_key, date) index."""
+        from backend.filters import pick_index
+
+        index = pick_index({"status": "Published", "city_key": "warsaw", "date": {"$gte": 1}}, "date")
+
+        self.assertEqual(index, [("status", 1), ("city_key", 1), ("date", 1), ("_id", 1)])
+
+    def test_pick_index_skips_indexes_with_unfiltered_prefix(self):
+        """An index led by a field the query doesn't pin can't serve the sort."""
+        from backend.filters import pick_index
+
+        self.assertEqual(pick_index({"status": "Published"}, "price"), [("status", 1), ("price", 1), ("_id", 1)])
+        self.assertIsNone(pick_index({}, "price"))
+
+    @patch("backend.filters.Event")
+    def test_facets_exclude_their_own_filter(self, MockEvent):
+        """Category counts should honour the city filter but not the category one."""
+        from backend.filters import facet_counts
+
+        MockEvent._get_collection.return_value.with_options.return_value.aggregate.return_value = iter([{
+            "category": [{"_id": "Music", "value": "Music", "count": 3}, {"_id": None, "value": None, "count": 1}],
+            "city": [{"_id": "warsaw", "value": "Warsaw", "count": 4}],
+        }])
+
+        facets = facet_counts({"status": "Published", "category": "Music", "city_key": "warsaw"})
+
+        pipeline = MockEvent._get_collection.return_value.with_options.return_value.aggregate.call_args.args[0]
+        self.assertEqual(pipeline[0], {"$match": {"status": "Published"}})
+        self.assertEqual(pipeline[1]["$facet"]["category"][0], {"$match": {"city_key": "warsaw"}})
+        self.assertEqual(pipeline[1]["$facet"]["city"][0], {"$match": {"category": "Music"}})
+        self.assertEqual(pipeline[1]["$facet"]["city"][1]["$group"]["_id"], "$city_key")
+        self.assertEqual(pipeline[1]["$facet"]["city"][1]["$group"]["value"], {"$first": "$city"})
+        self.assertEqual(facets, {
+            "category": [{"value": "Music", "count": 3}],
+            "city": [{"value": "Warsaw", "count": 4}],
+        })
+
+    @patch("backend.views.facet_counts")
+    @patch("backend.views.catalog_collection")
+    def test_fetch_events_sorts_and_hints(self, mock_collection, mock_facets):
+        """fetch_events should query the raw filter with the picked index and sort key."""
+        from backend.views import fetch_events
+
+        events = mock_collection.return_value
+        limited = events.find.return_value.sort.return_value.limit.return_value
+        limited.hint.return_value = []
+        mock_facets.return_value = {"category": [], "city": []}
+
+        response = fetch_events(APIRequestFactory().get(
+            "/api/events/", {"status": "Published", "category": "Music", "sort": "date", "facets": "1"}
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        events.find.assert_called_once_with({"status": "Published", "category": "Music"}, None)
+        events.find.return_value.sort.assert_called_once_with([("date", 1), ("_id", 1)])
+        limited.hint.assert_called_once_with([("status", 1), ("category", 1), ("date", 1), ("_id", 1)])
+        self.assertEqual(response.data["facets"], {"category": [], "city": []})
+
+    def test_listing_scopes_owner_and_continues_after_cursor(self):
+        """EventListing builds the query both fetch_events views run."""
+        from bson import ObjectId
+        from django.http import QueryDict
+        from backend.filters import EventListing, ListingError
+        from backend.pagination import encode_cursor, keyset_filter
+
+        cursor = encode_cursor([datetime(2025, 6, 1), ObjectId()])
+        listing = EventListing(QueryDict(f"created_by=me&sort=date&cursor={cursor}"), make_user())
+
+        self.assertEqual(listing.match, {"created_by": "test@example.com"})
+        self.assertEqual(listing.query, {"$and": [listing.match, keyset_filter(cursor, "date", 1)]})
+        self.assertFalse(listing.facets)
+        with self.assertRaises(ListingError) as raised:
+            EventListing(QueryDict("created_by=me"), MagicMock(is_authenticated=False))
+        self.assertEqual(raised.exception.status, 401)
+        self.assertIsNone(EventListing(QueryDict("id=nonexistent"), make_user()).id_filter)
+
+
+class BatchBookingTests(SimpleTestCase):
+
+    def setUp(self):
+        from bson import ObjectId
+        from backend.models import Booking, Event, EventStats, SeatClaim
+
+        self.event_a, self.event_b = str(ObjectId()), str(ObjectId())
+        self.collections = {}
+        for model in (Booking, Event, EventStats, SeatClaim):
+            patcher = patch.object(model, "_get_collection")
+            self.collections[model.__name__] = patcher.start().return_value
+            self.addCleanup(patcher.stop)
+        self.collections["Event"].find.return_value = [
+            {"_id": ObjectId(self.event_a), "created_by": "organizer@example.com"},
+            {"_id": ObjectId(self.event_b), "created_by": "organizer@example.com"},
+        ]
+        self.collections["SeatClaim"].find.return_value = []
+
+        for name in ("admit_attendees", "release_attendees", "mark_seats"):
+            patcher = patch(f"backend.batch.{name}")
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = patch("backend.batch._purge_expired", return_value=0)
+        self.purge_expired = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def item(self, event_id, *seats):
+        return {"event_id": event_id, "seats": [{"row": r, "column": c} for r, c in seats], "total_price": 10}
+
+    def test_items_across_events_share_writes(self):
+        """Every item should be committed with one claim insert and one booking bulk_write."""
+        from backend.batch import book_batch
+
+        results = book_batch(make_user(), [
+            self.item(self.event_a, (1, 1), (1, 2)),
+            self.item(self.event_a, (2, 1)),
+            self.item(self.event_b, (1, 1)),
+        ])
+
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(self.admit_attendees.call_count, 2)
+        self.admit_attendees.assert_any_call(self.event_a, 3)
+        self.collections["SeatClaim"].insert_many.assert_called_once()
+        self.assertEqual(len(self.collections["SeatClaim"].insert_many.call_args.args[0]), 4)
+        ops = self.collections["Booking"].bulk_write.call_args.args[0]
+        self.assertEqual(len(ops), 3)
+        stats = self.collections["EventStats"].bulk_write.call_args.args[0]
+        self.assertEqual(len(stats), 2)
+
+    def test_bookings_carry_event_summary(self):
+        """Batch bookings copy the event summary read with the ownership check."""
+        from bson import ObjectId
+        from backend.batch import book_batch
+
+        self.collections["Event"].find.return_value = [{
+            "_id": ObjectId(self.event_a), "created_by": "organizer@example.com",
+            "title": "Jazz Night", "date": datetime(2025, 6, 1), "time": "20:00",
+            "location": "Blue Note", "city": "Warsaw",
+        }]
+
+        book_batch(make_user(), [self.item(self.event_a, (1, 1))])
+
+        booking = self.collections["Booking"].bulk_write.call_args.args[0][0]._doc
+        self.assertEqual(booking["event_title"], "Jazz Night")
+        self.assertEqual(booking["event_date"], "2025-06-01")
+        self.assertEqual(booking["event_city"], "Warsaw")
+
+    def test_taken_and_duplicate_seats_fail_their_item(self):
+        """A seat already claimed, or requested twice in the batch, fails only that item."""
+        from backend.batch import book_batch
+
+        self.collections["SeatClaim"].find.return_value = [{"event_id": self.event_b, "row": 5, "column": 5}]
+
+        results = book_batch(make_user(), [
+            self.item(self.event_a, (1, 1)),
+            self.item(self.event_a, (1, 1)),
+            self.item(self.event_b, (5, 5)),
+            {"event_id": self.event_a},
+        ])
+
+        self.assertEqual([r["success"] for r in results], [True, False, False, False])
+        self.assertIn("already reserved", results[1]["error"])
+        self.assertEqual(results[3]["error"], "Missing booking details")
+        self.admit_attendees.assert_called_once_with(self.event_a, 1)
+
+    def test_malformed_seats_fail_their_item(self):
+        """seats that isn't a list is that item's error, not a 500 for the whole batch."""
+        from backend.batch import book_batch
+
+        results = book_batch(make_user(), [self.item(self.event_a, (1, 1)), {"event_id": self.event_a, "seats": 5}])
+
+        self.assertEqual([r["success"] for r in results], [True, False])
+        self.assertIn("seats must be a list", results[1]["error"])
+
+    def test_lost_claim_race_rolls_back_item(self):
+        """A claim lost between the check and the insert releases that item only."""
+        from pymongo.errors import BulkWriteError
+        from backend.batch import book_batch
+
+        self.collections["SeatClaim"].insert_many.side_effect = BulkWriteError(
+            {"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]}
+        )
+
+        results = book_batch(make_user(), [
+            self.item(self.event_a, (1, 1)),
+            self.item(self.event_b, (3, 4)),
+        ])
+
+        self.assertEqual([r["success"] for r in results], [True, False])
+        self.assertIn("'row': 3", results[1]["error"])
+        deleted = self.collections["SeatClaim"].delete_many.call_args.args[0]
+        self.assertEqual(len(deleted["booking_id"]["$in"]), 1)
+        self.assertNotIn(results[0]["booking_id"], deleted["booking_id"]["$in"])
+        self.release_attendees.assert_called_once_with(self.event_b, 1)
+        self.mark_seats.assert_called_once_with(self.event_a, [(1, 1)], taken=True)
+        self.assertEqual(len(self.collections["Booking"].bulk_write.call_args.args[0]), 1)
+
+    def test_unreaped_expired_hold_is_purged_and_retried(self):
+        """A hold past its expiry doesn't block the seat until the TTL monitor runs."""
+        from pymongo.errors import BulkWriteError
+        from backend.batch import book_batch
+
+        self.collections["SeatClaim"].find.return_value = [
+            {"event_id": self.event_a, "row": 1, "column": 1, "expires_at": datetime(2000, 1, 1)}
+        ]
+        self.collections["SeatClaim"].insert_many.side_effect = [
+            BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate key"}]}),
+            None,
+        ]
+        self.purge_expired.return_value = 1
+
+        results = book_batch(make_user(), [self.item(self.event_a, (1, 1))])
+
+        self.assertTrue(results[0]["success"])
+        self.purge_expired.assert_called_once_with(self.event_a, [(1, 1)])
+        self.assertEqual(self.collections["SeatClaim"].insert_many.call_count, 2)
+        self.release_attendees.assert_not_called()
+
+    def test_unexpected_error_rolls_back_admitted_items(self):
+        """Any failure after admission gives the seats and attendee counts back."""
+        from backend.batch import book_batch
+
+        self.collections["Booking"].bulk_write.side_effect = RuntimeError("connection reset")
+
+        with self.assertRaises(RuntimeError):
+            book_batch(make_user(), [self.item(self.event_a, (1, 1)), self.item(self.event_b, (2, 2))])
+
+        self.assertEqual(self.release_attendees.call_count, 2)
+        self.mark_seats.assert_any_call(self.event_a, [(1, 1)], taken=False)
+        deleted = self.collections["SeatClaim"].delete_many.call_args.args[0]
+        self.assertEqual(len(deleted["booking_id"]["$in"]), 2)
+        self.collections["EventStats"].bulk_write.assert_not_called()
+
+    def test_organizer_cannot_book_own_event(self):
+        """The per-item organizer rule from create_booking still applies."""
+        from backend.batch import book_batch
+
+        results = book_batch(make_user(email="organizer@example.com"), [self.item(self.event_a, (1, 1))])
+
+        self.assertEqual(results[0]["error"], "Organizers cannot book their own events")
+        self.collections["SeatClaim"].insert_many.assert_not_called()
+
+    @override_settings(BATCH_BOOKING_MAX_ITEMS=2)
+    def test_view_limits_batch_size(self):
+        """Oversized batches should be rejected before touching Mongo."""
+        from backend.views import create_bookings_batch
+
+        request = APIRequestFactory().post(
+            "/api/bookings/batch/", {"items": [self.item(self.event_a, (1, i)) for i in range(1, 4)]}, format="json"
+        )
+        force_authenticate(request, user=make_user())
+
+        response = create_bookings_batch(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.collections["Event"].find.assert_not_called()
+
+
+class SeatHoldTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    @patch("backend.seating.SeatMap")
+    @patch("backend.seating.SeatClaim")
+    def test_hold_claims_expire_and_skip_bitmap(self, MockClaim, MockSeatMap):
+        """Held claims carry expires_at for the TTL index and leave the bitmap alone."""
+        from backend.seating import hold_seats
+
+        expires_at = datetime(2025, 1, 1, 12, 5)
+        hold_seats("event123", [(1, 1)], "booking123", expires_at)
+
+        docs = MockClaim._get_collection.return_value.insert_many.call_args[0][0]
+        self.assertEqual(docs[0]["expires_at"], expires_at)
+        MockSeatMap._get_collection.return_value.update_one.assert_not_called()
+
+    @patch("backend.seating.SeatMap")
+    @patch("backend.seating.SeatClaim")
+    def test_expired_hold_not_yet_reaped_is_purged(self, MockClaim, MockSeatMap):
+        """A seat blocked only by an expired hold should be claimable straight away."""
+        from pymongo.errors import BulkWriteError
+        from backend.seating import claim_seats
+
+        collection = MockClaim._get_collection.return_value
+        collection.insert_many.side_effect = [BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]}), None]
+        collection.delete_many.return_value.deleted_count = 1
+
+        claim_seats("event123", [(2, 2)], "booking123")
+
+        self.assertEqual(collection.insert_many.call_count, 2)
+        purge = collection.delete_many.call_args_list[1].args[0]
+        self.assertEqual(purge["$or"], [{"row": 2, "column": 2}])
+        self.assertIn("$lte", purge["expires_at"])
+
+    @patch("backend.seating.held_seats", return_value=[(1, 2)])
+    @patch("backend.seating.SeatMap")
+    def test_bitmap_shows_held_seats(self, MockSeatMap, mock_held):
+        """Seats on hold should look taken to other buyers."""
+        from backend.seating import seat_bitmap, decode_bitmap
+
+        MockSeatMap._get_collection.return_value.with_options.return_value.find_one.return_value = {"words": {"0": 1}}
+
+        self.assertEqual(decode_bitmap(seat_bitmap("event123")), [{"row": 1, "column": 1}, {"row": 1, "column": 2}])
+
+    def confirm(self, user=None):
+        request = self.factory.post("/api/holds/booking123/confirm/")
+        force_authenticate(request, user=user or make_user())
+        from backend.views import confirm_hold
+        return confirm_hold(request, "booking123")
+
+    @patch("backend.views.record_booking")
+    @patch("backend.views.confirm_held_seats", return_value=True)
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.Booking")
+    def test_confirm_admits_and_keeps_seats(self, MockBooking, mock_admit, mock_confirm, mock_record):
+        """Confirming should admit the attendees and make the claims permanent."""
+        booking = make_booking(booking_status="Pending")
+        booking.seats = [MagicMock(row=1, column=1), MagicMock(row=1, column=2)]
+        MockBooking.objects.get.return_value = booking
+        MockBooking.objects.return_value.update_one.return_value = 1
+
+        response = self.confirm()
+
+        self.assertEqual(response.status_code, 200)
+        mock_admit.assert_called_once_with("event123", 2)
+        mock_confirm.assert_called_once_with("event123", [(1, 1), (1, 2)], "booking123")
+        mock_record.assert_called_once_with("event123", 2, booking.total_price)
+
+    @patch("backend.views.release_attendees")
+    @patch("backend.views.confirm_held_seats", return_value=False)
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.Booking")
+    def test_confirm_after_expiry_is_gone(self, MockBooking, mock_admit, mock_confirm, mock_unadmit):
+        """A hold whose claims already expired can't be confirmed."""
+        booking = make_booking(booking_status="Pending")
+        booking.seats = [MagicMock(row=1, column=1)]
+        MockBooking.objects.get.return_value = booking
+        MockBooking.objects.return_value.update_one.return_value = 1
+
+        response = self.confirm()
+
+        self.assertEqual(response.status_code, 410)
+        mock_unadmit.assert_called_once_with("event123", 1)
+        MockBooking.objects.return_value.update_one.assert_called_with(set__booking_status="Cancelled")
+
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.Booking")
+    def test_confirm_needs_the_holder(self, MockBooking, mock_admit):
+        """Only the user who made the hold can confirm it."""
+        MockBooking.objects.get.return_value = make_booking(booking_status="Pending")
+
+        response = self.confirm(make_user(email="someone.else@example.com"))
+
+        self.assertEqual(response.status_code, 403)
+        mock_admit.assert_not_called()
+
+
+@override_settings(WAITING_ROOM_ENABLED=True, WAITING_ROOM_RATE=10, WAITING_ROOM_BURST=5)
+class WaitingRoomTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = make_user()
+        self.factory = APIRequestFactory()
+
+    @patch("backend.waiting_room.time.time")
+    def test_line_advances_at_the_configured_rate(self, mock_time):
+        """A rush should be let in WAITING_ROOM_RATE tickets a second after the first burst."""
+        from backend.waiting_room import join, queue_status
+
+        mock_time.return_value = 1000
+        tickets = [join("event123", self.user)[1] for _ in range(100)]
+
+        self.assertTrue(queue_status(tickets[4], "event123")["admitted"])
+        self.assertEqual(queue_status(tickets[-1], "event123")["position"], 95)
+
+        mock_time.return_value = 1005
+        self.assertEqual(queue_status(tickets[-1], "event123")["position"], 45)
+        mock_time.return_value = 1010
+        self.assertTrue(queue_status(tickets[-1], "event123")["admitted"])
+
+    @patch("backend.waiting_room.time.time")
+    def test_idle_event_does_not_bank_admissions(self, mock_time):
+        """Hours of quiet must not let the next rush straight through."""
+        from backend.waiting_room import join, queue_status
+
+        mock_time.return_value = 1000
+        join("event123", self.user)
+        mock_time.return_value = 1000 + 3600
+        tickets = [join("event123", self.user)[1] for _ in range(100)]
+
+        self.assertFalse(queue_status(tickets[-1], "event123")["admitted"])
+
+    @override_settings(WAITING_ROOM_ADMISSION_SECONDS=1)
+    @patch("backend.waiting_room.time.time")
+    def test_admission_expires_once_the_line_moves_on(self, mock_time):
+        """An early token must not stay on the booking path for the rest of the rush."""
+        from backend.waiting_room import admission_error, join, queue_status
+
+        mock_time.return_value = 1000
+        token, ticket = join("event123", self.user)
+        request = self.factory.post("/api/bookings/", HTTP_X_QUEUE_TOKEN=token)
+        request.user = self.user
+        self.assertIsNone(admission_error(request, ["event123"]))
+
+        for _ in range(200):
+            join("event123", self.user)
+        mock_time.return_value = 1010
+
+        self.assertTrue(queue_status(ticket, "event123")["expired"])
+        self.assertIsNotNone(admission_error(request, ["event123"]))
+
+    def test_token_is_bound_to_event_and_user(self):
+        """A token can't be reused for another event or by another user."""
+        from backend.waiting_room import QueueTokenError, join, read_token
+
+        token, ticket = join("event123", self.user)
+
+        self.assertEqual(read_token(token, "event123", self.user), ticket)
+        with self.assertRaises(QueueTokenError):
+            read_token(token, "event456", self.user)
+        with self.assertRaises(QueueTokenError):
+            read_token(token, "event123", make_user(id="someone-else"))
+
+    @patch("backend.views.Event")
+    def test_booking_without_token_is_turned_away(self, MockEvent):
+        """With the waiting room on, the booking path is closed to clients without a turn."""
+        from backend.views import create_booking
+
+        request = self.factory.post(
+            "/api/bookings/", {"event_id": "event123", "seats": [{"row": 1, "column": 1}]}, format="json"
+        )
+        force_authenticate(request, user=self.user)
+
+        response = create_booking(request)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        MockEvent.objects.get.assert_not_called()
+
+    @patch("backend.views.seat_bitmap", return_value=bytes(10))
+    def test_admitted_token_opens_the_booking_path(self, mock_bitmap):
+        """Joining and then presenting the token should get through once admitted."""
+        from backend.views import join_queue, get_queue_status, get_reserved_seats
+
+        request = self.factory.post("/api/events/event123/queue/")
+        force_authenticate(request, user=self.user)
+        token = join_queue(request, "event123").data["token"]
+
+        request = self.factory.get("/api/events/event123/queue/status/", HTTP_X_QUEUE_TOKEN=token)
+        force_authenticate(request, user=self.user)
+        self.assertTrue(get_queue_status(request, "event123").data["admitted"])
+
+        request = self.factory.get("/api/events/event123/reserved-seats/", HTTP_X_QUEUE_TOKEN=token)
+        force_authenticate(request, user=self.user)
+        self.assertEqual(get_reserved_seats(request, "event123").status_code, 200)
+
+
+class AsyncViewTests(SimpleTestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import AsyncRequestFactory
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    def auth_headers(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken()
+        token["user_id"] = "user123"
+        return {"headers": {"Authorization": f"Bearer {token}"}}
+
+    def mock_collections(self, mock_aio, **collections):
+        from backend.models import Booking, Event, SeatClaim, SeatMap
+        models = {"Booking": Booking, "Event": Event, "SeatClaim": SeatClaim, "SeatMap": SeatMap}
+        by_model = {models[name]: coll for name, coll in collections.items()}
+        mock_aio.collection.side_effect = lambda model, read_preference=None: by_model[model]
+
+    @patch("backend.async_views.aio")
+    async def test_fetch_events_pages_with_hint(self, mock_aio):
+        """The async feed should run the same keyset query, index hint included."""
+        from bson import ObjectId
+        from unittest.mock import AsyncMock
+        from backend.async_views import fetch_events
+
+        docs = [{"_id": ObjectId(), "title": f"Event {i}", "date": datetime(2025, 6, i + 1)} for i in range(3)]
+        events = MagicMock()
+        cursor = events.find.return_value.sort.return_value.limit.return_value.hint.return_value
+        cursor.to_list = AsyncMock(return_value=docs)
+        self.mock_collections(mock_aio, Event=events)
+
+        response = await fetch_events(self.factory.get(
+            "/api/events/", {"status": "Published", "sort": "date", "limit": "2"}
+        ))
+
+        body = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e["title"] for e in body["results"]], ["Event 0", "Event 1"])
+        self.assertIsNotNone(body["next_cursor"])
+        events.find.assert_called_once_with({"status": "Published"}, None)
+        events.find.return_value.sort.assert_called_once_with([("date", 1), ("_id", 1)])
+        events.find.return_value.sort.return_value.limit.return_value.hint.assert_called_once_with(
+            [("status", 1), ("date", 1), ("_id", 1)]
+        )
+
+    @patch("backend.async_views.aget_user")
+    @patch("backend.async_views.aio")
+    async def test_reserved_seats_include_holds(self, mock_aio, mock_get_user):
+        """The async seat map should match the sync one, held seats included."""
+        from unittest.mock import AsyncMock
+        from backend.async_views import get_reserved_seats
+
+        mock_get_user.return_value = make_user()
+        seat_maps, claims = MagicMock(), MagicMock()
+        seat_maps.find_one = AsyncMock(return_value={"words": {"0": 1}})
+        claims.find.return_value.to_list = AsyncMock(return_value=[{"row": 1, "column": 2}])
+        self.mock_collections(mock_aio, SeatMap=seat_maps, SeatClaim=claims)
+
+        response = await get_reserved_seats(
+            self.factory.get("/api/events/event123/reserved-seats/", {"encoding": "list"}, **self.auth_headers()),
+            "event123",
+        )
+
+        self.assertEqual(json.loads(response.content), [{"row": 1, "column": 1}, {"row": 1, "column": 2}])
+        mock_get_user.assert_awaited_once_with("user123")
+
+    async def test_bookings_require_a_token(self):
+        """Without a Bearer token the async views answer 401 like DRF's IsAuthenticated."""
+        from backend.async_views import get_user_bookings
+
+        response = await get_user_bookings(self.factory.get("/api/bookings/get/"))
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_bad_token_is_rejected(self):
+        """A malformed token should be a 401 even on the public feed."""
+        from backend.async_views import fetch_events
+
+        response = await fetch_events(self.factory.get("/api/events/", headers={"Authorization": "Bearer nope"}))
+
+        self.assertEqual(response.status_code, 401)
+
+
+class ReadRoutingTests(SimpleTestCase):
+
+    @override_settings(MONGO_CATALOG_READ_PREFERENCE="secondaryPreferred", MONGO_MAX_STALENESS_SECONDS=120)
+    def test_catalog_reads_prefer_secondaries(self):
+        """Catalog reads should go to secondaries no more than the configured staleness behind."""
+        from pymongo.read_preferences import SecondaryPreferred
+        from backend.routing import catalog_read_preference
+
+        self.assertEqual(catalog_read_preference(), SecondaryPreferred(max_staleness=120))
+
+    @override_settings(MONGO_CATALOG_READ_PREFERENCE="primary")
+    def test_catalog_reads_can_stay_on_primary(self):
+        """Deployments without replicas can keep every read on the primary."""
+        from pymongo.read_preferences import Primary
+        from backend.routing import catalog_read_preference
+
+        self.assertEqual(catalog_read_preference(), Primary())
+
+    @override_settings(MONGO_CATALOG_READ_PREFERENCE="secondaries")
+    def test_unknown_mode_is_rejected(self):
+        from backend.routing import catalog_read_preference
+
+        with self.assertRaises(ValueError):
+            catalog_read_preference()
+
+    @override_settings(MONGO_CATALOG_READ_PREFERENCE="nearest", MONGO_MAX_STALENESS_SECONDS=0)
+    def test_event_catalog_queryset_uses_read_preference(self):
+        """Event.catalog should carry the read preference, Event.objects should not."""
+        from pymongo.read_preferences import Nearest
+        from backend.models import Event
+
+        with patch.object(Event, "_get_collection"):
+            self.assertEqual(Event.catalog._read_preference, Nearest())
+            self.assertIsNone(Event.objects._read_preference)
+
+    @override_settings(MONGO_CATALOG_READ_PREFERENCE="secondaryPreferred", MONGO_MAX_STALENESS_SECONDS=90)
+    def test_feed_recomputes_and_own_reads_prefer_the_primary(self):
+        """Pages the feed cache stores and reads that follow a write must not come from a lagging secondary."""
+        from django.http import QueryDict
+        from pymongo.read_preferences import PrimaryPreferred, SecondaryPreferred
+        from backend.filters import EventListing
+
+        def preference(query):
+            return EventListing(QueryDict(query), make_user()).read_preference
+
+        self.assertEqual(preference("status=Published"), PrimaryPreferred())
+        self.assertEqual(preference("id=64b7f0c2a1b2c3d4e5f60718"), PrimaryPreferred())
+        self.assertEqual(preference("created_by=me"), PrimaryPreferred())
+        self.assertEqual(preference("created_by=organizer@example.com"), SecondaryPreferred(max_staleness=90))
+
+    @patch("backend.seating.Event")
+    @patch("backend.seating.SeatMap")
+    def test_seat_map_rebuild_reads_the_primary(self, MockSeatMap, MockEvent):
+        """Rebuilding a seat map reads back its own write, so it must not use a secondary."""
+        from backend.seating import rebuild_seat_map
+
+        with patch("backend.seating.SeatClaim") as MockClaim:
+            MockClaim._get_collection.return_value.find.return_value = []
+            rebuild_seat_map("64b7f0c2a1b2c3d4e5f60718")
+
+        MockSeatMap._get_collection.return_value.find_one.assert_called_once()
+        MockSeatMap._get_collection.return_value.with_options.assert_not_called()
+
+
+class EventStatsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def get(self, user=None):
+        request = self.factory.get("/api/events/event123/stats/")
+        force_authenticate(request, user=user or make_user(email="organizer@example.com"))
+        from backend.views import get_event_stats
+        return get_event_stats(request, "event123")
+
+    @patch("backend.stats.EventStats")
+    def test_booking_and_cancellation_are_increments(self, MockStats):
+        """Confirming and cancelling should each be one upserted $inc on the event's stats."""
+        from backend.stats import record_booking, record_cancellation
+
+        record_booking("event123", 2, 50.0)
+        record_cancellation("event123", 2, 50.0)
+
+        first, second = MockStats._get_collection.return_value.update_one.call_args_list
+        self.assertEqual(first.args[0], {"event_id": "event123"})
+        self.assertEqual(first.args[1]["$inc"], {"tickets_sold": 2, "revenue": 50.0, "bookings": 1})
+        self.assertEqual(second.args[1]["$inc"], {"tickets_sold": -2, "revenue": -50.0, "bookings": -1})
+        self.assertTrue(first.kwargs["upsert"])
+
+    def test_remaining_capacity(self):
+        """Remaining seats come from capacity, unlimited events have none."""
+        from backend.stats import stats_dict
+
+        doc = {"tickets_sold": 30, "bookings": 12, "revenue": 299.999}
+        self.assertEqual(stats_dict(doc, 100)["remaining"], 70)
+        self.assertEqual(stats_dict(doc, 100)["revenue"], 300.0)
+        self.assertIsNone(stats_dict(doc, 0)["remaining"])
+        self.assertEqual(stats_dict(None, 10)["tickets_sold"], 0)
+
+    @patch("backend.views.stats_for")
+    @patch("backend.views.Event")
+    def test_organizer_reads_one_document(self, MockEvent, mock_stats_for):
+        """The endpoint should answer from the stats document without touching bookings."""
+        event = MockEvent.objects.only.return_value.get.return_value = make_event(created_by="organizer@example.com")
+        event.capacity = 100
+        mock_stats_for.return_value = {"event123": {"event_id": "event123", "tickets_sold": 40, "bookings": 20, "revenue": 800.0}}
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["tickets_sold"], 40)
+        self.assertEqual(response.data["remaining"], 60)
+        mock_stats_for.assert_called_once_with(["event123"])
+
+    @patch("backend.views.rebuild_stats")
+    @patch("backend.views.stats_for", return_value={})
+    @patch("backend.views.Event")
+    def test_missing_stats_are_rebuilt(self, MockEvent, mock_stats_for, mock_rebuild):
+        """Events sold before stats existed get counted from their bookings once."""
+        event = MockEvent.objects.only.return_value.get.return_value = make_event(created_by="organizer@example.com")
+        event.capacity = 0
+        mock_rebuild.return_value = {"tickets_sold": 3, "bookings": 1, "revenue": 30.0}
+
+        response = self.get()
+
+        self.assertEqual(response.data["tickets_sold"], 3)
+        mock_rebuild.assert_called_once_with("event123")
+
+    @patch("backend.views.stats_for")
+    @patch("backend.views.Event")
+    def test_other_users_are_denied(self, MockEvent, mock_stats_for):
+        """Sales figures are only for the organizer."""
+        MockEvent.objects.only.return_value.get.return_value = make_event(created_by="organizer@example.com")
+
+        response = self.get(make_user(email="someone.else@example.com"))
+
+        self.assertEqual(response.status_code, 403)
+        mock_stats_for.assert_not_called()
+
+    def test_stats_need_own_listing(self):
+        """?stats= on the public feed would leak revenue, so it needs created_by=me."""
+        from backend.views import fetch_events
+
+        response = fetch_events(self.factory.get("/api/events/", {"stats": "1"}))
+
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingHistoryTests(SimpleTestCase):
+
+    def test_event_fields_from_document_or_raw(self):
+        """Event documents and raw pymongo events give the same booking fields."""
+        from datetime import date
+        from backend.models import booking_event_fields
+
+        event = make_event(title="Jazz Night")
+        event.date, event.time, event.location, event.city, event.image_url = (
+            date(2025, 6, 1), "20:00", "Blue Note", "Warsaw", None
+        )
+        raw = {"title": "Jazz Night", "date": datetime(2025, 6, 1), "time": "20:00", "location": "Blue Note", "city": "Warsaw"}
+
+        self.assertEqual(booking_event_fields(event), booking_event_fields(raw))
+        self.assertEqual(booking_event_fields(raw)["event_date"], "2025-06-01")
+
+    @patch("backend.views.Booking")
+    def test_history_is_one_query(self, MockBooking):
+        """My tickets should come back with event summaries from a single projected query."""
+        from bson import ObjectId
+        from backend.views import get_user_bookings
+
+        booking_id = ObjectId()
+        queryset = MockBooking.objects.return_value.only.return_value.order_by.return_value
+        queryset.as_pymongo.return_value = [{
+            "_id": booking_id, "event_id": "event123", "event_title": "Jazz Night",
+            "event_date": "2025-06-01", "event_location": "Blue Note", "num_tickets": 2,
+        }]
+
+        request = APIRequestFactory().get("/api/bookings/get/")
+        force_authenticate(request, user=make_user())
+        response = get_user_bookings(request)
+
+        self.assertEqual(response.data[0]["booking_id"], str(booking_id))
+        self.assertEqual(response.data[0]["event_date"], "2025-06-01")
+        self.assertIsNone(response.data[0]["event_city"])
+        MockBooking.objects.assert_called_once_with(user_email="test@example.com")
+
+
+class RendererTests(SimpleTestCase):
+
+    def test_matches_drf_json_renderer(self):
+        """Swapping the renderer must not change what clients receive."""
+        from datetime import date, timezone
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from backend.renderers import ORJSONRenderer
+
+        data = {
+            "naive": datetime(2025, 6, 1, 20, 0, 0, 123456),
+            "utc": datetime(2025, 6, 1, tzinfo=timezone.utc),
+            "day": date(2025, 6, 1),
+            "price": Decimal("49.50"),
+            "nested": [{"tags": ("jazz", "live")}],
+        }
+
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    def test_raw_documents_render_directly(self):
+        """ObjectIds from as_pymongo documents are converted while encoding."""
+        from bson import ObjectId
+        from backend.renderers import ORJSONRenderer
+
+        oid = ObjectId()
+
+        self.assertEqual(json.loads(ORJSONRenderer().render([{"id": oid}])), [{"id": str(oid)}])
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class AttendeeExportTests(SimpleTestCase):
+
+    def setUp(self):
+        from bson import ObjectId
+
+        self.booking_id = ObjectId()
+        patcher = patch("backend.exports.Booking")
+        self.bookings = patcher.start()._get_collection.return_value
+        self.addCleanup(patcher.stop)
+        self.bookings.find.return_value.sort.return_value = iter([{
+            "_id": self.booking_id, "user_name": "Ann, Smith", "user_email": "ann@example.com",
+            "seats": [{"row": 1, "column": 1}, {"row": 1, "column": 2}], "num_tickets": 2,
+            "created_at": datetime(2025, 6, 1, 12, 0),
+        }])
+
+    @patch("backend.views.Event")
+    def export(self, export_format, MockEvent, user=None, accept=None):
+        MockEvent.objects.only.return_value.get.return_value = make_event(created_by="organizer@example.com")
+        headers = {"HTTP_ACCEPT": accept} if accept else {}
+        request = APIRequestFactory().get(f"/api/events/event123/attendees.{export_format}", **headers)
+        force_authenticate(request, user=user or make_user(email="organizer@example.com"))
+        from backend.views import export_attendees
+        return export_attendees(request, "event123", export_format)
+
+    def test_csv_streams_one_line_per_seat(self):
+        """The header goes out before Mongo is queried, then one CSV line per seat."""
+        response = self.export("csv", accept="text/csv")
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks), b"booking_id,name,email,row,column,tickets,booked_at\r\n")
+        self.bookings.find.assert_not_called()
+
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual(lines, [
+            f'{self.booking_id},"Ann, Smith",ann@example.com,1,1,2,2025-06-01T12:00:00',
+            f'{self.booking_id},"Ann, Smith",ann@example.com,1,2,2,2025-06-01T12:00:00',
+        ])
+        query = self.bookings.find.call_args
+        self.assertEqual(query.args[0], {"event_id": "event123", "booking_status": "Confirmed"})
+        self.assertIn("batch_size", query.kwargs)
+
+    def test_csv_defuses_formulas(self):
+        """Names and emails starting with =, +, - or @ must not run as spreadsheet formulas."""
+        self.bookings.find.return_value.sort.return_value = iter([{
+            "_id": self.booking_id, "user_name": "=HYPERLINK(\"http://evil\")", "user_email": "@evil.example",
+            "seats": [{"row": 1, "column": 1}], "num_tickets": 1, "created_at": None,
+        }])
+
+        response = self.export("csv", accept="text/csv")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[1], f'{self.booking_id},"\'=HYPERLINK(""http://evil"")",\'@evil.example,1,1,1,')
+
+    def test_jsonl(self):
+        response = self.export("jsonl")
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([(r["row"], r["column"]) for r in rows], [(1, 1), (1, 2)])
+        self.assertEqual(rows[0]["email"], "ann@example.com")
+
+    @patch("backend.exports.aio")
+    @patch("backend.views.Event")
+    async def test_asgi_streams_from_the_async_driver(self, MockEvent, mock_aio):
+        """Under ASGI the manifest is an async iterator, so Django doesn't buffer it whole."""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncRequestFactory
+        from backend.views import export_attendees
+
+        async def cursor():
+            yield {"_id": self.booking_id, "user_email": "ann@example.com", "seats": [{"row": 2, "column": 3}]}
+
+        mock_aio.collection.return_value.find.return_value.sort.return_value = cursor()
+        MockEvent.objects.only.return_value.get.return_value = make_event(created_by="organizer@example.com")
+        request = AsyncRequestFactory().get("/api/events/event123/attendees.csv")
+        force_authenticate(request, user=make_user(email="organizer@example.com"))
+
+        response = await sync_to_async(export_attendees)(request, "event123", "csv")
+
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 2)
+        self.assertIn(b",2,3,", lines[1])
+        self.bookings.find.assert_not_called()
+
+    def test_only_the_organizer(self):
+        """Attendee contact details are only for the event's organizer."""
+        response = self.export("csv", user=make_user(email="someone.else@example.com"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.export("xlsx").status_code, 404)
+
+
+class InstrumentationTests(SimpleTestCase):
+
+    def run_request(self, commands):
+        """Serve one request through PerformanceMiddleware whose view sends commands through the listener"""
+        from django.http import HttpResponse
+        from backend.instrumentation import CommandTimer, PerformanceMiddleware
+
+        timer = CommandTimer()
+
+        def view(request):
+            # Django's handler calls process_view inside the middleware chain
+            middleware.process_view(request, view, (), {})
+            for request_id, (command, micros) in enumerate(commands):
+                timer.started(MagicMock(command=command, request_id=request_id))
+                timer.succeeded(MagicMock(duration_micros=micros, reply={"ok": 1}, request_id=request_id))
+            return HttpResponse("ok")
+
+        middleware = PerformanceMiddleware(view)
+        return middleware(RequestFactory().get("/api/events/"))
+
+    @override_settings(PERF_REPLY_BYTES=True)
+    def test_counts_mongo_commands_per_request(self):
+        """Server-Timing and the log line should carry the request's Mongo count, time and bytes."""
+        find = {"find": "events", "filter": {"status": "Published"}}
+
+        with self.assertLogs("backend.perf", "INFO") as logs:
+            response = self.run_request([(find, 1500), (find, 500)])
+
+        self.assertIn('mongo;dur=2.0;desc="2 commands, 26 bytes"', response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["mongo_commands"], 2)
+        self.assertEqual(record["mongo_bytes"], 26)
+        self.assertTrue(record["view"].endswith(".view"))
+
+    @patch("backend.instrumentation.bson.encode")
+    def test_reply_bytes_are_not_counted_by_default(self, mock_encode):
+        """Re-encoding every reply is opt-in, it costs more than it measures."""
+        with self.assertLogs("backend.perf", "INFO"):
+            response = self.run_request([({"find": "events"}, 1000)])
+
+        mock_encode.assert_not_called()
+        self.assertIn('desc="1 commands"', response["Server-Timing"])
+
+    def test_commands_outside_requests_are_ignored(self):
+        from backend.instrumentation import CommandTimer, current
+
+        CommandTimer().succeeded(MagicMock(duration_micros=10, reply={}))
+
+        self.assertIsNone(current())
+
+    @override_settings(PERF_SLOW_REQUEST_MS=0, PERF_SLOW_SAMPLE_RATE=1.0)
+    def test_slow_requests_log_query_shapes(self):
+        """Sampled slow requests list each command's shape, without its values."""
+        command = {"find": "bookings", "filter": {"user_email": "a@example.com", "_id": {"$in": [1, 2]}}, "lsid": {}}
+
+        with self.assertLogs("backend.perf", "WARNING") as logs:
+            self.run_request([(command, 100)])
+
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertTrue(record["slow_request"])
+        self.assertEqual(record["queries"], [{"find": "bookings", "filter": {"user_email": "str", "_id": {"$in": ["int"]}}}])
+
+
+class MetricsTests(SimpleTestCase):
+
+    def sample(self, name, labels=None):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+    def test_latency_is_labelled_by_url_pattern(self):
+        """Requests are timed under their route from urls.py, not their raw path."""
+        from django.test import Client
+
+        labels = {"method": "GET", "route": "api/events/search/", "status": "4xx"}
+        before = self.sample("http_request_duration_seconds_count", labels)
+
+        Client().get("/api/events/search/")
+
+        self.assertEqual(self.sample("http_request_duration_seconds_count", labels), before + 1)
+        self.assertEqual(self.sample("http_requests_in_flight"), 0)
+
+    def test_pool_checkout_waits(self):
+        from backend.metrics import PoolTimer
+
+        before = self.sample("mongo_pool_checkout_seconds_count")
+        PoolTimer().connection_checked_out(MagicMock(duration=0.002))
+        PoolTimer().connection_check_out_failed(MagicMock(duration=1.5, reason="timeout"))
+
+        self.assertEqual(self.sample("mongo_pool_checkout_seconds_count"), before + 2)
+        self.assertGreaterEqual(self.sample("mongo_pool_checkout_failures_total", {"reason": "timeout"}), 1)
+
+    @patch("backend.views.release_attendees")
+    @patch("backend.views.admit_attendees")
+    @patch("backend.views.claim_seats")
+    @patch("backend.views.Booking")
+    @patch("backend.views.Event")
+    def test_booking_conflicts_are_counted(self, MockEvent, MockBooking, mock_claim, mock_admit, mock_unadmit):
+        """A lost seat race shows up as a conflict, not a success."""
+        from backend.seating import SeatTakenError
+        from backend.views import create_booking
+
+        MockEvent.objects.get.return_value = make_event(created_by="organizer@example.com")
+        mock_claim.side_effect = SeatTakenError((1, 1))
+        labels = {"endpoint": "booking", "outcome": "conflict"}
+        before = self.sample("bookings_total", labels)
+
+        request = APIRequestFactory().post(
+            "/api/bookings/", {"event_id": "event123", "seats": [{"row": 1, "column": 1}]}, format="json"
+        )
+        force_authenticate(request, user=make_user())
+        create_booking(request)
+
+        self.assertEqual(self.sample("bookings_total", labels), before + 1)
+
+    def test_metrics_endpoint(self):
+        from django.test import Client
+
+        response = Client().get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"http_request_duration_seconds", response.content)
+
+
+@skipUnless(os.environ.get("QUERY_BUDGET_MONGO_HOST"), "set QUERY_BUDGET_MONGO_HOST to a disposable mongod")
+@override_settings(WAITING_ROOM_ENABLED=False)
+class QueryBudgetTests(SimpleTestCase):
+    """
+    Real views against a seeded Mongo, each held to a number of round trips
+    and documents examined. A view that starts looping over queries or
+    scanning a collection fails here instead of in production.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from backend.query_budget import BUDGET_HOST_ENV, QueryBudget
+
+        cls.budget = QueryBudget(os.environ[BUDGET_HOST_ENV]).open()
+        cls.seeded = cls.budget.seed()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.budget.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        # The feed cache would answer without touching Mongo at all
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def user(self, index):
+        from backend.models import User
+        return User.objects.get(email=self.seeded["users"][index]["email"])
+
+    def event_id(self, index):
+        return str(self.seeded["events"][index]["_id"])
+
+    def measure(self, view, request, user=None, **kwargs):
+        if user is not None:
+            force_authenticate(request, user=user)
+        response, usage = self.budget.measure(lambda: view(request, **kwargs))
+        self.assertLess(response.status_code, 300, getattr(response, "data", None))
+        self.assertEqual(usage.collscans, [], usage)
+        return response, usage
+
+    def assertWithinBudget(self, usage, round_trips, docs_examined):
+        self.assertLessEqual(usage.round_trips, round_trips, usage)
+        self.assertLessEqual(usage.docs_examined, docs_examined, usage)
+
+    def test_fetch_events(self):
+        from backend.views import fetch_events
+
+        for params in ({"status": "Published"}, {"status": "Published", "category": "Music", "sort": "date"}):
+            with self.subTest(params=params):
+                _, usage = self.measure(fetch_events, self.factory.get("/api/events/", params))
+                # One page plus the row that tells whether there is a next one
+                self.assertWithinBudget(usage, round_trips=1, docs_examined=21)
+
+    def test_search(self):
+        from backend.views import search_events_view
+
+        matching = self.budget.db.events.count_documents({"title": {"$regex": "^Jazz "}})
+        _, usage = self.measure(search_events_view, self.factory.get("/api/events/search/", {"q": "jazz"}))
+        self.assertWithinBudget(usage, round_trips=1, docs_examined=matching)
+
+    def test_user_bookings(self):
+        from backend.views import get_user_bookings
+
+        user = self.user(25)
+        booked = self.budget.db.bookings.count_documents({"user_email": user.email})
+        response, usage = self.measure(get_user_bookings, self.factory.get("/api/bookings/get/"), user)
+
+        self.assertEqual(len(response.data), booked)
+        self.assertWithinBudget(usage, round_trips=1, docs_examined=booked)
+
+    def test_reserved_seats(self):
+        from backend.views import get_reserved_seats
+
+        event_id = self.event_id(19)
+        request = self.factory.get(f"/api/events/{event_id}/reserved-seats/")
+        _, usage = self.measure(get_reserved_seats, request, self.user(1), event_id=event_id)
+        # The seat map, then the live holds (none)
+        self.assertWithinBudget(usage, round_trips=2, docs_examined=1)
+
+    def test_event_stats(self):
+        from backend.views import get_event_stats
+
+        event_id = self.event_id(19)
+        request = self.factory.get(f"/api/events/{event_id}/stats/")
+        _, usage = self.measure(get_event_stats, request, self.user(19), event_id=event_id)
+        self.assertWithinBudget(usage, round_trips=2, docs_examined=2)
+
+    def test_create_booking(self):
+        from backend.views import create_booking
+
+        request = self.factory.post(
+            "/api/bookings/",
+            {"event_id": self.event_id(0), "seats": [{"row": 8, "column": 9}, {"row": 8, "column": 10}], "total_price": 20},
+            format="json",
+        )
+        _, usage = self.measure(create_booking, request, self.user(1))
+        # Event, attendee count, claims, seat map, booking, stats: one write each, however many seats
+        self.assertWithinBudget(usage, round_trips=6, docs_examined=4)
+
+    def test_list_bookings_for_event(self):
+        from backend.views import list_bookings
+
+        event_id = self.event_id(19)
+        booked = self.budget.db.bookings.count_documents({"event_id": event_id})
+        _, usage = self.measure(list_bookings, self.factory.get("/api/bookings/", {"event_id": event_id}), self.user(19))
+        self.assertWithinBudget(usage, round_trips=1, docs_examined=min(booked, 21))
+
+    def test_attendee_export(self):
+        from backend.views import export_attendees
+
+        event_id = self.event_id(19)
+        booked = self.budget.db.bookings.count_documents({"event_id": event_id})
+        _, usage = self.measure(
+            export_attendees, self.factory.get(f"/api/events/{event_id}/attendees.csv"), self.user(19),
+            event_id=event_id, export_format="csv",
+        )
+        self.assertWithinBudget(usage, round_trips=2, docs_examined=1 + booked)
+
+
+class BenchmarkTests(SimpleTestCase):
+
+    def test_ids_are_deterministic(self):
+        from benchmark.dataset import event_id
+
+        self.assertEqual(event_id(5, seed=1), event_id(5, seed=1))
+        self.assertNotEqual(event_id(5, seed=1), event_id(5, seed=2))
+        self.assertNotEqual(event_id(5, seed=1), event_id(6, seed=1))
+
+    def test_booking_counts_are_skewed_and_capped(self):
+        """A few hot events sell most tickets, none past 90% of the hall, the on-sale event nothing."""
+        from benchmark.generator import booking_counts
+
+        counts = booking_counts(events=1000, bookings=20000, seats=2000)
+
+        self.assertEqual(counts[0], 0)
+        self.assertEqual(max(counts), 900)
+        self.assertGreater(counts[4], counts[200])
+        self.assertGreater(sum(counts[1:21]), sum(counts[500:]))
+
+    def test_free_seats_from_bitmap(self):
+        import base64
+        from benchmark.scenarios import free_seats
+
+        # Seats 1 and 2 of row 1 taken in a 2 x 4 hall
+        seat_map = {"rows": 2, "columns": 4, "bitmap": base64.b64encode(bytes([0b11])).decode()}
+
+        self.assertEqual(free_seats(seat_map), [(1, 3), (1, 4), (2, 1), (2, 2), (2, 3), (2, 4)])
+
+    def test_summary_percentiles_and_throughput(self):
+        from benchmark.report import Recorder, compare, summarize
+
+        recorder = Recorder()
+        for ms in range(1, 101):
+            recorder.add("GET /api/events/", ms / 1000, 200)
+        recorder.add("POST /api/bookings/", 0.5, None)
+
+        result = summarize(recorder, elapsed=10)
+        feed = result["endpoints"]["GET /api/events/"]
+
+        self.assertEqual((feed["p50_ms"], feed["p95_ms"], feed["p99_ms"]), (50, 95, 99))
+        self.assertEqual(feed["rps"], 10)
+        self.assertEqual(result["endpoints"]["POST /api/bookings/"]["errors"], 1)
+        self.assertEqual(result["total"], {"requests": 101, "rps": 10.1, "errors": 1})
+        self.assertIn("-50.0%", compare(result, {**result, "endpoints": {
+            "GET /api/events/": {**feed, "rps": 5},
+        }})[2])
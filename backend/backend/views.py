@@ -1,21 +1,50 @@
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from mongoengine.errors import DoesNotExist, NotUniqueError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from mongoengine.errors import DoesNotExist, NotUniqueError, ValidationError
 import json
 import os
 import uuid
-from backend.blob import upload_image_to_blob
+from backend.blob import upload_image_to_blob, upload_image_in_background, get_upload_job
+from backend.derivatives import schedule_variants, variants_for
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.contrib.auth.hashers import make_password, check_password
-from datetime import datetime
+from datetime import datetime, timedelta
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-
-from .models import User, Event, Booking, Seat
+from bson import ObjectId
+
+from .models import BOOKING_EVENT_FIELDS, BOOKING_STATUSES, User, Event, Booking, Seat, booking_event_fields
+from .pagination import InvalidCursor, paginate
+from .routing import catalog_collection
+from .search import search_events
+from .batch import book_batch
+from .waiting_room import QueueTokenError, TOKEN_HEADER, admission_error, join, queue_status, read_token
+from .filters import EVENT_FIELDSETS, EventListing, ListingError, event_dict, event_projection, facet_counts
+from .caching import cached_feed, invalidate_event_feed
+from .exports import ASYNC_EXPORTERS, CONTENT_TYPES, EXPORTERS
+from .metrics import count_booking
+from .renderers import CSVRenderer, JSONLinesRenderer, ORJSONRenderer
+from .stats import rebuild_stats, record_booking, record_cancellation, stats_dict, stats_for
+from .seating import (
+    SeatTakenError,
+    SoldOutError,
+    admit_attendees,
+    release_attendees,
+    normalize_seats,
+    claim_seats,
+    release_seats,
+    seat_bitmap,
+    encode_bitmap,
+    decode_bitmap,
+    hold_seats,
+    confirm_held_seats,
+    release_hold,
+)
 
 
 # --- HELPERS ---
@@ -35,6 +64,40 @@ def serialize_user(user):
     }
 
 
+BOOKING_HISTORY_FIELDS = (
+    "event_id", *BOOKING_EVENT_FIELDS.values(), "num_tickets", "booking_status", "total_price", "created_at",
+)
+
+
+BOOKING_LIST_FIELDS = ("event_id", "user_email", "num_tickets", "booking_status", "total_price")
+
+
+def booking_history_dict(doc):
+    """Raw booking document to a get_user_bookings entry"""
+    data = {"booking_id": str(doc["_id"])}
+    data.update({field: doc.get(field) for field in BOOKING_HISTORY_FIELDS})
+    return data
+
+
+def embed_stats(events):
+    """Attach each event's sales stats, one query for the whole page"""
+    stats = stats_for([e["id"] for e in events])
+    for event in events:
+        event["stats"] = stats_dict(stats.get(event["id"]), event.get("capacity"))
+
+
+def waiting_room_response(request, event_ids):
+    """429 for requests the waiting room hasn't let through yet, None otherwise"""
+    reason = admission_error(request, event_ids)
+    if reason is None:
+        return None
+    return Response(
+        {"error": reason, "waiting_room": True},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": "1"},
+    )
+
+
 # --- AUTH VIEWS ---
 
 @api_view(["POST"])
@@ -95,17 +158,15 @@ def login_view(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
-    try:
-        user = User.objects.get(id=request.user.id)
-        return Response(serialize_user(user))
-    except DoesNotExist:
-        return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+    # Already resolved (and cached) by MongoJWTAuthentication
+    return Response(serialize_user(request.user))
 
 
 @api_view(["PUT"])
 @permission_classes([IsAuthenticated])
 def update_current_user(request):
     try:
+        # Fresh copy: request.user is the shared cached instance and must not be modified
         user = User.objects.get(id=request.user.id)
         data = request.data
 
@@ -124,42 +185,61 @@ def update_current_user(request):
 
 @api_view(["GET"])
 def fetch_events(request):
-    event_id = request.GET.get("id")
-    status_filter = request.GET.get("status")
-    created_by_who = request.GET.get("created_by")
+    # Without created_by the feed is the same for everyone, so serve it from the shared cache
+    if not request.GET.get("created_by"):
+        def compute():
+            response = _fetch_events(request)
+            return response.status_code, response.data
+
+        status_code, data = cached_feed(request.GET, compute)
+        return Response(data, status=status_code)
+
+    return _fetch_events(request)
 
-    if event_id:
-        try:
-            event = Event.objects.get(id=event_id)
-            event_dict = event.to_mongo().to_dict()
-            event_dict["id"] = str(event_dict.pop("_id"))
-            return Response([event_dict])
-        except Event.DoesNotExist:
-            return Response([])
 
-    events = Event.objects()
+def _fetch_events(request):
+    try:
+        listing = EventListing(request.GET, request.user)
+    except ListingError as e:
+        return Response({"error": str(e)}, status=e.status)
+
+    events = catalog_collection(Event, listing.read_preference)
+    if listing.event_id:
+        event = events.find_one(listing.id_filter, listing.projection) if listing.id_filter else None
+        return Response(listing.single(event))
+
+    data = listing.page(list(listing.find(events)))
+    if listing.stats:
+        embed_stats(data["results"])
+    if listing.facets:
+        data["facets"] = facet_counts(listing.match, listing.read_preference)
+    return Response(data)
 
-    if created_by_who == "me":
-        if not request.user.is_authenticated:
-            return Response({"error": "Authentication required"}, status=401)
-        events = events.filter(created_by=request.user.email)
-    elif created_by_who:
-        events = events.filter(created_by=created_by_who)
 
-    if status_filter:
-        events = events.filter(status=status_filter)
+@api_view(["GET"])
+def search_events_view(request):
+    """Full-text search over events, ?q= plus optional category, city, status, date_from, date_to and sort"""
+    try:
+        fields = event_projection(request.GET.get("fields"))
+        image_width = int(request.GET.get("image_width", 0))
+        events, next_cursor = search_events(request.GET, fields)
+    except ValueError as e:
+        # InvalidCursor is a ValueError too
+        return Response({"error": str(e)}, status=400)
 
-    # Simple Pagination
-    limit = int(request.GET.get("limit", 20))
-    events = events.limit(limit)
+    return Response({
+        "results": [event_dict(e, image_width) for e in events],
+        "next_cursor": next_cursor,
+    })
 
-    event_list = []
-    for e in events:
-        edict = e.to_mongo().to_dict()
-        edict["id"] = str(edict.pop("_id"))
-        event_list.append(edict)
 
-    return Response(event_list)
+def parse_tags(value):
+    """Tags from a list or a comma separated string, trimmed and de-duplicated"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return list(dict.fromkeys(t.strip() for t in value if t and t.strip()))
 
 
 from datetime import datetime # Ensure this is imported at the top
@@ -181,8 +261,8 @@ def create_event(request):
         # Converts "YYYY-MM-DD" string to a date object
         event_date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
-        user = User.objects.get(id=request.user.id)
-        
+        user = request.user
+
         event = Event(
             title=data.get("title"),
             description=data.get("description"),
@@ -193,6 +273,12 @@ def create_event(request):
             city=data.get("city"),
             price=price,
             capacity=capacity,
+            image_url=data.get("image_url") or None,
+            banner_url=data.get("banner_url") or None,
+            tags=parse_tags(data.get("tags")),
+            subcategory=data.get("subcategory") or None,
+            ticket_type=data.get("ticket_type") or "Paid",
+            featured=bool(data.get("featured", False)),
             organizer_name=user.full_name,
             organizer_email=user.email,
             organizer_phone=user.phone,
@@ -201,6 +287,16 @@ def create_event(request):
             attendees_count=0
         )
         event.save()
+
+        # Saved before looking up variants: if the pipeline finishes after this
+        # lookup it finds the event by image_url and fills them in itself
+        ready = variants_for(event.image_url, event.banner_url)
+        if ready:
+            Event.objects(id=event.id).update_one(
+                set__image_variants=ready.get(event.image_url, {}),
+                set__banner_variants=ready.get(event.banner_url, {}),
+            )
+            invalidate_event_feed()
         return Response({"success": True, "id": str(event.id)}, status=status.HTTP_201_CREATED)
     except Exception as e:
         return Response({"error": f"Backend Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -225,6 +321,53 @@ def delete_event(request, event_id):
         return Response({"error": "Not found"}, status=404)
 
 
+def organized_event(request, event_id, *fields):
+    """(event, error response) for an event the user organizes, admins may see any"""
+    try:
+        event = Event.objects.only("created_by", *fields).get(id=event_id)
+    except (DoesNotExist, ValidationError):
+        return None, Response({"error": "Not found"}, status=404)
+
+    if event.created_by != request.user.email and getattr(request.user, "role", None) != "admin":
+        return None, Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    return event, None
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_event_stats(request, event_id):
+    """Tickets sold, bookings, revenue and remaining capacity of one of the organizer's events"""
+    event, error = organized_event(request, event_id, "capacity")
+    if error:
+        return error
+
+    # Events not sold since rebuild_event_stats ran have no document yet, count them
+    # once. Older sales must have been backfilled: a booking's $inc would hide them.
+    doc = stats_for([event_id]).get(event_id) or rebuild_stats(event_id)
+    return Response({"event_id": event_id, **stats_dict(doc, event.capacity)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, CSVRenderer, JSONLinesRenderer])
+def export_attendees(request, event_id, export_format):
+    """The event's attendee manifest, one line per seat, streamed as CSV or JSON lines"""
+    if export_format not in EXPORTERS:
+        return Response({"error": f"Export format must be one of {', '.join(EXPORTERS)}"}, status=404)
+
+    event, error = organized_event(request, event_id)
+    if error:
+        return error
+
+    # Django buffers a sync iterator whole under ASGI, so stream from the async driver there
+    exporters = ASYNC_EXPORTERS if isinstance(request._request, ASGIRequest) else EXPORTERS
+    response = StreamingHttpResponse(exporters[export_format](event_id), content_type=CONTENT_TYPES[export_format])
+    response["Content-Disposition"] = f'attachment; filename="attendees-{event_id}.{export_format}"'
+    # Keep proxies from holding the stream back until it ends
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 # --- BOOKING VIEWS ---
 
 @api_view(["POST"])
@@ -238,71 +381,275 @@ def create_booking(request):
         if not event_id or not seats_data:
             return Response({"error": "Missing booking details"}, status=400)
 
+        queued = waiting_room_response(request, [event_id])
+        if queued:
+            return queued
+
+        try:
+            seats = normalize_seats(seats_data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
         event = Event.objects.get(id=event_id)
         if event.created_by == request.user.email:
             return Response({"error": "Organizers cannot book their own events"}, status=400)
 
-        active_bookings = Booking.objects(event_id=event_id, booking_status="Confirmed")
-        taken_seats = {(s.row, s.column) for b in active_bookings for s in b.seats}
+        booking = Booking(
+            id=ObjectId(),
+            event_id=event_id,
+            user_email=request.user.email,
+            user_name=getattr(request.user, "full_name", ""),
+            seats=[Seat(row=row, column=column) for row, column in seats],
+            num_tickets=len(seats),
+            total_price=float(data.get("total_price", 0)),
+            booking_status="Confirmed",
+            **booking_event_fields(event)
+        )
+
+        # Admission and seat claims are each a single atomic write, so neither
+        # the capacity nor a seat can be oversold by concurrent requests
+        try:
+            admit_attendees(event_id, len(seats))
+        except SoldOutError as e:
+            count_booking("booking", "sold_out")
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            claim_seats(event_id, seats, str(booking.id))
+        except SeatTakenError as e:
+            release_attendees(event_id, len(seats))
+            count_booking("booking", "conflict")
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            booking.save(force_insert=True)
+        except Exception:
+            release_seats(event_id, seats, str(booking.id))
+            release_attendees(event_id, len(seats))
+            raise
+
+        record_booking(event_id, len(seats), booking.total_price)
+        count_booking("booking", "success")
+        return Response({"success": True, "booking_id": str(booking.id)})
+    except Exception as e:
+        count_booking("booking", "failed")
+        return Response({"error": str(e)}, status=500)
+
 
-        for s in seats_data:
-            if (s["row"], s["column"]) in taken_seats:
-                return Response({"error": f"Seat {s} is already taken"}, status=400)
+# --- SEAT HOLDS ---
+# A hold is a Pending booking whose seat claims expire after SEAT_HOLD_SECONDS.
+# Mongo's TTL indexes delete expired claims and bookings, so nothing has to
+# sweep them. Attendees are only admitted on confirmation because a TTL
+# delete can't give them back.
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_hold(request):
+    """Block seats for the checkout, returns the hold id and when it expires"""
+    data = request.data
+    try:
+        event_id = data.get("event_id")
+        seats_data = data.get("seats", [])
+
+        if not event_id or not seats_data:
+            return Response({"error": "Missing booking details"}, status=400)
+
+        queued = waiting_room_response(request, [event_id])
+        if queued:
+            return queued
+
+        try:
+            seats = normalize_seats(seats_data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        try:
+            event = Event.objects.only("created_by", *BOOKING_EVENT_FIELDS).get(id=event_id)
+        except (DoesNotExist, ValidationError):
+            return Response({"error": "Event not found"}, status=404)
+        if event.created_by == request.user.email:
+            return Response({"error": "Organizers cannot book their own events"}, status=400)
+
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.SEAT_HOLD_SECONDS)
         booking = Booking(
+            id=ObjectId(),
             event_id=event_id,
             user_email=request.user.email,
             user_name=getattr(request.user, "full_name", ""),
-            seats=[Seat(**s) for s in seats_data],
-            num_tickets=len(seats_data),
+            seats=[Seat(row=row, column=column) for row, column in seats],
+            num_tickets=len(seats),
             total_price=float(data.get("total_price", 0)),
-            booking_status="Confirmed"
+            booking_status="Pending",
+            # Outlives its claims so a confirm racing the expiry still finds it
+            expires_at=expires_at + timedelta(seconds=settings.SEAT_HOLD_GRACE_SECONDS),
+            **booking_event_fields(event)
         )
-        booking.save()
 
-        # Update event attendee count
-        event.attendees_count = (event.attendees_count or 0) + len(seats_data)
-        event.save()
+        try:
+            hold_seats(event_id, seats, str(booking.id), expires_at)
+        except SeatTakenError as e:
+            count_booking("hold", "conflict")
+            return Response({"error": str(e)}, status=400)
 
-        return Response({"success": True, "booking_id": str(booking.id)})
+        try:
+            booking.save(force_insert=True)
+        except Exception:
+            release_hold(str(booking.id))
+            raise
+
+        count_booking("hold", "success")
+        return Response(
+            {"success": True, "hold_id": str(booking.id), "expires_at": expires_at.isoformat() + "Z"},
+            status=status.HTTP_201_CREATED
+        )
     except Exception as e:
+        count_booking("hold", "failed")
         return Response({"error": str(e)}, status=500)
 
 
-@api_view(["GET"])
+def _pending_hold(request, hold_id):
+    """(booking, error response) for the current user's Pending booking hold_id"""
+    try:
+        booking = Booking.objects.get(id=hold_id, booking_status="Pending")
+    except (DoesNotExist, ValidationError):
+        return None, Response({"error": "Hold not found or expired"}, status=404)
+    if booking.user_email != request.user.email:
+        return None, Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+    return booking, None
+
+
+@api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def get_user_bookings(request):
-    bookings = Booking.objects.filter(user_email=request.user.email).order_by("-created_at")
-    data = [{
-        "booking_id": str(b.id),
-        "event_title": b.event_title,
-        "num_tickets": b.num_tickets,
-        "booking_status": b.booking_status,
-        "total_price": b.total_price
-    } for b in bookings]
-    return Response(data)
+def confirm_hold(request, hold_id):
+    """Turn a live hold into a Confirmed booking"""
+    booking, error = _pending_hold(request, hold_id)
+    if error:
+        return error
+
+    # Flipping the status first makes sure only one confirm gets past here
+    flipped = Booking.objects(id=hold_id, booking_status="Pending").update_one(
+        set__booking_status="Confirmed", unset__expires_at=True, set__updated_at=datetime.utcnow()
+    )
+    if not flipped:
+        count_booking("confirm_hold", "expired")
+        return Response({"error": "Hold not found or expired"}, status=404)
+
+    def cancel():
+        Booking.objects(id=hold_id).update_one(set__booking_status="Cancelled")
+
+    seats = [(s.row, s.column) for s in booking.seats]
+    try:
+        admit_attendees(booking.event_id, len(seats))
+    except SoldOutError as e:
+        release_hold(hold_id)
+        cancel()
+        count_booking("confirm_hold", "sold_out")
+        return Response({"error": str(e)}, status=400)
+
+    if not confirm_held_seats(booking.event_id, seats, hold_id):
+        release_attendees(booking.event_id, len(seats))
+        cancel()
+        count_booking("confirm_hold", "expired")
+        return Response({"error": "Hold expired"}, status=status.HTTP_410_GONE)
+
+    record_booking(booking.event_id, len(seats), booking.total_price)
+    count_booking("confirm_hold", "success")
+    return Response({"success": True, "booking_id": hold_id})
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def cancel_hold(request, hold_id):
+    """Give held seats back before the hold runs out"""
+    booking, error = _pending_hold(request, hold_id)
+    if error:
+        return error
 
+    if Booking.objects(id=hold_id, booking_status="Pending").update_one(set__booking_status="Cancelled"):
+        release_hold(hold_id)
+    return Response({"success": True})
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def upload_file(request):
-    if "file" not in request.FILES:
-        return Response({"error": "No file provided"}, status=400)
+def create_bookings_batch(request):
+    """Book several seat groups, possibly for different events, reporting a result per item"""
+    items = request.data.get("items")
+    if not isinstance(items, list) or not items:
+        return Response({"error": "items must be a non-empty list"}, status=400)
+    if len(items) > settings.BATCH_BOOKING_MAX_ITEMS:
+        return Response(
+            {"error": f"At most {settings.BATCH_BOOKING_MAX_ITEMS} items per batch"}, status=400
+        )
 
-    file = request.FILES["file"]
+    queued = waiting_room_response(
+        request, {item.get("event_id") for item in items if isinstance(item, dict) and item.get("event_id")}
+    )
+    if queued:
+        return queued
+
+    try:
+        results = book_batch(request.user, items)
+    except Exception as e:
+        return Response({"error": str(e)}, status=500)
+
+    booked = sum(1 for r in results if r["success"])
+    count_booking("batch", "success", booked)
+    count_booking("batch", "failed", len(results) - booked)
+    return Response({"results": results, "booked": booked, "failed": len(results) - booked})
 
-    if file.size > 2 * 1024 * 1024:
-        return Response({"error": "File exceeds 2MB limit"}, status=400)
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_user_bookings(request):
+    """The user's bookings with their event summaries, one query however many there are"""
+    bookings = (
+        Booking.objects(user_email=request.user.email)
+        .only(*BOOKING_HISTORY_FIELDS)
+        .order_by("-created_at")
+        .as_pymongo()
+    )
+    return Response([booking_history_dict(b) for b in bookings])
+
+
+
+def upload_error(file):
+    """Why an uploaded image is rejected, None if it is fine"""
+    if file is None:
+        return "No file provided"
+    if file.size > 2 * 1024 * 1024:
+        return "File exceeds 2MB limit"
     allowed_exts = [".jpg", ".jpeg", ".png", ".webp"]
-    ext = os.path.splitext(file.name)[1].lower()
-    if ext not in allowed_exts:
-        return Response({"error": "Invalid file type"}, status=400)
+    if os.path.splitext(file.name)[1].lower() not in allowed_exts:
+        return "Invalid file type"
+    return None
 
-    try:
-        blob_url = upload_image_to_blob(file)
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def upload_file(request):
+    file = request.FILES.get("file")
+    error = upload_error(file)
+    if error:
+        return Response({"error": error}, status=400)
+
+    try:
+        job_id = None
+        if settings.BLOB_BACKGROUND_UPLOADS:
+            job_id, blob_url = upload_image_in_background(file)
+        else:
+            blob_url = upload_image_to_blob(file)
+
+        if settings.IMAGE_DERIVATIVES:
+            file.seek(0)
+            schedule_variants(blob_url, file.read())
+
+        if job_id:
+            # file_url is where the blob will be once the job is done
+            return Response(
+                {"file_url": blob_url, "job_id": job_id, "status": "pending"},
+                status=status.HTTP_202_ACCEPTED
+            )
         return Response(
             {"file_url": blob_url},
             status=status.HTTP_201_CREATED
@@ -312,10 +659,22 @@ def upload_file(request):
             {"error": f"Upload failed: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_upload_status(request, job_id):
+    """Poll a background upload started by upload_file"""
+    job = get_upload_job(job_id)
+    if job is None:
+        return Response({"error": "Upload job not found"}, status=404)
+    return Response({"job_id": job_id, **job})
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def list_bookings(request):
-    """Admin or general view to list bookings, filterable by email or event"""
+    """Admin or general view to list bookings, filterable by email or event, one page at a time"""
     user_email = request.query_params.get("user_email")
     event_id = request.query_params.get("event_id")
 
@@ -324,16 +683,15 @@ def list_bookings(request):
         bookings = bookings.filter(user_email=user_email)
     if event_id:
         bookings = bookings.filter(event_id=event_id)
+    bookings = bookings.only(*BOOKING_LIST_FIELDS, "created_at").as_pymongo()
 
-    data = [{
-        "id": str(b.id),
-        "event_id": b.event_id,
-        "user_email": b.user_email,
-        "num_tickets": b.num_tickets,
-        "booking_status": b.booking_status,
-        "total_price": b.total_price
-    } for b in bookings]
-    return Response(data)
+    try:
+        bookings, next_cursor = paginate(bookings, request.query_params)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=400)
+
+    data = [{"id": b["_id"], **{field: b.get(field) for field in BOOKING_LIST_FIELDS}} for b in bookings]
+    return Response({"results": data, "next_cursor": next_cursor})
 
 
 @api_view(["GET"])
@@ -359,26 +717,89 @@ def update_booking(request, booking_id):
     """Update booking status or details"""
     try:
         booking = Booking.objects.get(id=booking_id)
-        data = request.data
-        if "booking_status" in data:
-            booking.booking_status = data["booking_status"]
-        booking.save()
-        return Response({"success": True})
     except DoesNotExist:
         return Response({"error": "Booking not found"}, status=404)
 
+    data = request.data
+    if "booking_status" not in data:
+        booking.save()
+        return Response({"success": True})
+
+    old_status, new_status = booking.booking_status, data["booking_status"]
+    if new_status not in BOOKING_STATUSES:
+        return Response({"error": f"booking_status must be one of {', '.join(BOOKING_STATUSES)}"}, status=400)
+    if old_status == "Pending" and new_status == "Confirmed":
+        # Claiming here would collide with the hold's own claims, confirm_hold turns them into sold seats
+        return Response({"error": f"Confirm holds with POST /api/holds/{booking_id}/confirm/"}, status=400)
+
+    # Flipping the status first makes sure only one of two concurrent updates moves seats and counters
+    flipped = Booking.objects(id=booking.id, booking_status=old_status).update_one(
+        set__booking_status=new_status, set__updated_at=datetime.utcnow()
+    )
+    if not flipped:
+        return Response({"error": "Booking was changed meanwhile, try again"}, status=409)
+
+    def undo():
+        Booking.objects(id=booking.id, booking_status=new_status).update_one(set__booking_status=old_status)
+
+    was_confirmed = old_status == "Confirmed"
+    is_confirmed = new_status == "Confirmed"
+
+    # Seats follow the booking: cancelling frees them, re-confirming has to win them back
+    seats = [(s.row, s.column) for s in booking.seats]
+    if was_confirmed and not is_confirmed:
+        release_seats(booking.event_id, seats, str(booking.id))
+        release_attendees(booking.event_id, len(seats))
+    elif is_confirmed and not was_confirmed:
+        try:
+            admit_attendees(booking.event_id, len(seats))
+        except SoldOutError as e:
+            undo()
+            return Response({"error": str(e)}, status=400)
+        try:
+            claim_seats(booking.event_id, seats, str(booking.id))
+        except SeatTakenError as e:
+            release_attendees(booking.event_id, len(seats))
+            undo()
+            return Response({"error": str(e)}, status=400)
+
+    if was_confirmed != is_confirmed:
+        record = record_booking if is_confirmed else record_cancellation
+        record(booking.event_id, booking.num_tickets, booking.total_price)
+    return Response({"success": True})
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_reserved_seats(request, event_id):
-    bookings = Booking.objects(
-        event_id=event_id,
-        booking_status="Confirmed"
-    )
+    """Seat map as a base64 bitset plus hall dimensions, or ?encoding=list for seat dicts"""
+    queued = waiting_room_response(request, [event_id])
+    if queued:
+        return queued
+
+    bitmap = seat_bitmap(event_id)
 
-    reserved = [
-        {"row": seat.row, "column": seat.column}
-        for booking in bookings
-        for seat in booking.seats
-    ]
+    if request.query_params.get("encoding") == "list":
+        return Response(decode_bitmap(bitmap))
 
-    return Response(reserved)
\ No newline at end of file
+    return Response(encode_bitmap(bitmap))
+
+
+# --- WAITING ROOM ---
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def join_queue(request, event_id):
+    """Take a place in the event's waiting room, the token goes in X-Queue-Token"""
+    token, ticket = join(event_id, request.user)
+    return Response({"token": token, **queue_status(ticket, event_id)}, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_queue_status(request, event_id):
+    """Position in the waiting room, answered from the cache without touching Mongo"""
+    try:
+        ticket = read_token(request.META.get(TOKEN_HEADER, ""), event_id, request.user)
+    except QueueTokenError as e:
+        return Response({"error": str(e)}, status=400)
+    return Response(queue_status(ticket, event_id))
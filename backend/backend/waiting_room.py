@@ -0,0 +1,129 @@
+"""
+Virtual waiting room for on-sale spikes.
+
+Joining an event's queue hands out the next ticket number (one cache incr)
+inside a signed token. The admission line moves up by WAITING_ROOM_RATE
+tickets a second, worked out from the clock rather than stored per client,
+so checking a position costs two cache reads and never touches Mongo. The
+line can't run more than WAITING_ROOM_BURST tickets ahead of the last one
+issued, so a quiet event doesn't bank admissions for the next rush.
+
+With WAITING_ROOM_ENABLED the booking endpoints only serve requests that
+carry an admitted token in the X-Queue-Token header. A token stops working
+once the line has moved admission_window() tickets past it, so only the
+most recently admitted users are on the booking path at any time.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+TOKEN_HEADER = "HTTP_X_QUEUE_TOKEN"
+SALT = "backend.waiting_room"
+
+
+class QueueTokenError(ValueError):
+    pass
+
+
+def _issued_key(event_id):
+    return f"queue:{event_id}:issued"
+
+
+def _line_key(event_id):
+    return f"queue:{event_id}:line"
+
+
+def _issue_ticket(event_id):
+    key = _issued_key(event_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, settings.WAITING_ROOM_STATE_TTL):
+            return 1
+        return cache.incr(key)
+
+
+def admitted_upto(event_id):
+    """Highest ticket number let in by now"""
+    now = time.time()
+    ceiling = cache.get(_issued_key(event_id), 0) + settings.WAITING_ROOM_BURST
+    line = cache.get(_line_key(event_id))
+
+    # Only written when the line is new or idle, not on every check
+    if line is None:
+        admitted = ceiling
+    else:
+        admitted = line["admitted"] + settings.WAITING_ROOM_RATE * (now - line["at"])
+    if line is None or admitted > ceiling:
+        admitted = ceiling
+        cache.set(_line_key(event_id), {"admitted": admitted, "at": now}, settings.WAITING_ROOM_STATE_TTL)
+    return int(admitted)
+
+
+def admission_window():
+    """How many tickets behind the line an admitted token keeps working"""
+    return settings.WAITING_ROOM_BURST + int(settings.WAITING_ROOM_RATE * settings.WAITING_ROOM_ADMISSION_SECONDS)
+
+
+def join(event_id, user):
+    """Queue user for event_id, returns (token, ticket)"""
+    # Brings the line up to date first, otherwise the first status check of a
+    # rush would start it a burst past every ticket already handed out
+    admitted_upto(event_id)
+    ticket = _issue_ticket(event_id)
+    token = signing.dumps({"e": str(event_id), "t": ticket, "u": str(user.id)}, salt=SALT)
+    return token, ticket
+
+
+def read_token(token, event_id, user):
+    """Ticket number in token, raises QueueTokenError unless it is this user's for this event"""
+    try:
+        data = signing.loads(token, salt=SALT, max_age=settings.WAITING_ROOM_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise QueueTokenError("Queue token expired, join again")
+    except signing.BadSignature:
+        raise QueueTokenError("Invalid queue token")
+    if data.get("e") != str(event_id) or data.get("u") != str(user.id):
+        raise QueueTokenError("Queue token is for another event or user")
+    return data["t"]
+
+
+def queue_status(ticket, event_id):
+    line = admitted_upto(event_id)
+    position = max(0, ticket - line)
+    expired = ticket < line - admission_window()
+    return {
+        "admitted": position == 0 and not expired,
+        # The turn has passed, the client has to join again
+        "expired": expired,
+        "position": position,
+        # Poll again roughly when it's our turn, but at least every 10 seconds
+        "retry_after": min(10, max(1, math.ceil(position / settings.WAITING_ROOM_RATE))) if position else 0,
+    }
+
+
+def admission_error(request, event_ids):
+    """
+    None if the request may go on to the booking path, otherwise the reason.
+    X-Queue-Token may hold several comma separated tokens, one per event.
+    """
+    if not settings.WAITING_ROOM_ENABLED:
+        return None
+
+    tokens = [t.strip() for t in request.META.get(TOKEN_HEADER, "").split(",") if t.strip()]
+    for event_id in set(map(str, event_ids)):
+        admitted = False
+        for token in tokens:
+            try:
+                ticket = read_token(token, event_id, request.user)
+            except QueueTokenError:
+                continue
+            line = admitted_upto(event_id)
+            admitted = line - admission_window() <= ticket <= line
+            break
+        if not admitted:
+            return f"Join the waiting room for event {event_id} and wait for your turn"
+    return None
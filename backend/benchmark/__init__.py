@@ -0,0 +1,16 @@
+"""
+Load tests and benchmarks for the API. Run them from backend/, next to manage.py.
+
+    python -m benchmark seed --users 1000000 --events 50000 --bookings 5000000
+    python -m benchmark run --scenario browse --concurrency 50 --duration 60
+    python -m benchmark compare benchmark-results/old.json benchmark-results/new.json
+
+seed fills the configured MONGO_DB_NAME with deterministic synthetic data
+(generator.py) and writes a manifest the runner reads. Give the seeding
+shell and the server the same SEAT_MAP_ROWS and SEAT_MAP_COLUMNS, and make
+the hall big enough (say 40 x 50) that hot events don't sell out at once.
+
+run drives one scenario (scenarios.py) against a running server and saves
+p50/p95/p99 latency and requests per second per endpoint, keyed by the git
+commit, so results from two commits can be compared.
+"""
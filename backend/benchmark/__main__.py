@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from benchmark.report import compare, load, save, table
+
+DEFAULT_MANIFEST = Path("benchmark-data.json")
+RESULTS_DIR = Path("benchmark-results")
+
+
+def seed(args):
+    # The generator writes through the app's models and Mongo connection
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "eventbookingapp.settings")
+    import django
+    django.setup()
+    from benchmark.generator import generate
+
+    manifest = generate(args.users, args.events, args.bookings, seed=args.seed, drop=args.drop)
+    args.manifest.write_text(json.dumps(manifest, indent=2))
+    print(f"{manifest['bookings']} bookings, manifest written to {args.manifest}")
+
+
+def run(args):
+    from benchmark.runner import run as run_scenario
+
+    manifest = load(args.manifest)
+    result = asyncio.run(run_scenario(
+        args.base_url, args.scenario, manifest, concurrency=args.concurrency, duration=args.duration, seed=args.seed
+    ))
+    out = args.out or RESULTS_DIR / f"{result['commit'] or 'run'}-{args.scenario}.json"
+    save(out, result)
+    print(table(result))
+    print(f"Saved to {out}")
+
+
+def compare_results(args):
+    print("\n".join(compare(load(args.old), load(args.new))))
+
+
+def main(argv=None):
+    from benchmark.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Seed data, load test the API, compare runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Write a deterministic dataset to MONGO_DB_NAME")
+    seed_parser.add_argument("--users", type=int, default=1_000_000)
+    seed_parser.add_argument("--events", type=int, default=50_000)
+    seed_parser.add_argument("--bookings", type=int, default=2_000_000, help="Upper bound, hot events are capped by hall size")
+    seed_parser.add_argument("--seed", type=int, default=0)
+    seed_parser.add_argument("--drop", action="store_true", help="Drop the app's collections first")
+    seed_parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+    seed_parser.set_defaults(handler=seed)
+
+    run_parser = commands.add_parser("run", help="Load test a running server with one scenario")
+    run_parser.add_argument("--scenario", choices=SCENARIOS, required=True)
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--concurrency", type=int, default=10, help="Virtual users")
+    run_parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed for the virtual users' choices")
+    run_parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST)
+    run_parser.add_argument("--out", type=Path, help=f"Result file, {RESULTS_DIR}/<commit>-<scenario>.json by default")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two saved results")
+    compare_parser.add_argument("old", type=Path)
+    compare_parser.add_argument("new", type=Path)
+    compare_parser.set_defaults(handler=compare_results)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
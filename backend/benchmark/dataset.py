@@ -0,0 +1,28 @@
+"""
+Names and ids shared by the generator and the scenarios.
+
+Ids are derived from (seed, kind, index), so the runner can address any
+seeded document without asking the database.
+"""
+import hashlib
+
+from bson import ObjectId
+
+PASSWORD = "benchmark"
+
+# Skewed like real listings: a few big cities and categories carry most events
+CITIES = {"Warsaw": 35, "Krakow": 20, "Wroclaw": 12, "Gdansk": 10, "Poznan": 10, "Lodz": 8, "Lublin": 5}
+CATEGORIES = {"Music": 40, "Sports": 20, "Theatre": 15, "Tech": 10, "Food": 10, "Art": 5}
+
+
+def object_id(kind, index, seed):
+    """The id of the index-th document of kind, the same in every run with this seed"""
+    return ObjectId(hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=12).digest())
+
+
+def event_id(index, seed):
+    return str(object_id("event", index, seed))
+
+
+def user_email(index):
+    return f"bench{index}@example.com"
@@ -0,0 +1,180 @@
+"""
+Deterministic synthetic data: users, events and their bookings, seat claims,
+seat maps and stats, written straight to the collections in bulk.
+
+The same seed gives the same documents and ids on every run, so two commits
+are measured against identical data. Event popularity follows a Zipf curve,
+a handful of hot events sell most tickets and the long tail almost none.
+Event 0 is left unsold for the on-sale stampede.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from bson.int64 import Int64
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from mongoengine.connection import get_db
+
+from backend.models import Booking, Event, EventStats, SeatClaim, SeatMap, User, booking_event_fields, city_key
+from backend.query_shapes import MODELS
+from backend.seating import _seat_masks
+from benchmark.dataset import CATEGORIES, CITIES, PASSWORD, object_id, user_email
+
+ON_SALE_EVENT = 0
+HOT_EVENTS = 20
+SKEW = 1.1
+# Even the hottest events keep some seats free to fight over
+SOLD_FRACTION = 0.9
+SEATS_PER_BOOKING = 2
+CHUNK_SIZE = 10_000
+
+TITLE_WORDS = ("Jazz", "Rock", "Marathon", "Hamlet", "Python", "Street Food", "Opera", "Derby", "Techno", "Comedy")
+
+
+def booking_counts(events, bookings, seats):
+    """
+    Bookings per event index: bookings spread over events by a Zipf curve on
+    their index, each capped at SOLD_FRACTION of the hall. The on-sale event gets none.
+    """
+    cap = int(seats * SOLD_FRACTION) // SEATS_PER_BOOKING
+    weights = [0.0] + [1 / rank ** SKEW for rank in range(1, events)]
+    total = sum(weights) or 1
+    return [min(cap, round(bookings * weight / total)) for weight in weights]
+
+
+class Writer:
+    """Buffers documents per collection and inserts them CHUNK_SIZE at a time"""
+
+    def __init__(self, db):
+        self.db = db
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, doc):
+        name = model._meta["collection"]
+        buffer = self.buffers.setdefault(name, [])
+        buffer.append(doc)
+        if len(buffer) >= CHUNK_SIZE:
+            self.flush(name)
+
+    def flush(self, name=None):
+        for collection in [name] if name else list(self.buffers):
+            docs = self.buffers.get(collection)
+            if docs:
+                self.db[collection].insert_many(docs, ordered=False)
+                self.counts[collection] = self.counts.get(collection, 0) + len(docs)
+                docs.clear()
+
+
+def seat(index, columns):
+    return index // columns + 1, index % columns + 1
+
+
+def generate(users, events, bookings, seed=0, drop=False, log=print):
+    """Write the dataset to the default connection's database and return its manifest"""
+    rng = random.Random(seed)
+    db = get_db()
+    if drop:
+        for model in MODELS:
+            db.drop_collection(model._meta["collection"])
+
+    rows, columns = settings.SEAT_MAP_ROWS, settings.SEAT_MAP_COLUMNS
+    seats = rows * columns
+    now = datetime.combine(datetime.utcnow().date(), time())
+    writer = Writer(db)
+
+    password = make_password(PASSWORD)
+    for index in range(users):
+        writer.add(User, {
+            "_id": object_id("user", index, seed), "email": user_email(index), "password": password,
+            "full_name": f"Bench User {index}", "city": rng.choices(list(CITIES), list(CITIES.values()))[0],
+            "role": "user", "created_at": now - timedelta(minutes=index), "updated_at": now,
+        })
+    writer.flush()
+    log(f"{users} users")
+
+    counts = booking_counts(events, bookings, seats)
+    for index in range(events):
+        event = {
+            "_id": object_id("event", index, seed),
+            "title": f"{rng.choice(TITLE_WORDS)} {index}",
+            "description": "A night to remember with friends and family.",
+            "category": rng.choices(list(CATEGORIES), list(CATEGORIES.values()))[0],
+            "city": rng.choices(list(CITIES), list(CITIES.values()))[0],
+            "location": f"Venue {rng.randrange(500)}",
+            "date": now + timedelta(days=rng.randrange(1, 365)),
+            "time": f"{rng.randrange(10, 22)}:00",
+            "price": float(rng.randrange(10, 300)),
+            "ticket_type": "Paid",
+            "capacity": seats,
+            "tags": [],
+            # Hot and on-sale events are always listed
+            "status": "Draft" if index > HOT_EVENTS and rng.random() < 0.05 else "Published",
+            "featured": index <= HOT_EVENTS,
+            "attendees_count": 0,
+            "created_by": user_email(rng.randrange(users)),
+            "created_at": now - timedelta(minutes=index),
+            "updated_at": now,
+        }
+        event["tags"] = [event["title"].split()[0].lower(), event["category"].lower()]
+        event["city_key"] = city_key(event["city"])
+        _write_bookings(writer, rng, event, counts[index], users, columns, seed, now)
+        writer.add(Event, event)
+        if index and index % 100_000 == 0:
+            log(f"{index} events")
+    writer.flush()
+
+    log("Building indexes")
+    for model in MODELS:
+        model.ensure_indexes()
+
+    return {
+        "seed": seed,
+        "users": users,
+        "events": events,
+        "bookings": writer.counts.get(Booking._meta["collection"], 0),
+        "hall": {"rows": rows, "columns": columns},
+        "on_sale_event": str(object_id("event", ON_SALE_EVENT, seed)),
+        "hot_events": [str(object_id("event", index, seed)) for index in range(1, min(HOT_EVENTS + 1, events))],
+        "generated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _write_bookings(writer, rng, event, count, users, columns, seed, now):
+    """count bookings of randomly placed seats for event, plus its claims, seat map and stats"""
+    event_id = str(event["_id"])
+    taken = rng.sample(range(event["capacity"]), count * SEATS_PER_BOOKING)
+    summary = booking_event_fields(event)
+    sold = []
+
+    for number in range(count):
+        booking_id = object_id(f"booking:{event_id}", number, seed)
+        booked = [seat(i, columns) for i in taken[number * SEATS_PER_BOOKING:(number + 1) * SEATS_PER_BOOKING]]
+        user = rng.randrange(users)
+        if user_email(user) == event["created_by"]:
+            user = (user + 1) % users
+        created_at = now - timedelta(minutes=rng.randrange(60 * 24 * 30))
+
+        writer.add(Booking, {
+            "_id": booking_id, "event_id": event_id, **summary,
+            "user_email": user_email(user), "user_name": f"Bench User {user}",
+            "seats": [{"row": row, "column": column} for row, column in booked],
+            "num_tickets": len(booked), "total_price": len(booked) * event["price"],
+            "booking_status": "Confirmed", "created_at": created_at, "updated_at": created_at,
+        })
+        for row, column in booked:
+            writer.add(SeatClaim, {
+                "event_id": event_id, "row": row, "column": column,
+                "booking_id": str(booking_id), "created_at": created_at,
+            })
+        sold.extend(booked)
+
+    event["attendees_count"] = len(sold)
+    writer.add(SeatMap, {
+        "event_id": event_id, "rows": settings.SEAT_MAP_ROWS, "columns": columns,
+        "words": {str(word): Int64(mask) for word, mask in _seat_masks(sold).items()},
+    })
+    writer.add(EventStats, {
+        "event_id": event_id, "tickets_sold": len(sold), "bookings": count,
+        "revenue": len(sold) * event["price"], "updated_at": now,
+    })
@@ -0,0 +1,107 @@
+"""
+Latency samples per endpoint, their summary and the saved JSON results.
+"""
+import json
+import subprocess
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Latencies and statuses per endpoint name, a status of None is a failed connection or timeout"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def add(self, endpoint, seconds, status):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+
+def summarize(recorder, elapsed):
+    """{endpoint: stats} plus a "total" entry, latencies in milliseconds"""
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        ordered = sorted(latencies)
+        statuses = recorder.statuses[endpoint]
+        endpoints[endpoint] = {
+            "requests": len(ordered),
+            "rps": round(len(ordered) / elapsed, 2),
+            "errors": sum(n for status, n in statuses.items() if status is None or status >= 500),
+            "statuses": {str(status): n for status, n in sorted(statuses.items(), key=lambda item: str(item[0]))},
+            **{f"p{q}_ms": round(percentile(ordered, q) * 1000, 2) for q in PERCENTILES},
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    requests = sum(stats["requests"] for stats in endpoints.values())
+    return {
+        "endpoints": endpoints,
+        "total": {
+            "requests": requests,
+            "rps": round(requests / elapsed, 2),
+            "errors": sum(stats["errors"] for stats in endpoints.values()),
+        },
+    }
+
+
+def git_commit():
+    """Short hash of HEAD, with a + when the tree has uncommitted changes, None outside a checkout"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit.stdout.strip() + ("+" if dirty.stdout.strip() else "")
+
+
+def table(result):
+    lines = [f"{'endpoint':<44}{'requests':>10}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}"]
+    for endpoint, stats in result["endpoints"].items():
+        lines.append(
+            f"{endpoint:<44}{stats['requests']:>10}{stats['rps']:>10.1f}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['errors']:>8}"
+        )
+    total = result["total"]
+    lines.append(f"{'total':<44}{total['requests']:>10}{total['rps']:>10.1f}{'':>30}{total['errors']:>8}")
+    return "\n".join(lines)
+
+
+def compare(old, new):
+    """Lines comparing two saved results endpoint by endpoint, as new against old"""
+    def change(before, after):
+        if not before:
+            return "     n/a"
+        return f"{(after - before) / before * 100:+7.1f}%"
+
+    lines = [
+        f"{old.get('commit')} -> {new.get('commit')}, {new.get('scenario')}",
+        f"{'endpoint':<44}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}",
+    ]
+    for endpoint, after in new["endpoints"].items():
+        before = old["endpoints"].get(endpoint)
+        if before is None:
+            lines.append(f"{endpoint:<44}{'new':>10}")
+            continue
+        lines.append(f"{endpoint:<44}{change(before['rps'], after['rps']):>10}" + "".join(
+            f"{change(before[f'p{q}_ms'], after[f'p{q}_ms']):>10}" for q in PERCENTILES
+        ))
+    return lines
+
+
+def save(path, result):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(result, indent=2))
+
+
+def load(path):
+    return json.loads(path.read_text())
@@ -0,0 +1,104 @@
+"""
+Runs a scenario from scenarios.py against a live server with aiohttp:
+concurrency virtual users, each logged in as a seeded user and looping the
+scenario until the duration is up or the scenario says it is done.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import aiohttp
+import orjson
+
+from benchmark.dataset import PASSWORD, user_email
+from benchmark.report import Recorder, git_commit, summarize
+from benchmark.scenarios import ANONYMOUS, SCENARIOS
+
+REQUEST_TIMEOUT = 30
+
+
+class VirtualUser:
+    def __init__(self, index, seed):
+        self.index = index
+        self.rng = random.Random(f"{seed}:{index}")
+        self.token = None
+
+
+class Client:
+    """Times every request into a Recorder and returns (status, decoded JSON)"""
+
+    def __init__(self, session, base_url, recorder):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+
+    async def request(self, endpoint, method, path, user=None, **kwargs):
+        headers = {"Authorization": f"Bearer {user.token}"} if user and user.token else {}
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, self.base_url + path, headers=headers, **kwargs) as response:
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.recorder.add(endpoint, time.perf_counter() - started, None)
+            return None, None
+        self.recorder.add(endpoint, time.perf_counter() - started, response.status)
+        try:
+            return response.status, orjson.loads(body) if body else None
+        except orjson.JSONDecodeError:
+            return response.status, None
+
+    async def get(self, endpoint, path, user=None, **kwargs):
+        return await self.request(endpoint, "GET", path, user, **kwargs)
+
+    async def post(self, endpoint, path, user=None, **kwargs):
+        return await self.request(endpoint, "POST", path, user, **kwargs)
+
+
+async def log_in(client, user):
+    status, data = await client.post(
+        "POST /api/login/", "/api/login/", json={"email": user_email(user.index), "password": PASSWORD}
+    )
+    if status != 200:
+        raise RuntimeError(f"Could not log in {user_email(user.index)}: {status} {data}")
+    user.token = data["token"]
+
+
+async def run(base_url, scenario, manifest, concurrency=10, duration=30, seed=0):
+    """Run scenario and return its result, ready to be saved"""
+    iteration = SCENARIOS[scenario]
+    picker = random.Random(seed)
+    users = [VirtualUser(index, seed) for index in picker.sample(range(manifest["users"]), concurrency)]
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if scenario not in ANONYMOUS:
+            # Logins are not part of the measurement
+            setup = Client(session, base_url, Recorder())
+            await asyncio.gather(*(log_in(setup, user) for user in users))
+
+        recorder = Recorder()
+        client = Client(session, base_url, recorder)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def loop(user):
+            while time.perf_counter() < deadline:
+                if not await iteration(client, user, manifest):
+                    return
+
+        await asyncio.gather(*(loop(user) for user in users))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "commit": git_commit(),
+        "scenario": scenario,
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "started_at": started_at.isoformat(),
+        "duration_s": round(elapsed, 2),
+        "dataset": {key: manifest[key] for key in ("seed", "users", "events", "bookings", "hall")},
+        **summarize(recorder, elapsed),
+    }
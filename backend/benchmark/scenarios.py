@@ -0,0 +1,101 @@
+"""
+Scripted user journeys. Each scenario is one iteration of one virtual user:
+an async function of (client, user, manifest) that returns False once there
+is nothing left to do, e.g. when the stampede's event is sold out.
+
+Requests are recorded under their URL pattern, not their path, so every
+event's seat map counts towards the same endpoint.
+"""
+import asyncio
+import base64
+
+from benchmark.dataset import CATEGORIES, CITIES, event_id
+
+# Share of seat map views and bookings that go to the hot events
+HOT_SHARE = 0.8
+SOLD_OUT = "Not enough tickets left for this event"
+
+
+def pick_event(user, manifest):
+    if manifest["hot_events"] and user.rng.random() < HOT_SHARE:
+        return user.rng.choice(manifest["hot_events"])
+    return event_id(user.rng.randrange(1, manifest["events"]), manifest["seed"])
+
+
+def free_seats(seat_map):
+    """(row, column) of every free seat in a reserved-seats response"""
+    bitmap = base64.b64decode(seat_map["bitmap"])
+    columns = seat_map["columns"]
+    return [
+        (i // columns + 1, i % columns + 1)
+        for i in range(seat_map["rows"] * columns)
+        if not bitmap[i // 8] & (1 << (i % 8))
+    ]
+
+
+async def browse(client, user, manifest):
+    """The public feed, sometimes narrowed to a category or city, sometimes paged once"""
+    params = {"status": "Published", "fields": "card"}
+    roll = user.rng.random()
+    if roll < 0.3:
+        params.update(category=user.rng.choice(list(CATEGORIES)), sort="date")
+    elif roll < 0.5:
+        params.update(city=user.rng.choice(list(CITIES)), sort="date")
+
+    status, data = await client.get("GET /api/events/", "/api/events/", params=params)
+    if status == 200 and data.get("next_cursor") and user.rng.random() < 0.5:
+        await client.get("GET /api/events/?cursor", "/api/events/", params={**params, "cursor": data["next_cursor"]})
+    return True
+
+
+async def seat_map(client, user, manifest):
+    await client.get(
+        "GET /api/events/<id>/reserved-seats/", f"/api/events/{pick_event(user, manifest)}/reserved-seats/", user
+    )
+    return True
+
+
+async def _book(client, user, event):
+    """Open the event's seat map and book two free seats, False when none are left"""
+    status, data = await client.get("GET /api/events/<id>/reserved-seats/", f"/api/events/{event}/reserved-seats/", user)
+    if status == 429:
+        # Queued by the waiting room
+        await asyncio.sleep(1)
+        return True
+    if status != 200:
+        return True
+
+    seats = free_seats(data)
+    if len(seats) < 2:
+        return False
+    picked = user.rng.sample(seats, 2)
+    status, data = await client.post("POST /api/bookings/", "/api/bookings/", user, json={
+        "event_id": event,
+        "seats": [{"row": row, "column": column} for row, column in picked],
+        "total_price": 0,
+    })
+    if status == 429:
+        await asyncio.sleep(1)
+    return not (status == 400 and data and data.get("error") == SOLD_OUT)
+
+
+async def book(client, user, manifest):
+    """Book seats across the catalog, mostly on hot events, so some bookings lose seat races"""
+    await _book(client, user, pick_event(user, manifest))
+    return True
+
+
+async def stampede(client, user, manifest):
+    """Every virtual user books the on-sale event at once until it sells out"""
+    return await _book(client, user, manifest["on_sale_event"])
+
+
+SCENARIOS = {
+    "browse": browse,
+    "seat_map": seat_map,
+    "book": book,
+    "stampede": stampede,
+}
+
+# Scenarios that never touch authenticated endpoints skip logging users in
+ANONYMOUS = {"browse"}
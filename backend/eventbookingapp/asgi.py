@@ -3,6 +3,9 @@ ASGI config for eventbookingapp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Set ASYNC_VIEWS=True to route the I/O-bound endpoints to backend.async_views,
+e.g. uvicorn eventbookingapp.asgi:application --workers 2
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from mongoengine import connect
 from datetime import timedelta
 import os 
+import warnings
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +49,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     "corsheaders",
+    "backend",
 ]
 
 DATABASES = {
@@ -58,10 +61,18 @@ DATABASES = {
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'backend.authentication.MongoJWTAuthentication',
-    )
+    ),
+    # orjson for API clients, the browsable API still works in a browser
+    'DEFAULT_RENDERER_CLASSES': (
+        'backend.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 MIDDLEWARE = [
+    # Outermost, so their timings cover everything below them
+    "backend.metrics.MetricsMiddleware",
+    "backend.instrumentation.PerformanceMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -93,12 +104,79 @@ WSGI_APPLICATION = 'eventbookingapp.wsgi.application'
 
 
 # Database connection using environment variables
+MONGO_DB_NAME = os.environ.get("MONGO_DB_NAME")
+MONGO_USER = os.environ.get("MONGO_USER")           # optional if using user/pass
+MONGO_PASSWORD = os.environ.get("MONGO_PASSWORD")   # optional if using user/pass
+MONGO_HOST = os.environ.get("MONGO_HOST")           # full connection string
+
+# Passed straight to MongoClient (and AsyncMongoClient for the async views).
+# Compressors are tried in order, zstd and snappy need their Python packages.
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", 100)),
+    "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", 0)),
+    "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 60000)),
+    "compressors": os.environ.get("MONGO_COMPRESSORS", "zlib"),
+    "serverSelectionTimeoutMS": int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    "connectTimeoutMS": int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    "socketTimeoutMS": int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 20000)),
+}
+
+# Where catalog reads (event listings, search, seat maps) go, see backend.routing.
+# Bookings and every write always use the primary. Mongo requires a max
+# staleness of at least 90 seconds, 0 means unbounded.
+MONGO_CATALOG_READ_PREFERENCE = os.environ.get("MONGO_CATALOG_READ_PREFERENCE", "secondaryPreferred")
+MONGO_MAX_STALENESS_SECONDS = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", 90))
+
+# Per-request latency and Mongo command timings, see backend.instrumentation
+PERF_INSTRUMENTATION = os.environ.get("PERF_INSTRUMENTATION", "True") == "True"
+# Send them to clients in a Server-Timing header
+PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING", "True") == "True"
+# Count reply bytes. Off by default: it re-encodes every reply on the request path
+PERF_REPLY_BYTES = os.environ.get("PERF_REPLY_BYTES", "False") == "True"
+# Requests at least this slow are logged with their query shapes, at this sample rate
+PERF_SLOW_REQUEST_MS = int(os.environ.get("PERF_SLOW_REQUEST_MS", 500))
+PERF_SLOW_SAMPLE_RATE = float(os.environ.get("PERF_SLOW_SAMPLE_RATE", 1.0))
+PERF_MAX_LOGGED_COMMANDS = int(os.environ.get("PERF_MAX_LOGGED_COMMANDS", 50))
+
+if PERF_INSTRUMENTATION:
+    # The command listener only sees clients created after it is registered
+    from backend.instrumentation import register as register_command_timer
+    register_command_timer()
+else:
+    MIDDLEWARE.remove("backend.instrumentation.PerformanceMiddleware")
+
+# Prometheus metrics at /metrics, see backend.metrics. Under gunicorn,
+# gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR so workers share them.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True") == "True"
+
+if METRICS_ENABLED:
+    # Mongo pool checkout waits, same registration rule as the command timer
+    from backend.metrics import register as register_pool_timer
+    register_pool_timer()
+else:
+    MIDDLEWARE.remove("backend.metrics.MetricsMiddleware")
+
+# backend.perf writes one JSON line per request
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "backend.perf": {
+            "handlers": ["console"],
+            "level": os.environ.get("PERF_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 connect(
-    db=os.environ.get("MONGO_DB_NAME"),
-    username=os.environ.get("MONGO_USER"),       # optional if using user/pass
-    password=os.environ.get("MONGO_PASSWORD"),   # optional if using user/pass
-    host=os.environ.get("MONGO_HOST"),           # full connection string
-    alias="default"
+    db=MONGO_DB_NAME,
+    username=MONGO_USER,
+    password=MONGO_PASSWORD,
+    host=MONGO_HOST,
+    alias="default",
+    **MONGO_CLIENT_OPTIONS
 )
 
 
@@ -134,8 +212,92 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Shared cache for all workers when REDIS_URL is set, per-process memory otherwise
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Anonymous event feed responses; stale entries are served for CACHE_STALE_GRACE
+# more seconds while one worker (holding a lock for up to CACHE_LOCK_TIMEOUT) refreshes them
+EVENT_FEED_CACHE_TTL = int(os.environ.get("EVENT_FEED_CACHE_TTL", 30))
+CACHE_STALE_GRACE = 30
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 2
+
+# Resolved users are cached per process, and optionally in the Django cache shared by all workers
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 60))
+USER_CACHE_SHARED = os.environ.get("USER_CACHE_SHARED", "False") == "True"
+
+# Blob uploads: files over BLOB_SINGLE_PUT_SIZE go up as parallel blocks. With
+# BLOB_BACKGROUND_UPLOADS the request returns before the transfer finishes; job
+# status lives in the Django cache, so use a shared cache with several workers.
+BLOB_BLOCK_SIZE = int(os.environ.get("BLOB_BLOCK_SIZE", 1024 * 1024))
+BLOB_SINGLE_PUT_SIZE = int(os.environ.get("BLOB_SINGLE_PUT_SIZE", 1024 * 1024))
+BLOB_UPLOAD_CONCURRENCY = int(os.environ.get("BLOB_UPLOAD_CONCURRENCY", 4))
+BLOB_BACKGROUND_UPLOADS = os.environ.get("BLOB_BACKGROUND_UPLOADS", "False") == "True"
+BLOB_UPLOAD_WORKERS = int(os.environ.get("BLOB_UPLOAD_WORKERS", 4))
+BLOB_MAX_PENDING_UPLOADS = int(os.environ.get("BLOB_MAX_PENDING_UPLOADS", 32))
+BLOB_JOB_TTL = 60 * 60
+
+# Resized/WebP copies of uploaded images, rendered in a separate process pool
+IMAGE_DERIVATIVES = os.environ.get("IMAGE_DERIVATIVES", "True") == "True"
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+
+# Cursor pagination for list endpoints
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Hall layout used for seat validation and the seat bitmap (matches HallMatrix.jsx)
+SEAT_MAP_ROWS = int(os.environ.get("SEAT_MAP_ROWS", 8))
+SEAT_MAP_COLUMNS = int(os.environ.get("SEAT_MAP_COLUMNS", 10))
+
+# How long a seat hold blocks its seats, and how much longer its Pending booking is kept
+SEAT_HOLD_SECONDS = int(os.environ.get("SEAT_HOLD_SECONDS", 300))
+SEAT_HOLD_GRACE_SECONDS = int(os.environ.get("SEAT_HOLD_GRACE_SECONDS", 60))
+
+# Waiting room in front of the booking endpoints (backend.waiting_room): tickets
+# let in per second per event, how far the line may run ahead of the queue,
+# how long a queue token stays valid, for about how many seconds of admissions
+# after its turn it keeps working, and how long queue counters are kept
+WAITING_ROOM_ENABLED = os.environ.get("WAITING_ROOM_ENABLED", "False") == "True"
+WAITING_ROOM_RATE = float(os.environ.get("WAITING_ROOM_RATE", 20))
+WAITING_ROOM_BURST = int(os.environ.get("WAITING_ROOM_BURST", 50))
+WAITING_ROOM_TOKEN_MAX_AGE = int(os.environ.get("WAITING_ROOM_TOKEN_MAX_AGE", 3600))
+WAITING_ROOM_ADMISSION_SECONDS = int(os.environ.get("WAITING_ROOM_ADMISSION_SECONDS", 120))
+WAITING_ROOM_STATE_TTL = int(os.environ.get("WAITING_ROOM_STATE_TTL", 86400))
+
+# The line lives in the cache, with per-process memory every worker runs its own
+if WAITING_ROOM_ENABLED and not os.environ.get("REDIS_URL"):
+    warnings.warn(
+        "WAITING_ROOM_ENABLED without REDIS_URL: each worker keeps its own line, "
+        "so N workers admit N times WAITING_ROOM_RATE. Set REDIS_URL for more than one worker."
+    )
+
+# Serve fetch_events, get_reserved_seats, get_user_bookings and upload_file
+# from backend.async_views (run under ASGI, e.g. uvicorn eventbookingapp.asgi:application)
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False") == "True"
+
+# Most seat groups accepted by one /api/bookings/batch/ request
+BATCH_BOOKING_MAX_ITEMS = int(os.environ.get("BATCH_BOOKING_MAX_ITEMS", 50))
+
+# Bookings fetched per cursor batch while streaming an attendee export
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# The SPA sends its waiting room token with booking requests
+CORS_ALLOW_HEADERS = (*default_headers, "x-queue-token")
 
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:5173",
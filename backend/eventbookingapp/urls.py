@@ -25,27 +25,55 @@ from backend.views import (
     get_current_user,
     update_current_user,
     fetch_events,
+    search_events_view,
     create_booking,
+    create_bookings_batch,
+    create_hold,
+    confirm_hold,
+    cancel_hold,
+    join_queue,
+    get_queue_status,
     get_user_bookings,
     get_reserved_seats,
     create_event,
     upload_file,
+    get_upload_status,
     delete_event,
+    get_event_stats,
+    export_attendees,
 )
 
+if settings.ASYNC_VIEWS:
+    # Same routes and responses, awaited instead of blocking a worker (run under ASGI)
+    from backend.async_views import fetch_events, get_reserved_seats, get_user_bookings, upload_file
+
 urlpatterns = [
     path("api/register/", register_view),
     path("api/login/", login_view),
     path("api/me/", get_current_user),
     path("api/me/update/", update_current_user),
     path("api/events/", fetch_events),
+    path("api/events/search/", search_events_view, name="search-events"),
     path("api/events/<str:event_id>/reserved-seats/", get_reserved_seats),
+    path("api/events/<str:event_id>/stats/", get_event_stats, name="event-stats"),
+    path("api/events/<str:event_id>/attendees.<str:export_format>", export_attendees, name="export-attendees"),
+    path("api/events/<str:event_id>/queue/", join_queue, name="join-queue"),
+    path("api/events/<str:event_id>/queue/status/", get_queue_status, name="queue-status"),
     path("api/events/create/", create_event),
     path("api/events/delete/<str:event_id>/", delete_event, name="delete_event"),
     path("api/bookings/", create_booking),
+    path("api/bookings/batch/", create_bookings_batch, name="bookings-batch"),
+    path("api/holds/", create_hold, name="create-hold"),
+    path("api/holds/<str:hold_id>/", cancel_hold, name="cancel-hold"),
+    path("api/holds/<str:hold_id>/confirm/", confirm_hold, name="confirm-hold"),
     path("api/bookings/get/", get_user_bookings),
     path("api/upload/", upload_file, name="upload-file"),
+    path("api/upload/<str:job_id>/", get_upload_status, name="upload-status"),
 ]
 
+if settings.METRICS_ENABLED:
+    from backend.metrics import metrics_view
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, read from the working directory when gunicorn starts.
+
+Each worker keeps its Prometheus samples in PROMETHEUS_MULTIPROC_DIR and
+/metrics adds them up (see backend.metrics). The directory is emptied when
+gunicorn starts and a dead worker's in-flight gauge is dropped, so restarts
+don't leave stale series behind.
+"""
+import os
+import shutil
+import tempfile
+
+# Workers import the app after forking, so they all see this
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "eventbookingapp-metrics"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
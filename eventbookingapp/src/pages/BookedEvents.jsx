@@ -58,7 +58,7 @@ export default function BookedEvents() {
       <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-8">
         {bookings.map((booking) => (
           <Card
-            key={booking.id}
+            key={booking.booking_id}
             className="bg-[#472426] border-none hover:scale-[1.02] transition"
           >
             <CardContent className="p-6 space-y-4">
@@ -73,12 +73,18 @@ export default function BookedEvents() {
               <div className="space-y-2 text-white/80 text-sm">
                 <div className="flex items-center gap-2">
                   <Calendar className="w-4 h-4" />
-                  <span>{format(new Date(booking.event_date), "PPP")}</span>
+                  <span>
+                    {format(new Date(booking.event_date), "PPP")}
+                    {booking.event_time && ` · ${booking.event_time}`}
+                  </span>
                 </div>
 
                 <div className="flex items-center gap-2">
                   <MapPin className="w-4 h-4" />
-                  <span>{booking.event_location}</span>
+                  <span>
+                    {booking.event_location}
+                    {booking.event_city && `, ${booking.event_city}`}
+                  </span>
                 </div>
 
                 <div className="flex items-center gap-2">
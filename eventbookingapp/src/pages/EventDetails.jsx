@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
 import { Link, useNavigate, useLocation } from "react-router-dom";
-import { createPageUrl } from "../utils";
+import { createPageUrl, decodeSeatBitmap } from "../utils";
 import { Calendar, MapPin, Share2, ArrowLeft } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
@@ -10,6 +10,65 @@ import EventCard from "../components/EventCard";
 import { format } from "date-fns";
 import HallMatrix from "../components/HallMatrix";
 
+const API_URL = "https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net";
+
+const queueKey = (eventId) => `queue:${eventId}`;
+
+// Joins the event's waiting room, polls until it is our turn and returns the admitted X-Queue-Token.
+// A turn that expired while we weren't polling (e.g. a suspended tab) means joining again.
+async function waitForTurn(eventId, token, onPosition) {
+  const queueUrl = `${API_URL}/api/events/${eventId}/queue/`;
+  const join = async () => {
+    const res = await fetch(queueUrl, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) throw new Error("Could not join the waiting room");
+    return res.json();
+  };
+
+  let status = await join();
+  let queueToken = status.token;
+  while (!status.admitted) {
+    if (status.expired) {
+      status = await join();
+      queueToken = status.token;
+      continue;
+    }
+    onPosition(status.position);
+    // Never poll faster than once a second, whatever retry_after says
+    await new Promise((resolve) => setTimeout(resolve, Math.max(1, status.retry_after) * 1000));
+    const poll = await fetch(`${queueUrl}status/`, {
+      headers: { Authorization: `Bearer ${token}`, "X-Queue-Token": queueToken },
+    });
+    if (!poll.ok) throw new Error("Lost our place in the waiting room");
+    status = await poll.json();
+  }
+  onPosition(null);
+  sessionStorage.setItem(queueKey(eventId), queueToken);
+  return queueToken;
+}
+
+// fetch() for the booking path: sends our queue token and, when the waiting
+// room turns us away (429), queues for a new turn and tries once more
+async function queuedFetch(url, { eventId, token, onPosition, headers, ...options }) {
+  const send = (queueToken) =>
+    fetch(url, {
+      ...options,
+      headers: {
+        ...headers,
+        Authorization: `Bearer ${token}`,
+        ...(queueToken && { "X-Queue-Token": queueToken }),
+      },
+    });
+
+  const res = await send(sessionStorage.getItem(queueKey(eventId)));
+  if (res.status !== 429) return res;
+  const body = await res.clone().json().catch(() => ({}));
+  if (!body.waiting_room) return res;
+  return send(await waitForTurn(eventId, token, onPosition));
+}
+
 export default function EventDetails() {
   const navigate = useNavigate();
   const queryClient = useQueryClient();
@@ -23,6 +82,7 @@ export default function EventDetails() {
 
   const [reservedSeats, setReservedSeats] = useState([]);
   const [selectedSeats, setSelectedSeats] = useState([]);
+  const [queuePosition, setQueuePosition] = useState(null);
   const token = localStorage.getItem("token");
 
   useEffect(() => {
@@ -30,15 +90,13 @@ export default function EventDetails() {
 
     const fetchReservedSeats = async () => {
       try {
-        const res = await fetch(
-          `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/${eventId}/reserved-seats/`,
-          {
-            headers: { Authorization: `Bearer ${token}` },
-          }
+        const res = await queuedFetch(
+          `${API_URL}/api/events/${eventId}/reserved-seats/`,
+          { eventId, token, onPosition: setQueuePosition }
         );
-        console.log(res);
+        if (!res.ok) return;
         const data = await res.json();
-        setReservedSeats(data);
+        setReservedSeats(decodeSeatBitmap(data));
       } catch (err) {
         console.error(err);
       }
@@ -82,10 +140,10 @@ export default function EventDetails() {
     queryFn: async () => {
       if (!event) return [];
       const res = await fetch(
-        `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?status=Published&category=${event.category}`
+        `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?status=Published&category=${event.category}&fields=card&image_width=640`
       );
-      const data = await res.json();
-      return data.filter((e) => e._id !== event._id).slice(0, 4);
+      const { results } = await res.json();
+      return results.filter((e) => e._id !== event._id).slice(0, 4);
     },
     enabled: !!event,
   });
@@ -123,12 +181,12 @@ export default function EventDetails() {
     }
     setIsBooking(true);
     try {
-      await fetch("https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/bookings/", {
+      const res = await queuedFetch(`${API_URL}/api/bookings/`, {
+        eventId,
+        token,
+        onPosition: setQueuePosition,
         method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
+        headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           event_id: event.id,
           seats: selectedSeats,
@@ -145,6 +203,12 @@ export default function EventDetails() {
               : selectedSeats.length * event.price,
         }),
       });
+      if (!res.ok) {
+        const { error } = await res.json().catch(() => ({}));
+        alert(error || "Failed to book event.");
+        setIsBooking(false);
+        return;
+      }
 
       alert("Booking confirmed!");
       queryClient.invalidateQueries(["event", eventId]);
@@ -305,6 +369,11 @@ export default function EventDetails() {
               >
                 {isBooking ? "Processing..." : "Book Now"}
               </Button>
+              {queuePosition !== null && (
+                <p className="text-sm text-white/60 text-center">
+                  You are in the waiting room, {queuePosition} ahead of you
+                </p>
+              )}
               <div className="pt-4 border-t border-white/10">
                 <div className="flex justify-between text-sm text-white/60">
                   <span>Attending</span>
@@ -33,36 +33,34 @@ export default function Home() {
   } = useQuery({
     queryKey: ["events", appliedFilters],
     queryFn: async () => {
-      const response = await fetch(
-        "https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?status=Published"
-      );
-
-      if (!response.ok) throw new Error("Failed to load events");
-
-      let allEvents = await response.json();
-
-      // Frontend filtering
+      const params = new URLSearchParams({
+        status: "Published",
+        fields: "card",
+        image_width: "640",
+      });
       if (appliedFilters.category !== "All") {
-        allEvents = allEvents.filter(
-          (e) => e.category === appliedFilters.category
-        );
+        params.set("category", appliedFilters.category);
       }
-
       if (appliedFilters.date) {
         const dateStr = appliedFilters.date.toISOString().split("T")[0];
-        allEvents = allEvents.filter((e) => e.date === dateStr);
+        params.set("date_from", dateStr);
+        params.set("date_to", dateStr);
       }
-
       if (appliedFilters.maxPrice < 500) {
-        allEvents = allEvents.filter((e) => e.price <= appliedFilters.maxPrice);
+        params.set("price_max", appliedFilters.maxPrice);
       }
-
-      if (appliedFilters.city) {
-        allEvents = allEvents.filter((e) =>
-          e.city?.toLowerCase().includes(appliedFilters.city.toLowerCase())
-        );
+      if (appliedFilters.city.trim()) {
+        params.set("city", appliedFilters.city.trim());
       }
 
+      // Filtering happens on the server against the listing indexes
+      const response = await fetch(
+        `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?${params}`
+      );
+
+      if (!response.ok) throw new Error("Failed to load events");
+
+      const { results: allEvents } = await response.json();
       return allEvents;
     },
   });
@@ -10,6 +10,7 @@ import {
   Trash2,
   PlusCircle,
   Eye,
+  Ticket,
 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
@@ -47,13 +48,14 @@ export default function MyEvents() {
     enabled: !!user,
     queryFn: async () => {
       const res = await fetch(
-        `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?created_by=me`,
+        `https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/?created_by=me&stats=1`,
         {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
       if (!res.ok) throw new Error("Failed to fetch events");
-      return res.json();
+      const { results } = await res.json();
+      return results;
     },
   });
 
@@ -161,6 +163,13 @@ export default function MyEvents() {
                     <Users className="w-4 h-4 text-[#ea2a33]" />
                     {event.attendees_count || 0} attending
                   </div>
+                  {event.stats && (
+                    <div className="flex gap-2">
+                      <Ticket className="w-4 h-4 text-[#ea2a33]" />
+                      {event.stats.tickets_sold} sold · ${event.stats.revenue.toFixed(2)}
+                      {event.stats.remaining !== null && ` · ${event.stats.remaining} left`}
+                    </div>
+                  )}
                 </div>
 
                 {/* Actions */}
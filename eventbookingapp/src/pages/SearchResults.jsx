@@ -18,46 +18,36 @@ export default function SearchResults() {
   const initialQuery = urlParams.get("q") || "";
 
   const [searchQuery, setSearchQuery] = useState(initialQuery);
-  const [sortBy, setSortBy] = useState("date");
+  const [sortBy, setSortBy] = useState("relevance");
   const [allEvents, setAllEvents] = useState([]);
 
+  // Relevance and date ordering are done by the server, the rest re-sort the page
+  const serverSort = sortBy === "date" ? "date" : "relevance";
+
   const { isLoading, refetch } = useQuery({
-    queryKey: ["searchEvents", searchQuery],
+    queryKey: ["searchEvents", searchQuery, serverSort],
     queryFn: async () => {
       const token = localStorage.getItem("token");
-      const res = await fetch("https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/", {
+      const params = new URLSearchParams({ q: searchQuery, sort: serverSort });
+      const res = await fetch(`https://evently-f5ergjbxcch2g3hk.switzerlandnorth-01.azurewebsites.net/api/events/search/?${params}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
       });
       if (!res.ok) throw new Error("Failed to fetch events");
-      const data = await res.json();
-      setAllEvents(data);
-      return data;
+      const { results } = await res.json();
+      setAllEvents(results);
+      return results;
     },
     enabled: false,
   });
 
   useEffect(() => {
-    if (initialQuery) refetch();
-  }, [initialQuery, refetch]);
-
-  const filteredEvents = allEvents.filter((event) => {
-    const q = searchQuery.toLowerCase();
-    return (
-      event.title?.toLowerCase().includes(q) ||
-      event.description?.toLowerCase().includes(q) ||
-      event.city?.toLowerCase().includes(q) ||
-      event.location?.toLowerCase().includes(q) ||
-      event.category?.toLowerCase().includes(q) ||
-      (event.tags || []).some((tag) => tag.toLowerCase().includes(q))
-    );
-  });
+    if (searchQuery.trim()) refetch();
+  }, [initialQuery, serverSort, refetch]);
 
-  const sortedEvents = [...filteredEvents].sort((a, b) => {
+  const sortedEvents = [...allEvents].sort((a, b) => {
     switch (sortBy) {
-      case "date":
-        return new Date(a.date) - new Date(b.date);
       case "price-low":
         return (a.price || 0) - (b.price || 0);
       case "price-high":
@@ -119,6 +109,7 @@ export default function SearchResults() {
                   <SelectValue placeholder="Sort by" />
                 </SelectTrigger>
                 <SelectContent className="bg-[#472426] border-white/10 text-white">
+                  <SelectItem value="relevance">Relevance</SelectItem>
                   <SelectItem value="date">Date (Upcoming)</SelectItem>
                   <SelectItem value="price-low">Price (Low to High)</SelectItem>
                   <SelectItem value="price-high">
@@ -9,4 +9,15 @@ export const createPageUrl = (pageName) => {
     'Profile': '/profile'
   };
   return routes[pageName] || '/';
-};
\ No newline at end of file
+};
+// Expands the /reserved-seats/ bitset: seat i is bit i % 8 of byte i / 8
+export const decodeSeatBitmap = ({ rows, columns, bitmap }) => {
+  const bytes = Uint8Array.from(atob(bitmap), (c) => c.charCodeAt(0));
+  const seats = [];
+  for (let i = 0; i < rows * columns; i++) {
+    if (bytes[i >> 3] & (1 << (i & 7))) {
+      seats.push({ row: Math.floor(i / columns) + 1, column: (i % columns) + 1 });
+    }
+  }
+  return seats;
+};